@@ -0,0 +1,29 @@
+"""add player history index
+
+Revision ID: 7c1e5a9d2b40
+Revises: 0470c6b2f83d
+Create Date: 2026-10-19 09:12:44.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e5a9d2b40'
+down_revision: Union[str, Sequence[str], None] = '0470c6b2f83d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_responses_player_created', 'responses',
+                    ['player_id', 'created_at', 'question_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_responses_player_created', table_name='responses')
@@ -0,0 +1,56 @@
+"""add player theme stats
+
+Revision ID: a4f2d8c61e97
+Revises: 7c1e5a9d2b40
+Create Date: 2026-10-19 10:03:27.904115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f2d8c61e97'
+down_revision: Union[str, Sequence[str], None] = '7c1e5a9d2b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTERS = ['answered_count', 'score_sum', 'score_sq_sum',
+            'score_0', 'score_1', 'score_2', 'score_3', 'score_4', 'score_5',
+            'current_streak', 'best_streak']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'player_theme_stats',
+        sa.Column('player_id', sa.Integer(), nullable=False),
+        sa.Column('theme', sa.String(length=50), nullable=False),
+        *[sa.Column(name, sa.Integer(), nullable=False, server_default='0') for name in COUNTERS],
+        sa.Column('last_answered_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['player_id'], ['players.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('player_id', 'theme'),
+    )
+    op.create_index('ix_player_theme_stats_theme_score', 'player_theme_stats',
+                    ['theme', 'score_sum'], unique=False)
+
+    # Backfill from the stored scores, as store_response counts them (score is NOT NULL, an
+    # unscored answer holds 0); streaks start at 0 because answer order is not replayed
+    buckets = ", ".join(
+        f"SUM(CASE WHEN r.score = {i} THEN 1 ELSE 0 END)" for i in range(6))
+    op.execute(f"""
+        INSERT INTO player_theme_stats (player_id, theme, answered_count, score_sum, score_sq_sum,
+            score_0, score_1, score_2, score_3, score_4, score_5, last_answered_at)
+        SELECT r.player_id, q.theme, COUNT(*), COALESCE(SUM(r.score), 0),
+            COALESCE(SUM(r.score * r.score), 0), {buckets}, MAX(r.created_at)
+        FROM responses r JOIN questions q ON q.id = r.question_id
+        GROUP BY r.player_id, q.theme
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_player_theme_stats_theme_score', table_name='player_theme_stats')
+    op.drop_table('player_theme_stats')
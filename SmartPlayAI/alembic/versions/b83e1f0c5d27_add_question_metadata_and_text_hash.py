@@ -0,0 +1,66 @@
+"""add question metadata and text hash
+
+Revision ID: b83e1f0c5d27
+Revises: a4f2d8c61e97
+Create Date: 2026-10-19 11:12:45.318220
+
+"""
+import hashlib
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b83e1f0c5d27'
+down_revision: Union[str, Sequence[str], None] = 'a4f2d8c61e97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+
+
+def question_text_hash(question_text: str) -> str:
+    # Frozen copy of model.crud.question_text_hash as of this revision, so the backfill
+    # does not change with the app (or load its engines and caches)
+    normalized = " ".join(_NON_WORD.sub(" ", question_text.casefold()).split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('questions', sa.Column('severity', sa.String(length=20), nullable=True))
+    op.add_column('questions', sa.Column('subcategory', sa.String(length=50), nullable=True))
+    op.add_column('questions', sa.Column('text_hash', sa.String(length=32), nullable=True))
+
+    # Hash existing questions; later copies of the same text keep a NULL hash so the
+    # unique index can be built without deleting rows that answers may reference
+    conn = op.get_bind()
+    questions = sa.table('questions', sa.column('id', sa.Integer),
+                         sa.column('question_text', sa.Text), sa.column('text_hash', sa.String))
+    seen = set()
+    updates = []
+    for question_id, question_text in conn.execute(
+            sa.select(questions.c.id, questions.c.question_text).order_by(questions.c.id)):
+        text_hash = question_text_hash(question_text)
+        if text_hash not in seen:
+            seen.add(text_hash)
+            updates.append({'qid': question_id, 'text_hash': text_hash})
+    if updates:
+        conn.execute(
+            questions.update().where(questions.c.id == sa.bindparam('qid'))
+            .values(text_hash=sa.bindparam('text_hash')),
+            updates,
+        )
+
+    op.create_index(op.f('ix_questions_text_hash'), 'questions', ['text_hash'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_questions_text_hash'), table_name='questions')
+    op.drop_column('questions', 'text_hash')
+    op.drop_column('questions', 'subcategory')
+    op.drop_column('questions', 'severity')
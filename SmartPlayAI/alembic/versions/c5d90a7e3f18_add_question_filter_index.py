@@ -0,0 +1,28 @@
+"""add question filter index
+
+Revision ID: c5d90a7e3f18
+Revises: b83e1f0c5d27
+Create Date: 2026-10-19 11:40:08.552917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d90a7e3f18'
+down_revision: Union[str, Sequence[str], None] = 'b83e1f0c5d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_questions_theme_severity_subcategory', 'questions',
+                    ['theme', 'severity', 'subcategory', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_questions_theme_severity_subcategory', table_name='questions')
@@ -0,0 +1,59 @@
+"""add player theme mastery
+
+Revision ID: d1a6c3b8e902
+Revises: c5d90a7e3f18
+Create Date: 2026-10-19 12:21:37.104466
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1a6c3b8e902'
+down_revision: Union[str, Sequence[str], None] = 'c5d90a7e3f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen from scheduler.py as of this revision, so the seed does not change with the app
+NO_SEVERITY = "none"
+MAX_SCORE = 5
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('player_theme_stats', sa.Column(
+        'mastery', sa.JSON(), server_default='{}', nullable=False))
+
+    # Seed mastery from the average score per severity; answer order is not replayed
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        "SELECT r.player_id, q.theme, q.severity, AVG(COALESCE(r.score, 0)), COUNT(*), "
+        "MAX(r.created_at) "
+        "FROM responses r JOIN questions q ON q.id = r.question_id "
+        "GROUP BY r.player_id, q.theme, q.severity"
+    ))
+    state = {}
+    for player_id, theme, severity, average, attempts, last_answered in rows:
+        entry = state.setdefault((player_id, theme), {})
+        entry[severity or NO_SEVERITY] = [
+            round(float(average) / MAX_SCORE, 4), attempts,
+            int(last_answered.timestamp()) if hasattr(last_answered, 'timestamp') else 0,
+        ]
+    if state:
+        stats = sa.table('player_theme_stats', sa.column('player_id', sa.Integer),
+                         sa.column('theme', sa.String), sa.column('mastery', sa.JSON))
+        conn.execute(
+            stats.update()
+            .where(stats.c.player_id == sa.bindparam('pid'), stats.c.theme == sa.bindparam('t'))
+            .values(mastery=sa.bindparam('mastery', type_=sa.JSON)),
+            [{'pid': player_id, 't': theme, 'mastery': mastery}
+             for (player_id, theme), mastery in state.items()],
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('player_theme_stats', 'mastery')
@@ -0,0 +1,167 @@
+# Local gate in front of the LLM: answers that are blank, filler ("idk", "pass") or keyboard
+# mashing ("asdf") get the score 0 the system prompt would give them anyway, with a canned
+# theme-appropriate evaluation, in microseconds instead of a full model round trip.
+# Rules give a confident verdict; everything else goes through a small hand-tuned logistic
+# model over character and word features. The model's features (vowels, keyboard rows,
+# everyday words) are English ones, so answers with non-ASCII letters skip it and go to the
+# LLM. Opt in with ANSWER_FILTER=1; tune with ANSWER_FILTER_THRESHOLD.
+import math
+import os
+import re
+
+from metrics import Counter
+
+ANSWER_FILTER_ENABLED = os.getenv("ANSWER_FILTER", "").lower() in ("1", "true", "yes", "on")
+FILTER_THRESHOLD = float(os.getenv("ANSWER_FILTER_THRESHOLD", 0.8))
+
+ANSWER_FILTER_DECISIONS = Counter(
+    "smartplay_answer_filter_total",
+    "Answers checked by the pre-LLM filter, by decision and reason.",
+    ["decision", "reason"],
+)
+
+_FILLERS = {
+    "idk", "i dont know", "i do not know", "dont know", "dunno", "no idea", "not sure",
+    "no clue", "pass", "skip", "next", "nothing", "none", "na", "n a", "nope", "no", "yes",
+    "ok", "okay", "k", "lol", "test", "testing", "asdf", "whatever", "hmm", "um", "uh",
+    "idc", "i dont care", "no comment", "i have no idea",
+}
+_KEYBOARD_ROWS = ("qwertyuiop", "asdfghjkl", "zxcvbnm")
+_KEYBOARD_4GRAMS = {row[i:i + 4] for row in _KEYBOARD_ROWS + tuple(r[::-1] for r in _KEYBOARD_ROWS)
+                    for i in range(len(row) - 3)}
+_COMMON_WORDS = {
+    "i", "you", "we", "they", "he", "she", "it", "my", "me", "the", "a", "an", "and", "or", "but",
+    "to", "of", "in", "on", "for", "with", "at", "by", "from", "is", "are", "was", "be", "would",
+    "will", "should", "could", "can", "do", "did", "not", "if", "then", "so", "that", "this",
+    "them", "their", "what", "first", "try", "ask", "help", "call", "stay", "calm", "find", "make",
+    "tell", "talk", "go", "get", "take", "keep", "look", "use", "team", "manager", "time", "work",
+}
+_WORD = re.compile(r"[\w']+")
+_PUNCTUATION = set(".,;:!?'\"()-/")
+_VOWELS = set("aeiouy")
+
+# Logistic model weights, hand-tuned (positive pushes towards nonsense)
+_BIAS = -2.0
+_WEIGHTS = {
+    "few_words": 1.6,          # 1 - words/4, floored at 0
+    "low_vowel_ratio": 4.0,    # how far the vowel share of letters is below 0.25
+    "consonant_run": 0.9,      # longest consonant run beyond 4
+    "keyboard_run": 2.5,       # share of the text inside keyboard-row sequences
+    "repetition": 3.0,         # 1 - unique characters / min(characters, 20) beyond prose's 0.3
+    "no_common_words": 1.2,    # none of the everyday words appear
+    "low_letter_ratio": 3.0,   # share of symbols other than letters, digits and punctuation
+}
+
+
+def _normalize(text: str) -> str:
+    # Letters and digits of any script are kept; only punctuation and symbols go
+    return " ".join(re.sub(r"[^\w\s]+|_", "", text.casefold()).split())
+
+
+def _keyboard_coverage(letters: str) -> float:
+    covered = [False] * len(letters)
+    for i in range(len(letters) - 3):
+        if letters[i:i + 4] in _KEYBOARD_4GRAMS:
+            covered[i:i + 4] = (True,) * 4
+    return sum(covered) / len(letters) if letters else 0.0
+
+
+def _features(text: str) -> dict[str, float]:
+    compact = "".join(text.split())
+    letters = "".join(c for c in compact.casefold() if c.isalpha())
+    words = _WORD.findall(text.casefold())
+    vowel_ratio = sum(c in _VOWELS for c in letters) / len(letters) if letters else 0.0
+    longest_run = run = 0
+    for c in text.casefold():
+        # Runs stop at spaces and punctuation: "psst, grab" is two short runs, not one
+        run = run + 1 if c.isalpha() and c not in _VOWELS else 0
+        longest_run = max(longest_run, run)
+    symbols = sum(not c.isalnum() and c not in _PUNCTUATION for c in compact)
+    return {
+        "few_words": max(0.0, 1 - len(words) / 4),
+        "low_vowel_ratio": max(0.0, 0.25 - vowel_ratio) / 0.25 if letters else 1.0,
+        "consonant_run": max(0, longest_run - 4),
+        "keyboard_run": _keyboard_coverage(letters),
+        # Capped so long, normal sentences (15-25 distinct characters) do not count as repetitive
+        "repetition": max(0.0, 0.7 - len(set(compact)) / min(len(compact), 20)) / 0.7 if len(compact) >= 8 else 0.0,
+        "no_common_words": 0.0 if any(w.strip("'") in _COMMON_WORDS for w in words) else 1.0,
+        "low_letter_ratio": symbols / len(compact) if compact else 1.0,
+    }
+
+
+def nonsense_probability(text: str) -> float:
+    features = _features(text)
+    z = _BIAS + sum(_WEIGHTS[name] * value for name, value in features.items())
+    return 1 / (1 + math.exp(-z))
+
+
+def classify_answer(text: str | None) -> tuple[float, str]:
+    """
+    Confidence (0-1) that an answer deserves score 0 without reading it, and why.
+
+    Reasons: "empty", "filler", "single_word", "gibberish" or "ok".
+    """
+    normalized = _normalize(text or "")
+    if not normalized:
+        return 1.0, "empty"
+    if (normalized in _FILLERS or normalized.replace(" ", "") in _FILLERS
+            or all(word in _FILLERS for word in normalized.split())):
+        return 1.0, "filler"
+    if not normalized.isascii():
+        # Other languages and scripts: the features below would read them as gibberish
+        return 0.0, "ok"
+    probability = nonsense_probability(text)
+    if " " not in normalized:
+        # The rubric scores one-word answers with no context 0
+        return max(probability, 0.9), "single_word" if probability < 0.9 else "gibberish"
+    return probability, "gibberish" if probability >= 0.5 else "ok"
+
+
+_CANNED_EVALUATIONS = {
+    "survival": (
+        "The moment passes in silence, and with no plan spoken the danger simply closes in. "
+        "There was no read of the threat, so nothing guided the next step. "
+        "No tool, shelter or escape route was considered, and instinct never got a chance to act. "
+        "In a real emergency that pause is what costs the most, so next time name one concrete action."
+    ),
+    "work": (
+        "The situation was left hanging, and the team is still waiting for someone to respond. "
+        "The real issue was never addressed, so there is nothing yet to build on. "
+        "There was no attempt to listen, ask a question or propose a fix. "
+        "Even a short, specific first step would show ownership and keep trust intact."
+    ),
+    "interview": (
+        "The interviewer waits, but the answer never really arrives. "
+        "The question was not addressed, so there was no chance to show relevant experience. "
+        "There was no example, structure or adjustment to work with. "
+        "A brief, honest answer with one concrete example would leave a far stronger impression."
+    ),
+}
+_DEFAULT_CANNED = (
+    "No real response was given, so the situation plays out without any input. "
+    "The problem was not addressed, and there was no reasoning to evaluate. "
+    "There was no sign of adapting to the challenge or of considering others. "
+    "Try describing one specific action and why you would take it."
+)
+
+
+def canned_evaluation(theme: str) -> str:
+    return _CANNED_EVALUATIONS.get((theme or "").lower(), _DEFAULT_CANNED)
+
+
+def prefilter_answer(answer: str | None, theme: str = "",
+                     threshold: float = FILTER_THRESHOLD) -> tuple[str, dict] | None:
+    """
+    Short-circuit evaluation for answers the LLM would score 0 anyway.
+
+    Returns ``(evaluation_text, {"verdict": "BAD", "score": 0})`` when the
+    answer is filtered, or None to send it to the LLM.
+    """
+    if not ANSWER_FILTER_ENABLED:
+        return None
+    confidence, reason = classify_answer(answer)
+    if confidence < threshold:
+        ANSWER_FILTER_DECISIONS.labels("passed", reason).inc()
+        return None
+    ANSWER_FILTER_DECISIONS.labels("filtered", reason).inc()
+    return canned_evaluation(theme), {"verdict": "BAD", "score": 0}
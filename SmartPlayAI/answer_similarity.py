@@ -0,0 +1,144 @@
+# Semantic tier of the evaluation cache: reuse a stored LLM evaluation when a new answer
+# is a paraphrase of one already evaluated for the same question ("I'd call for help" vs
+# "I would call for help"). Answers become TF-IDF vectors over word unigrams and bigrams;
+# each question gets its own small inverted index in process memory.
+# Enable with ANSWER_SIMILARITY=1; every reuse is logged at INFO on "smartplay.answer_similarity".
+import logging
+import math
+import os
+import re
+import time
+from collections import Counter
+
+logger = logging.getLogger("smartplay.answer_similarity")
+
+ANSWER_SIMILARITY_ENABLED = os.getenv("ANSWER_SIMILARITY", "").lower() in ("1", "true", "yes", "on")
+SIMILARITY_THRESHOLD = float(os.getenv("ANSWER_SIMILARITY_THRESHOLD", 0.9))
+INDEX_TTL_SECONDS = int(os.getenv("ANSWER_SIMILARITY_TTL", 300))  # rebuild to see other workers' answers
+MAX_ANSWERS_PER_QUESTION = int(os.getenv("ANSWER_SIMILARITY_MAX_ANSWERS", 2000))
+
+_CONTRACTIONS = [
+    (re.compile(r"\bcan't\b"), "can not"),
+    (re.compile(r"\bwon't\b"), "will not"),
+    (re.compile(r"n't\b"), " not"),
+    (re.compile(r"'d\b"), " would"),
+    (re.compile(r"'ll\b"), " will"),
+    (re.compile(r"'re\b"), " are"),
+    (re.compile(r"'ve\b"), " have"),
+    (re.compile(r"'m\b"), " am"),
+]
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase words with contractions expanded, so "I'd" and "I would" match."""
+    text = text.casefold().replace("’", "'")
+    for pattern, replacement in _CONTRACTIONS:
+        text = pattern.sub(replacement, text)
+    return _WORD.findall(text)
+
+
+def _features(text: str) -> Counter:
+    # Bigrams keep "would not call" apart from "would call"
+    words = tokenize(text)
+    features = Counter(words)
+    features.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return features
+
+
+class QuestionAnswerIndex:
+    """
+    TF-IDF vectors of the evaluated answers to one question, in an inverted index.
+
+    IDF weights are fixed when the index is built; answers added later reuse
+    them, which is close enough until the next rebuild.
+    """
+
+    def __init__(self, answers: list[tuple[int, str]]):
+        self.built_at = time.monotonic()
+        self.texts: dict[int, str] = {}
+        self.postings: dict[str, dict[int, float]] = {}
+        features = [(player_id, _features(text)) for player_id, text in answers]
+        document_frequency = Counter(term for _, f in features for term in f)
+        self.documents = len(features)
+        self.idf = {term: math.log((1 + self.documents) / (1 + df)) + 1
+                    for term, df in document_frequency.items()}
+        for (player_id, text), (_, f) in zip(answers, features):
+            self._add(player_id, text, f)
+
+    def _vector(self, features: Counter) -> dict[str, float]:
+        # Unseen terms get the IDF of a term in no document
+        default_idf = math.log(1 + self.documents) + 1
+        vector = {term: (1 + math.log(tf)) * self.idf.get(term, default_idf)
+                  for term, tf in features.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+        return {term: w / norm for term, w in vector.items()}
+
+    def _add(self, player_id: int, text: str, features: Counter) -> None:
+        self.discard(player_id)
+        self.texts[player_id] = text
+        for term, weight in self._vector(features).items():
+            self.postings.setdefault(term, {})[player_id] = weight
+
+    def add(self, player_id: int, text: str) -> None:
+        """Index (or replace) a player's evaluated answer."""
+        self._add(player_id, text, _features(text))
+
+    def discard(self, player_id: int) -> None:
+        text = self.texts.pop(player_id, None)
+        if text is None:
+            return
+        for term in _features(text):
+            self.postings.get(term, {}).pop(player_id, None)
+
+    def best_match(self, text: str, threshold: float = SIMILARITY_THRESHOLD) -> tuple[int, float] | None:
+        """``(player_id, cosine similarity)`` of the closest indexed answer at or above ``threshold``."""
+        scores = Counter()
+        for term, weight in self._vector(_features(text)).items():
+            for player_id, doc_weight in self.postings.get(term, {}).items():
+                scores[player_id] += weight * doc_weight
+        if not scores:
+            return None
+        player_id, score = scores.most_common(1)[0]
+        return (player_id, score) if score >= threshold else None
+
+    def similarity(self, a: str, b: str) -> float:
+        va, vb = self._vector(_features(a)), self._vector(_features(b))
+        return sum(w * vb.get(term, 0.0) for term, w in va.items())
+
+
+class AnswerSimilarityCache:
+    """Per-question indexes, rebuilt from the database once older than INDEX_TTL_SECONDS."""
+
+    def __init__(self, ttl_seconds: int = INDEX_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.indexes: dict[int, QuestionAnswerIndex] = {}
+
+    def get(self, question_id: int) -> QuestionAnswerIndex | None:
+        index = self.indexes.get(question_id)
+        if index is None or time.monotonic() - index.built_at > self.ttl_seconds:
+            return None
+        return index
+
+    def build(self, question_id: int, answers: list[tuple[int, str]]) -> QuestionAnswerIndex:
+        index = self.indexes[question_id] = QuestionAnswerIndex(answers)
+        return index
+
+    def add(self, question_id: int, player_id: int, text: str) -> None:
+        index = self.indexes.get(question_id)
+        if index is not None:
+            index.add(player_id, text)
+
+    def clear(self) -> None:
+        self.indexes.clear()
+
+
+def log_hit(question_id: int, player_id: int, source_player_id: int, similarity: float,
+            answer: str, source_answer: str) -> None:
+    logger.info(
+        "Reused evaluation for question %s: player %s answer %r matched player %s answer %r (similarity %.3f)",
+        question_id, player_id, answer[:200], source_player_id, source_answer[:200], similarity)
+
+
+# One cache per process
+answer_cache = AnswerSimilarityCache()
@@ -0,0 +1,77 @@
+"""
+Bytes on the wire and CPU time per request for on-the-fly response compression, per
+encoding and level, on the rendered game pages and a /leaderboard/details JSON payload.
+Run from the SmartPlayAI directory:
+
+    uv run python -m benchmarks.bench_compression --rows 200
+
+CPU time is process time for compressing one response body, as CompressionMiddleware
+does it. brotli is a project dependency; its rows are only skipped on an install
+made outside uv.lock that lacks it.
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+from jinja2 import Environment, FileSystemLoader
+
+import compression
+from benchmarks.bench_page_weight import TEMPLATES_DIR, _Lenient
+from static_assets import template_globals
+
+PAGES = ["question_game.html", "next_question.html", "result.html", "leaderboard.html"]
+SETTINGS = [("gzip", 1), ("gzip", 6), ("gzip", 9), ("br", 1), ("br", 4), ("br", 5), ("br", 11)]
+FEEDBACK = ("You stayed calm and thought about the people around you before acting, which is what "
+            "matters most here. Next time, say how you would check that the exit is safe first.")
+
+
+def pages() -> dict[str, bytes]:
+    env = Environment(loader=FileSystemLoader(str(TEMPLATES_DIR)), undefined=_Lenient)
+    env.globals.update(template_globals)
+    env.policies["json.dumps_function"] = lambda obj, **kw: json.dumps(obj, default=lambda _: None, **kw)
+    return {page: env.get_template(page).render().encode() for page in PAGES}
+
+
+def details(rows: int) -> bytes:
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return json.dumps([
+        {"player_id": i % 40, "player_name": f"player_{i % 40}", "theme": "survival",
+         "question_text": f"Scenario {i % 60}: a storm cuts you off from the trail. What do you do first?",
+         "response_text": "I would find shelter, ration water and signal for help at first light.",
+         "score": i % 6, "llm_feedback": FEEDBACK, "liked": None,
+         "created_at": (start + timedelta(minutes=i)).isoformat()} for i in range(rows)
+    ], separators=(",", ":")).encode()
+
+
+def compressor(encoding: str, level: int):
+    return compression._Brotli(level) if encoding == "br" else compression._Gzip(level)
+
+
+def measure(body: bytes, encoding: str, level: int, repeat: int) -> tuple[int, float]:
+    start = time.process_time()
+    for _ in range(repeat):
+        size = len(compressor(encoding, level).finish(body))
+    return size, (time.process_time() - start) / repeat
+
+
+def main(rows: int, repeat: int):
+    payloads = {**pages(), f"details ({rows} rows)": details(rows)}
+    settings = [s for s in SETTINGS if s[0] == "gzip" or compression.brotli is not None]
+    print(f"{'payload':<24} {'identity':>9} " + " ".join(f"{e + str(l):>14}" for e, l in settings))
+    for name, body in payloads.items():
+        cells = []
+        for encoding, level in settings:
+            size, cpu = measure(body, encoding, level, repeat)
+            cells.append(f"{size / 1024:6.1f}K {cpu * 1e6:5.0f}us")
+        print(f"{name:<24} {len(body) / 1024:8.1f}K " + " ".join(f"{c:>14}" for c in cells))
+    print(f"defaults: gzip level {compression.GZIP_LEVEL}, brotli quality {compression.BROTLI_QUALITY}, "
+          f"bodies under {compression.MINIMUM_SIZE} B sent as is; CPU is the mean per response over {repeat} runs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200, help="rows in the leaderboard details payload")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
@@ -0,0 +1,78 @@
+"""
+Compare request throughput with the old engine config (echo=True, pre-ping on
+every checkout, default pool) against the tuned EngineSettings from the env.
+
+Point DATABASE_PUBLIC_URL at a seeded Postgres database, then run from the
+SmartPlayAI directory:
+
+    uv run python -m benchmarks.bench_engine_settings --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from main import app
+from model.database import get_session
+from model.settings import EngineSettings
+
+LEGACY_KWARGS = {"echo": True, "future": True, "pool_pre_ping": True}
+
+
+async def _run(label: str, engine_kwargs: dict, url: str, path: str, total: int, concurrency: int):
+    engine = create_async_engine(url, **engine_kwargs)
+    session_factory = async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_session():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_session
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        # warm the pool before timing
+        await asyncio.gather(*(one() for _ in range(concurrency)))
+        latencies.clear()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{label:<8} {total / elapsed:8.1f} req/s   p50={p50:6.2f}ms   p99={p99:6.2f}ms")
+
+
+async def main(path: str, total: int, concurrency: int):
+    settings = EngineSettings.from_env()
+    if not settings.url:
+        raise SystemExit("DATABASE_PUBLIC_URL is not set")
+    print(f"tuned config: {settings.describe()}")
+    await _run("old", LEGACY_KWARGS, settings.url, path, total, concurrency)
+    await _run("tuned", settings.engine_kwargs(), settings.url, path, total, concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--path", default="/leaderboard")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=25)
+    args = parser.parse_args()
+    asyncio.run(main(args.path, args.requests, args.concurrency))
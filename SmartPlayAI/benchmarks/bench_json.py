@@ -0,0 +1,101 @@
+"""
+Serialization time of large JSON payloads: FastAPI's default path against FastJSONResponse.
+Builds 10k responses in its own in-memory SQLite database (DATABASE_PUBLIC_URL must be set
+for the imports but is not used). Run from the SmartPlayAI directory:
+
+    DATABASE_PUBLIC_URL=sqlite+aiosqlite:///:memory: uv run python -m benchmarks.bench_json --rows 10000
+
+"default" is what the routes did before: crud builds a dict per row (leaderboard details)
+or loads ORM objects that response_model validates (responses), and FastAPI runs
+jsonable_encoder before json.dumps. "fast" hands crud's rows to FastJSONResponse. The
+query is run once up front, so only serialization and the framework around it is timed.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+import fast_json
+from fast_json import FastJSONResponse
+from model import crud, models, schemas
+
+
+async def load(rows: int):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+        await conn.execute(insert(models.Question), [
+            {"id": i, "theme": "work", "question_text": f"Scenario {i}: your deadline moves up a week. What now?",
+             "text_hash": f"bench-{i}"} for i in range(1, 101)])
+        await conn.execute(insert(models.Player), [
+            {"id": i, "name": f"player_{i}", "password_hash": "x", "score": 0} for i in range(1, rows // 100 + 1)])
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        await conn.execute(insert(models.Response), [
+            {"player_id": i // 100 + 1, "question_id": i % 100 + 1, "score": i % 6, "liked": i % 3 == 0,
+             "response_text": "I would ask which parts can ship first and agree on what moves.",
+             "llm_feedback": "Good prioritisation, and you kept the stakeholders informed.",
+             "created_at": start + timedelta(seconds=i)} for i in range(rows)])
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        details = await crud.get_leaderboard_response_details(db, "work")
+        entities = (await db.execute(select(models.Response))).scalars().all()
+        responses = await crud.list_response_feedback(db)
+    await engine.dispose()
+    return details, entities, responses
+
+
+def build_app(details, entities, responses) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/details/default")
+    async def details_default():
+        return [row._asdict() for row in details]
+
+    @app.get("/details/fast")
+    async def details_fast():
+        return FastJSONResponse(details)
+
+    @app.get("/responses/default", response_model=list[schemas.ResponseOut])
+    async def responses_default():
+        return entities
+
+    @app.get("/responses/fast", response_model=list[schemas.ResponseOut])
+    async def responses_fast():
+        return FastJSONResponse(responses)
+
+    return app
+
+
+async def time_route(client: httpx.AsyncClient, url: str, repeat: int) -> tuple[float, int]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = await client.get(url)
+        timings.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return statistics.median(timings), len(response.content)
+
+
+async def main(rows: int, repeat: int):
+    app = build_app(*await load(rows))
+    encoder = "orjson" if fast_json.orjson is not None else "stdlib json (orjson missing, run uv sync)"
+    print(f"{rows} rows, median of {repeat} requests, fast path encoder: {encoder}")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for payload in ("details", "responses"):
+            default, size = await time_route(client, f"/{payload}/default", repeat)
+            fast, fast_size = await time_route(client, f"/{payload}/fast", repeat)
+            print(f"  {payload:<10} default {default * 1e3:8.1f} ms   fast {fast * 1e3:7.1f} ms   "
+                  f"{default / fast:4.1f}x   ({size / 1024:.0f} KB / {fast_size / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
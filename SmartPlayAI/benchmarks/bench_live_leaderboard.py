@@ -0,0 +1,76 @@
+"""
+Fan-out of live leaderboard deltas to many connected browsers from one process, compared
+with what the same browsers cost when they poll. Run from the SmartPlayAI directory:
+
+    uv run python -m benchmarks.bench_live_leaderboard --subscribers 5000 --deltas 200
+
+Each subscriber is a real LeaderboardChannel.stream() consumer, as the SSE endpoint runs
+it; the time per delta is from publish() until the last subscriber has its frame.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from live_leaderboard import LeaderboardChannel
+
+BOARD = [{"id": i, "name": f"player_{i}", "score": 100 - i, "games_played": 20, "average_score": 4.2}
+         for i in range(10)]
+
+
+async def run(subscribers: int, deltas: int, poll_interval: float):
+    channel = LeaderboardChannel(backlog=deltas + 1)
+    received = 0
+    all_received = asyncio.Event()
+    received_bytes = 0
+
+    async def snapshot():
+        return BOARD
+
+    async def browser():
+        nonlocal received, received_bytes
+        async for frame in channel.stream(snapshot):
+            received_bytes += len(frame)
+            count = frame.count(b"event: delta")
+            if count:
+                received += count
+                if received == subscribers:
+                    all_received.set()
+
+    tasks = [asyncio.create_task(browser()) for _ in range(subscribers)]
+    while len(channel.subscribers) < subscribers:
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.1)  # let every stream send its snapshot
+
+    latencies = []
+    for i in range(deltas):
+        received = 0
+        all_received.clear()
+        start = time.perf_counter()
+        channel.publish({"id": i % 10, "name": f"player_{i % 10}", "score": 100 + i, "games_played": 21,
+                         "average_score": 4.3, "theme": "work", "theme_score": 40 + i, "theme_games": 9})
+        await all_received.wait()
+        latencies.append(time.perf_counter() - start)
+    channel.close()
+    await asyncio.gather(*tasks)
+
+    frame_bytes = len(channel.recent[-1][1])
+    board_bytes = len(json.dumps(BOARD).encode())
+    latencies.sort()
+    print(f"{subscribers} subscribers, {deltas} deltas")
+    print(f"  fan-out per delta: median {statistics.median(latencies) * 1e3:.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1e3:.2f} ms, "
+          f"{statistics.median(latencies) / subscribers * 1e6:.2f} us per subscriber")
+    print(f"  per update per browser: {frame_bytes} B delta vs {board_bytes} B /leaderboard body")
+    print(f"  polling every {poll_interval:g}s instead: {subscribers / poll_interval:.0f} leaderboard "
+          f"requests/s while idle; push: 1 indexed lookup per stored answer")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--deltas", type=int, default=200)
+    parser.add_argument("--poll-interval", type=float, default=5, help="seconds between polls, for comparison")
+    args = parser.parse_args()
+    asyncio.run(run(args.subscribers, args.deltas, args.poll_interval))
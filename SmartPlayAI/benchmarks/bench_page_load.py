@@ -0,0 +1,144 @@
+"""
+Time a page load against a local uvicorn server: the HTML, then its stylesheets and scripts
+in parallel, then the fonts those stylesheets reference, as a browser's critical path does.
+Run from the SmartPlayAI directory (after `python static_assets.py` to serve the built assets):
+
+    uv run python -m benchmarks.bench_page_load --runs 20
+
+A "cold" load opens new connections for every origin and has nothing cached; a "warm" one
+skips responses with an immutable Cache-Control and revalidates the rest with If-None-Match.
+To compare with the CDN-based templates, check out the old commit in a worktree and point
+--templates at its templates directory (CDN files need network access). Scripts are fetched
+but not executed, so this measures network time, not rendering.
+"""
+import argparse
+import json
+import re
+import ssl
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+import uvicorn
+from jinja2 import Environment, FileSystemLoader
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse
+from starlette.routing import Mount, Route
+
+import static_assets
+from benchmarks.bench_page_weight import PAGES, TEMPLATES_DIR, _Lenient, _Resources
+
+CSS_URL = re.compile(r"""url\(\s*['"]?([^'"()\s]+?)['"]?\s*\)""")
+FONT_SUFFIXES = (".woff2", ".woff", ".ttf")
+# Loading CA certificates costs more than a local page load; do it once, not per connection
+SSL_CONTEXT = ssl.create_default_context()
+
+
+def build_app(templates_dir: Path) -> Starlette:
+    env = Environment(loader=FileSystemLoader(str(templates_dir)), undefined=_Lenient)
+    env.globals.update(static_assets.template_globals)
+    env.policies["json.dumps_function"] = lambda obj, **kw: json.dumps(obj, default=lambda _: None, **kw)
+
+    async def page(request):
+        return HTMLResponse(env.get_template(request.path_params["name"]).render())
+
+    return Starlette(routes=[
+        Route("/page/{name}", page),
+        Mount(static_assets.STATIC_URL, static_assets.AssetStaticFiles(static_assets.assets)),
+    ])
+
+
+class Browser:
+    """One client per origin; ``cache`` maps URL -> (etag, immutable) across warm loads."""
+
+    def __init__(self):
+        self.clients: dict[str, httpx.Client] = {}
+        self.cache: dict[str, tuple[str | None, bool]] = {}
+        self.failed: set[str] = set()
+
+    def fetch(self, url: str) -> tuple[int, bytes]:
+        etag, immutable = self.cache.get(url, (None, False))
+        if immutable:
+            return 0, b""
+        origin = "{0.scheme}://{0.netloc}".format(urlsplit(url))
+        client = self.clients.setdefault(origin, httpx.Client(verify=SSL_CONTEXT, timeout=10))
+        headers = {"Accept-Encoding": "br, gzip"}
+        if etag:
+            headers["If-None-Match"] = etag
+        try:
+            response = client.get(url, headers=headers)
+        except httpx.HTTPError:
+            self.failed.add(url)
+            return 0, b""
+        cache_control = response.headers.get("cache-control", "")
+        self.cache[url] = (response.headers.get("etag"), "immutable" in cache_control)
+        return response.num_bytes_downloaded, response.content
+
+    def close(self):
+        for client in self.clients.values():
+            client.close()
+        self.clients.clear()
+
+
+def load(browser: Browser, url: str) -> tuple[float, int, int]:
+    """Seconds until the HTML, its CSS/JS and their fonts are in; bytes and request count."""
+    start = time.perf_counter()
+    size, html = browser.fetch(url)
+    resources = _Resources()
+    resources.feed(html.decode())
+    assets = [urljoin(url, src) for src in resources.blocking if src]
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(browser.fetch, assets))
+        fonts = {urljoin(asset, ref) for asset, (_, body) in zip(assets, results)
+                 if urlsplit(asset).path.endswith(".css")
+                 for ref in CSS_URL.findall(body.decode(errors="replace"))
+                 if ref.split("?")[0].endswith(FONT_SUFFIXES)}
+        results += list(pool.map(browser.fetch, sorted(fonts)))
+    elapsed = time.perf_counter() - start
+    return elapsed, size + sum(s for s, _ in results), 1 + len(results)
+
+
+def main(templates_dir: Path, port: int, runs: int):
+    server = uvicorn.Server(uvicorn.Config(build_app(templates_dir), port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    print(f"{'template':<22} {'cold ms':>8} {'warm ms':>8} {'cold KB':>8} {'warm KB':>8} {'requests':>8}")
+    failed = set()
+    try:
+        for page in PAGES:
+            url = f"http://127.0.0.1:{port}/page/{page}"
+            cold, warm = [], []
+            for _ in range(runs):
+                browser = Browser()
+                cold.append(load(browser, url))
+                browser.close()  # new connections, but the cache survives
+                warm.append(load(browser, url))
+                browser.close()
+                failed |= browser.failed
+            print(f"{page:<22} {statistics.median(t for t, _, _ in cold) * 1e3:8.1f} "
+                  f"{statistics.median(t for t, _, _ in warm) * 1e3:8.1f} "
+                  f"{cold[0][1] / 1024:8.1f} {warm[0][1] / 1024:8.1f} {cold[0][2]:8d}")
+    finally:
+        server.should_exit = True
+        thread.join()
+    if failed:
+        print(f"{len(failed)} external files could not be fetched and are not counted:")
+        for url in sorted(failed):
+            print(f"  {url}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--templates", type=Path, default=TEMPLATES_DIR,
+                        help="templates to serve, e.g. from a worktree of an older commit")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--runs", type=int, default=10, help="loads per page; medians are reported")
+    args = parser.parse_args()
+    main(args.templates, args.port, args.runs)
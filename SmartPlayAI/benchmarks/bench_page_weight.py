@@ -0,0 +1,113 @@
+"""
+Page-weight report per template: bytes a first visit downloads before the page is
+interactive, and audio deferred until after first paint or a gesture. Run from the
+SmartPlayAI directory (after `python static_assets.py` to measure the built assets):
+
+    uv run python -m benchmarks.bench_page_weight
+"""
+import argparse
+import json
+from html.parser import HTMLParser
+from pathlib import Path
+
+from jinja2 import ChainableUndefined, Environment, FileSystemLoader
+
+import static_assets
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
+PAGES = ["index.html", "theme_selection.html", "question_game.html", "next_question.html",
+         "leaderboard.html", "player_detail.html", "result.html", "form.html"]
+
+
+class _Lenient(ChainableUndefined):
+    """Pages are rendered without their request context; anything missing renders empty."""
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+
+class _Resources(HTMLParser):
+    """Collects what a browser fetches: stylesheets, scripts, images and audio sources."""
+
+    def __init__(self):
+        super().__init__()
+        self.blocking = []  # stylesheets and scripts
+        self.eager_audio = []
+        self.deferred_audio = []
+        self._audio = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "link" and attrs.get("rel") == "stylesheet":
+            self.blocking.append(attrs.get("href"))
+        elif tag in ("script", "img") and attrs.get("src"):
+            self.blocking.append(attrs["src"])
+        elif tag == "audio":
+            self._audio = {"preload": attrs.get("preload", "auto"), "src": attrs.get("src"), "sources": []}
+        elif tag == "source" and self._audio is not None:
+            self._audio["sources"].append((attrs.get("src"), attrs.get("data-src")))
+        if tag == "audio" and self._audio["src"]:
+            self._finish_audio()
+
+    def handle_endtag(self, tag):
+        if tag == "audio" and self._audio is not None:
+            self._finish_audio()
+
+    def _finish_audio(self):
+        audio, self._audio = self._audio, None
+        if audio["src"]:
+            self.eager_audio.append(audio["src"])
+        elif audio["sources"]:
+            # Browsers take the first source they can play; assume the first one
+            src, data_src = audio["sources"][0]
+            (self.eager_audio if src and audio["preload"] != "none" else self.deferred_audio).append(src or data_src)
+
+
+def _transfer_size(url: str) -> int | None:
+    """Bytes on the wire for a local asset (its smallest encoding), None for other hosts."""
+    if not url or not url.startswith(static_assets.STATIC_URL + "/"):
+        return None
+    name = url[len(static_assets.STATIC_URL) + 1:]
+    asset = static_assets.assets.files.get(name)
+    if asset is not None:
+        return min([asset.stat.st_size] + [stat.st_size for _, stat in asset.variants.values()])
+    path = static_assets.STATIC_DIR / name
+    return path.stat().st_size if path.exists() else None
+
+
+def _total(urls):
+    sizes = [_transfer_size(u) for u in urls]
+    return sum(s for s in sizes if s is not None), sum(s is None for s in sizes)
+
+
+def report(page: str, audio_loading: str) -> str:
+    env = Environment(loader=FileSystemLoader(str(TEMPLATES_DIR)), undefined=_Lenient)
+    env.globals.update(static_assets.template_globals, audio_loading=audio_loading)
+    env.policies["json.dumps_function"] = lambda obj, **kw: json.dumps(obj, default=lambda _: None, **kw)
+    html = env.get_template(page).render()
+    resources = _Resources()
+    resources.feed(html)
+    blocking, external = _total(resources.blocking)
+    eager, _ = _total(resources.eager_audio)
+    deferred, _ = _total(resources.deferred_audio)
+    initial = len(html.encode()) + blocking + eager
+    return (f"{page:<22} {audio_loading:<8} {len(html.encode()) / 1024:8.1f} {blocking / 1024:9.1f} "
+            f"{eager / 1024:9.1f} {initial / 1024:9.1f} {deferred / 1024:9.1f} {external:5d}")
+
+
+def main(modes: list[str]):
+    print(f"{'template':<22} {'audio':<8} {'html KB':>8} {'css/js KB':>9} {'audio KB':>9} "
+          f"{'initial KB':>9} {'later KB':>9} {'CDN':>5}")
+    for page in PAGES:
+        for mode in modes:
+            print(report(page, mode))
+    print("initial = HTML + local CSS/JS + eagerly loaded audio; later = audio deferred to idle/gesture; "
+          "CDN = external files not measured")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modes", nargs="+", default=["eager", static_assets.AUDIO_LOADING],
+                        help="AUDIO_LOADING values to compare")
+    args = parser.parse_args()
+    main(list(dict.fromkeys(args.modes)))
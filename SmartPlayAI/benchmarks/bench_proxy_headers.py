@@ -0,0 +1,100 @@
+"""
+Per-request cost of the old BaseHTTPMiddleware proxy-header hook against uvicorn's ASGI
+proxy-header layer alone, on a /static asset and /leaderboard. Point DATABASE_PUBLIC_URL
+at a scratch database (seeded if empty), then run from the SmartPlayAI directory:
+
+    uv run python -m benchmarks.bench_proxy_headers --requests 3000
+
+Both stacks are the app as a launcher worker loads it, from main.server_options() with
+FORWARDED_ALLOW_IPS set to the benchmark's proxy address. Requests are driven straight
+through that ASGI app, as uvicorn would call it from a proxy connection, so the difference
+is the middleware and not the network or the HTTP parser.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from starlette.middleware.base import BaseHTTPMiddleware
+
+import launcher
+import main
+from benchmarks.bench_response_cache import seed
+from main import app
+from static_assets import assets
+
+PROXY = "10.0.0.2"
+
+HEADERS = [(b"host", b"smartplay.example"), (b"x-forwarded-proto", b"https"),
+           (b"x-forwarded-for", b"203.0.113.7"), (b"x-forwarded-host", b"smartplay.example"),
+           (b"accept-encoding", b"gzip, br")]
+
+
+async def add_proxy_headers(request, call_next):
+    # The @app.middleware("http") hook main.py used to have
+    forwarded_proto = request.headers.get("x-forwarded-proto", "http")
+    forwarded_host = request.headers.get(
+        "x-forwarded-host", request.headers.get("host", ""))
+    if forwarded_proto == "https":
+        request.scope["scheme"] = "https"
+    if forwarded_host:
+        request.scope["server"] = (
+            forwarded_host, 443 if forwarded_proto == "https" else 80)
+    return await call_next(request)
+
+
+async def call(asgi, path: str) -> int:
+    scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+             "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+             "query_string": b"", "headers": HEADERS, "client": (PROXY, 51000),
+             "server": ("10.0.0.1", 8080), "state": {}}
+    requested = False
+    status = 0
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()  # no disconnect while the response is sent
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await asyncio.wait_for(asgi(scope, receive, send), 10)
+    return status
+
+
+async def run(requests: int):
+    await seed(players=200, questions=60)
+    main.FORWARDED_ALLOW_IPS = PROXY
+    options = main.server_options()
+    stacks = {
+        "before": launcher.build_config(BaseHTTPMiddleware(app, dispatch=add_proxy_headers),
+                                        "127.0.0.1", 0, **options).loaded_app,
+        "after": launcher.build_config(app, "127.0.0.1", 0, **options).loaded_app,
+    }
+    paths = [assets.url("leaderboard.js"), "/leaderboard"]
+    print(f"{'path':<36} {'before us':>10} {'after us':>10} {'saved us':>10}")
+    for path in paths:
+        medians = {}
+        for name, asgi in stacks.items():
+            assert await call(asgi, path) == 200
+            timings = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                await call(asgi, path)
+                timings.append(time.perf_counter() - start)
+            medians[name] = statistics.median(timings)
+        print(f"{path:<36} {medians['before'] * 1e6:10.0f} {medians['after'] * 1e6:10.0f} "
+              f"{(medians['before'] - medians['after']) * 1e6:10.0f}")
+    print(f"median of {requests} requests each; /leaderboard is answered by the response cache after the first")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
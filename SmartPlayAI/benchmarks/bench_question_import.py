@@ -0,0 +1,58 @@
+"""
+Time the streaming question importer on a synthetic NDJSON file.
+
+Point DATABASE_PUBLIC_URL at a scratch database (the rows are left in place so
+a second run measures the all-duplicates path), then run from the SmartPlayAI
+directory:
+
+    uv run python -m benchmarks.bench_question_import --rows 1000000 --batch-size 10000
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+from pathlib import Path
+
+from model.database import AsyncSessionLocal
+from seed_questions import import_questions, iter_question_rows
+
+THEMES = ["crisis", "interview", "moral", "survival"]
+SEVERITIES = ["critical", "high", "gradual", None]
+
+
+def write_fixture(path: Path, rows: int, duplicate_ratio: float) -> None:
+    rng = random.Random(42)
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(rows):
+            n = rng.randrange(i) if i and rng.random() < duplicate_ratio else i
+            f.write(json.dumps({
+                "theme": THEMES[n % len(THEMES)],
+                "severity": SEVERITIES[n % len(SEVERITIES)],
+                "subcategory": f"sub{n % 17}",
+                "question_text": f"Synthetic scenario #{n}: the deploy failed at step {n % 97}. What do you do?",
+            }) + "\n")
+
+
+async def main(rows: int, batch_size: int, duplicate_ratio: float, near_duplicates: bool):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "questions.ndjson"
+        write_fixture(path, rows, duplicate_ratio)
+        print(f"fixture: {rows} rows, {path.stat().st_size / 1e6:.1f} MB")
+        async with AsyncSessionLocal() as db:
+            report = await import_questions(db, iter_question_rows(str(path)), batch_size,
+                                            skip_near_duplicates=near_duplicates)
+    print(f"batch_size={batch_size} near_duplicates={near_duplicates}: {report}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.05)
+    # The synthetic rows are templated, so with the check on nearly all of them
+    # count as near-duplicates; it still measures the cost of the check
+    parser.add_argument("--near-duplicates", action="store_true",
+                        help="also run the near-duplicate check")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.batch_size, args.duplicate_ratio, args.near_duplicates))
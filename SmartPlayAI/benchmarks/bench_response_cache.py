@@ -0,0 +1,86 @@
+"""
+Bandwidth, SQL statements and time for clients polling an idle leaderboard, with and
+without the response cache. Point DATABASE_PUBLIC_URL at a scratch database (it is
+seeded with synthetic players and answers if empty), then run from the SmartPlayAI directory:
+
+    uv run python -m benchmarks.bench_response_cache --clients 20 --polls 30
+
+"uncached" bumps the data version before every request, so each poll recomputes and
+re-serializes as before the cache; "cached" clients revalidate with If-None-Match.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from main import app
+from model import crud, models, schemas
+from model.database import AsyncSessionLocal, engine
+from query_audit import count_queries
+from response_cache import data_version
+
+URLS = ["/leaderboard", "/leaderboard?theme=survival", "/leaderboard/details?theme=survival"]
+THEMES = ["survival", "work", "interview"]
+
+
+async def seed(players: int, questions: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        if await db.scalar(select(func.count()).select_from(models.Response)):
+            return
+        rng = random.Random(45)
+        db.add_all(models.Question(theme=THEMES[i % 3], question_text=f"Bench scenario {i}: what do you do?",
+                                   text_hash=f"bench-{i}") for i in range(questions))
+        db.add_all(models.Player(name=f"bench_player_{i}", password_hash="x", score=0) for i in range(players))
+        await db.commit()
+        question_ids = (await db.scalars(select(models.Question.id))).all()
+        player_ids = (await db.scalars(select(models.Player.id))).all()
+        # Through crud so the per-theme leaderboard aggregates are filled in too
+        for player_id in player_ids:
+            for question_id in rng.sample(question_ids, k=min(5, len(question_ids))):
+                await crud.store_response(db, schemas.ResponseCreate(
+                    player_id=player_id, question_id=question_id, score=rng.randint(0, 5),
+                    response_text="I stay calm and check my options.", llm_feedback="Calm and practical."))
+
+
+def poll(client: TestClient, clients: int, polls: int, cached: bool):
+    etags = {}
+    received = requests = 0
+    start = time.perf_counter()
+    with count_queries(engine) as audit:
+        for _ in range(polls):
+            for c in range(clients):
+                for url in URLS:
+                    headers = {}
+                    if cached and (c, url) in etags:
+                        headers["If-None-Match"] = etags[(c, url)]
+                    else:
+                        data_version.bump()
+                    response = client.get(url, headers=headers)
+                    etags[(c, url)] = response.headers.get("etag")
+                    received += len(response.content)
+                    requests += 1
+    elapsed = time.perf_counter() - start
+    name = "cached" if cached else "uncached"
+    print(f"{name:>9}: {requests} requests  {received / 1024:9.1f} KB body  "
+          f"{audit.count:6d} SQL statements  {elapsed / requests * 1e3:6.2f} ms/request")
+
+
+def main(clients: int, polls: int, players: int):
+    asyncio.run(seed(players, questions=60))
+    with TestClient(app) as client:
+        poll(client, clients, polls, cached=False)
+        poll(client, clients, polls, cached=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--polls", type=int, default=30)
+    parser.add_argument("--players", type=int, default=200, help="players to seed into an empty database")
+    args = parser.parse_args()
+    main(args.clients, args.polls, args.players)
@@ -0,0 +1,39 @@
+"""
+Time the adaptive scheduler's pick of the next questions from a candidate pool,
+the in-process part of get_scheduled_questions. Run from the SmartPlayAI directory:
+
+    uv run python -m benchmarks.bench_scheduler --candidates 50 --picks 5
+"""
+import argparse
+import random
+import time
+
+import scheduler
+
+SEVERITIES = ["critical", "high", "gradual", None]
+
+
+def main(candidates: int, picks: int, rounds: int):
+    rng = random.Random(1)
+    now = time.time()
+    mastery = {}
+    for _ in range(200):
+        mastery = scheduler.record_answer(
+            mastery, rng.choice(SEVERITIES), rng.randint(0, 5), now - rng.randint(0, 30 * 86400))
+    pool = [(i, rng.choice(SEVERITIES)) for i in range(candidates)]
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        scheduler.pick_questions(pool, mastery, picks, now, rng)
+    per_call = (time.perf_counter() - start) / rounds
+    print(f"state={mastery}")
+    print(f"pick {picks} of {candidates}: {per_call * 1e6:.1f}us per call")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--picks", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.candidates, args.picks, args.rounds)
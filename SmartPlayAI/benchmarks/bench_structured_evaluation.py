@@ -0,0 +1,81 @@
+"""
+Compare free-text evaluations with JSON-mode (structured output) evaluations on a fixed
+answer set against the LLM backend in SERVEO_HOST. Run from the SmartPlayAI directory:
+
+    uv run python -m benchmarks.bench_structured_evaluation --num-predict 200
+"""
+import argparse
+import time
+
+from fetchLLMresponse import evaluate_player_response
+from metrics import LLM_REQUEST_DURATION, LLM_TOKENS
+
+ANSWERS = [
+    ("survival", "A fire breaks out in your apartment at night. What do you do?",
+     "I stay low under the smoke, feel the door for heat and leave by the stairs."),
+    ("survival", "You are lost in a snowstorm far from the trail.",
+     "Dig a snow cave, stay dry and wait for the storm to pass before moving."),
+    ("survival", "A bear wanders into your campsite.",
+     "I run as fast as I can towards the car."),
+    ("work", "A coworker takes credit for your idea in a meeting.",
+     "I talk to them privately afterwards and then follow up with my manager by email."),
+    ("work", "Your laptop dies an hour before a client demo.",
+     "Borrow a teammate's machine, pull the slides from the shared drive and warn the client."),
+    ("work", "Your manager criticises your report in front of the team.",
+     "I tell him he is wrong and walk out."),
+    ("interview", "Tell me about a time you failed.",
+     "I missed a deadline once because I underestimated testing, so now I plan buffers and flag risks early."),
+    ("interview", "Why do you want this job?",
+     "Because it pays well."),
+    ("social", "A friend cancels plans with you for the third time.",
+     "I ask if everything is okay and say I miss seeing them, then suggest something low-key."),
+    ("social", "Someone cuts in front of you in a long queue.",
+     "I politely point out the end of the line and let it go if they ignore me."),
+]
+
+
+def _completion_tokens() -> float:
+    return LLM_TOKENS.labels("completion").get()
+
+
+def _outcomes() -> dict[str, int]:
+    counts = {}
+    for (theme, outcome), child in LLM_REQUEST_DURATION._children.items():
+        counts[outcome] = counts.get(outcome, 0) + child.count
+    return counts
+
+
+def run(structured: bool, num_predict: int | None, rounds: int):
+    tokens_before, outcomes_before = _completion_tokens(), _outcomes()
+    verdicts = []
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for theme, question, answer in ANSWERS:
+            _, result = evaluate_player_response(question, answer, theme,
+                                                 structured=structured, num_predict=num_predict)
+            verdicts.append((result["verdict"], result["score"]))
+    elapsed = time.perf_counter() - start
+
+    calls = rounds * len(ANSWERS)
+    outcomes = {k: v - outcomes_before.get(k, 0) for k, v in _outcomes().items()}
+    name = "json mode" if structured else "free text"
+    print(f"{name:>9}: {(_completion_tokens() - tokens_before) / calls:6.1f} completion tokens/answer  "
+          f"{elapsed / calls:5.2f}s/answer  parse fallbacks {outcomes.get('parse_fallback', 0)}/{calls}  "
+          f"errors {outcomes.get('error', 0)}")
+    return verdicts
+
+
+def main(num_predict: int | None, rounds: int):
+    before = run(False, None, rounds)
+    after = run(True, num_predict, rounds)
+    agree = sum(a[0] == b[0] for a, b in zip(before, after))
+    print(f"verdict agreement: {agree}/{len(before)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--num-predict", type=int, default=None,
+                        help="token cap for the JSON-mode run (the free-text run is uncapped)")
+    parser.add_argument("--rounds", type=int, default=1)
+    args = parser.parse_args()
+    main(args.num_predict, args.rounds)
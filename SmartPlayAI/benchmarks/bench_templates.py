@@ -0,0 +1,109 @@
+"""
+First-request template latency after a deploy, and steady-state render time, for
+result.html and question_game.html. Run from the SmartPlayAI directory:
+
+    uv run python -m benchmarks.bench_templates --renders 2000
+
+Each first-request figure comes from a fresh Python process, as a new worker would see it:
+"per-router" builds its own Jinja2Templates with no bytecode cache (as each router did
+before templating.py), "bytecode" uses the shared environment with a filled on-disk cache,
+and "warmed" also runs warm_up() at startup, so the request itself only renders.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PAGES = ["result.html", "question_game.html"]
+MODES = ["per-router", "bytecode", "warmed"]
+QUESTIONS = [{"id": i, "theme": "survival", "severity": "medium", "subcategory": "wilderness",
+              "question_text": f"Scenario {i}: a storm cuts you off from the trail. What do you do first?"}
+             for i in range(10)]
+CONTEXT = {"questions": QUESTIONS, "user_id": 1, "theme": "survival", "current_score": 12}
+
+
+def _environment(mode: str, cache_dir: Path):
+    from templating import create_environment
+
+    if mode == "per-router":
+        from fastapi.templating import Jinja2Templates
+        from static_assets import template_globals
+        from templating import TEMPLATES_DIR
+
+        templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+        templates.env.globals.update(template_globals)
+        return templates.env
+    return create_environment(cache_dir=cache_dir, auto_reload=False)
+
+
+def first_request(mode: str, cache_dir: Path) -> dict:
+    """Runs in the child process: startup cost and the first render of each page."""
+    from templating import warm_up
+
+    start = time.perf_counter()
+    env = _environment(mode, cache_dir)
+    if mode == "warmed":
+        warm_up(env)
+    startup = time.perf_counter() - start
+    firsts = {}
+    for page in PAGES:
+        start = time.perf_counter()
+        env.get_template(page).render(CONTEXT)
+        firsts[page] = time.perf_counter() - start
+    return {"startup": startup, "first": firsts}
+
+
+def _run_child(mode: str, cache_dir: Path) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_templates", "--child", mode, "--cache-dir", str(cache_dir)],
+        check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def steady_state(renders: int) -> dict[str, float]:
+    from templating import create_environment
+
+    env = create_environment(cache_dir=None, auto_reload=False)
+    results = {}
+    for page in PAGES:
+        template = env.get_template(page)
+        timings = []
+        for _ in range(renders):
+            start = time.perf_counter()
+            template.render(CONTEXT)
+            timings.append(time.perf_counter() - start)
+        results[page] = statistics.median(timings)
+    return results
+
+
+def main(renders: int, processes: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = Path(tmp)
+        _run_child("bytecode", cache_dir)  # fills the cache, as the Docker build does
+        print(f"{'mode':<11} {'startup ms':>10} " + " ".join(f"{p + ' ms':>22}" for p in PAGES))
+        for mode in MODES:
+            runs = [_run_child(mode, cache_dir) for _ in range(processes)]
+            startup = statistics.median(r["startup"] for r in runs)
+            firsts = [statistics.median(r["first"][p] for r in runs) for p in PAGES]
+            print(f"{mode:<11} {startup * 1e3:10.2f} " + " ".join(f"{f * 1e3:22.2f}" for f in firsts))
+    print("first request, median of", processes, "fresh processes")
+
+    for page, seconds in steady_state(renders).items():
+        print(f"steady-state {page:<20} {seconds * 1e6:8.1f}us per render")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--renders", type=int, default=2000)
+    parser.add_argument("--processes", type=int, default=5, help="fresh processes per first-request mode")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--cache-dir", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(first_request(args.child, args.cache_dir)))
+    else:
+        main(args.renders, args.processes)
@@ -0,0 +1,83 @@
+"""
+Compare the streaming verdict extractor with the rfind/json.loads retry loop it replaced,
+over the sample outputs in tests/data/llm_outputs.jsonl. Run from the SmartPlayAI directory:
+
+    uv run python -m benchmarks.bench_verdict_parser --rounds 2000
+"""
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+from verdict_parser import VerdictExtractor, extract_verdict
+
+CORPUS = Path(__file__).resolve().parent.parent / "tests" / "data" / "llm_outputs.jsonl"
+
+
+def old_extract_json_and_text(content: str):
+    # The previous fetchLLMresponse._extract_json_and_text, for comparison
+    s = content.strip()
+    s = re.sub(r"```json\s*", "", s, flags=re.IGNORECASE)
+    s = s.replace("```", "")
+    start = s.rfind("{")
+    result = {"verdict": None, "score": None}
+    evaluation_text = s
+    if start != -1:
+        end = s.find("}", start)
+        while end != -1:
+            try:
+                result = json.loads(s[start:end + 1])
+                evaluation_text = s[:start].strip()
+                break
+            except json.JSONDecodeError:
+                end = s.find("}", end + 1)
+    verdict = (result.get("verdict") or "").upper().strip()
+    verdict = verdict if verdict in ("GOOD", "BAD") else None
+    try:
+        score = max(0, min(5, int(round(float(result.get("score"))))))
+    except Exception:
+        score = None
+    return evaluation_text, {"verdict": verdict, "score": score}
+
+
+def streamed(text: str, chunk_size: int = 8):
+    extractor = VerdictExtractor()
+    for i in range(0, len(text), chunk_size):
+        extractor.feed(text[i:i + chunk_size])
+    return extractor.close()
+
+
+def timed(fn, outputs, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in outputs:
+            fn(text)
+    return (time.perf_counter() - start) / (rounds * len(outputs))
+
+
+def main(rounds: int):
+    cases = [json.loads(line) for line in CORPUS.read_text().splitlines() if line]
+    outputs = [c["output"] for c in cases]
+
+    for name, fn in [("old", old_extract_json_and_text), ("new", extract_verdict)]:
+        correct = sum(fn(c["output"])[1] == {"verdict": c["verdict"], "score": c["score"]} for c in cases)
+        print(f"{name}: {correct}/{len(cases)} corpus outputs parsed as expected")
+
+    print(f"old one-shot:      {timed(old_extract_json_and_text, outputs, rounds) * 1e6:8.1f}us per output")
+    print(f"new one-shot:      {timed(extract_verdict, outputs, rounds) * 1e6:8.1f}us per output")
+    print(f"new 8-char chunks: {timed(streamed, outputs, rounds) * 1e6:8.1f}us per output")
+
+    # A truncated object with many braces inside its last string makes the old loop re-run
+    # json.loads on an ever longer prefix at every "}"
+    pathological = ['{"verdict": "GOOD", "score": 4, "note": "' + "stayed calm} " * 2000]
+    pathological_rounds = max(1, rounds // 100)
+    print(f"pathological old:  {timed(old_extract_json_and_text, pathological, pathological_rounds) * 1e3:8.2f}ms")
+    print(f"pathological new:  {timed(extract_verdict, pathological, pathological_rounds) * 1e3:8.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.rounds)
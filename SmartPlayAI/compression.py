@@ -0,0 +1,154 @@
+# On-the-fly compression of the rendered pages and JSON API responses. Brotli when the
+# client accepts it, gzip otherwise. Only allowlisted
+# content types at least COMPRESSION_MIN_SIZE bytes long are compressed; responses that
+# already carry a Content-Encoding (the precompressed static assets) and media such as
+# the MP3s pass through untouched. Streamed responses are compressed chunk by chunk and
+# flushed after each one, so nothing is held back waiting for the rest of the stream.
+import os
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from metrics import COMPRESSION_BYTES
+from static_assets import accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # a dependency; gzip only on installs made outside uv.lock
+    brotli = None
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION", "true").lower() in ("1", "true", "yes", "on")
+MINIMUM_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))  # smaller bodies barely shrink
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+# Dynamic responses are compressed per request: quality 4-5 is most of the ratio of 11 at
+# a fraction of the CPU; the static build uses 11 once
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+
+# Server-Sent Events are left out: every event would need its own flush for little gain
+COMPRESSIBLE_TYPES = (
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def is_compressible(content_type: str, types=COMPRESSIBLE_TYPES) -> bool:
+    return content_type.split(";", 1)[0].strip().lower() in types
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing allowlisted response types with br or gzip."""
+
+    def __init__(self, app, minimum_size: int = MINIMUM_SIZE, gzip_level: int = GZIP_LEVEL,
+                 brotli_quality: int = BROTLI_QUALITY, types=COMPRESSIBLE_TYPES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.types = tuple(types)
+
+    def _compressor(self, encoding: str):
+        return _Brotli(self.brotli_quality) if encoding == "br" else _Gzip(self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None  # set once the response is being compressed
+        passthrough = False
+
+        async def compress_send(message):
+            nonlocal start, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                if ("content-encoding" in headers or message["status"] < 200 or message["status"] in (204, 304)
+                        or not is_compressible(headers.get("content-type", ""), self.types)):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message  # held until the first body chunk shows the size
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                compressor = self._compressor(encoding)
+                headers = MutableHeaders(raw=list(start.get("headers", [])))
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers and not headers["etag"].startswith("W/"):
+                    # A strong ETag names the identity bytes, not these
+                    headers["etag"] = "W/" + headers["etag"]
+                if not more_body:
+                    compressed = compressor.finish(body)
+                    headers["content-length"] = str(len(compressed))
+                    await send({**start, "headers": headers.raw})
+                    await send({"type": "http.response.body", "body": compressed})
+                    _count(encoding, len(body), len(compressed))
+                    return
+                del headers["content-length"]
+                await send({**start, "headers": headers.raw})
+
+            compressed = compressor.compress(body) if more_body else compressor.finish(body)
+            _count(encoding, len(body), len(compressed))
+            await send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+        await self.app(scope, receive, compress_send)
+
+
+def _count(encoding: str, identity: int, compressed: int) -> None:
+    COMPRESSION_BYTES.labels(encoding, "in").inc(identity)
+    COMPRESSION_BYTES.labels(encoding, "out").inc(compressed)
@@ -0,0 +1,65 @@
+# Opt-in fast path for the JSON API routes (FAST_JSON=1). Routes hand their content, or
+# the SQLAlchemy rows straight from crud, to FastJSONResponse. Returning a Response skips
+# FastAPI's jsonable_encoder walk and the response_model validation of every row; the body
+# is written by orjson. Timestamps are written as UTC with a "Z" suffix, naive ones
+# (SQLite) assumed to be UTC, as the response schemas already do.
+import json
+import os
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # a dependency; stdlib encoder on installs made outside uv.lock
+    orjson = None
+
+FAST_JSON_ENABLED = os.getenv("FAST_JSON", "").lower() in ("1", "true", "yes", "on")
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, "_fields"):  # a Row nested in other content
+        return dict(zip(value._fields, value))
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(content, default=_default, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def rows_json(rows) -> bytes:
+    """A list of SQLAlchemy rows as a JSON array of objects keyed by column label."""
+    if not rows:
+        return b"[]"
+    # Keys come from the first row once; each row is zipped with them inside the encoder
+    fields = rows[0]._fields
+    return dumps([dict(zip(fields, row)) for row in rows])
+
+
+def fields_of(obj, schema) -> dict:
+    """The fields of a response schema read straight off an ORM object, without validation."""
+    return {name: getattr(obj, name) for name in schema.model_fields}
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse for plain content or a list of rows, without jsonable_encoder."""
+
+    def render(self, content) -> bytes:
+        if isinstance(content, list) and content and hasattr(content[0], "_fields"):
+            return rows_json(content)
+        return dumps(content)
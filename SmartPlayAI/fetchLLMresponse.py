@@ -1,21 +1,30 @@
 import requests
 import json
 import os
-import re
+from time import perf_counter
 from dotenv import load_dotenv, set_key
+from metrics import LLM_REQUEST_DURATION, LLM_TOKENS, theme_label
+from answer_filter import prefilter_answer
+from verdict_parser import VerdictExtractor
 
 load_dotenv()
 url = os.getenv("SERVEO_HOST")
 headers = {"Content-Type": "application/json"}
+REQUEST_TIMEOUT = 20
+# Ask for {dimensions, verdict, score, narrative} through Ollama's structured outputs
+STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "").lower() in ("1", "true", "yes", "on")
+NUM_PREDICT = int(os.getenv("LLM_NUM_PREDICT", 0)) or None  # cap on generated tokens, unset = no cap
 
 # Canonical scoring rules shared across all themes
-BASE_RULES = """
+RUBRIC_RULES = """
 Rubric → verdict/score (apply exactly):
 - If clarity = clear AND adaptability = adaptable AND EI = emotionally attuned → verdict=GOOD, score=4–5 (use 5 if consequences=positive, else 4).
 - If at least two dimensions are "partial" and none are "not/unclear" → verdict=GOOD, score=3.
 - If one dimension is "not/unclear" and the others are at least partial → verdict=BAD, score=2.
 - If two or more dimensions are "not/unclear" → verdict=BAD, score=0–1 (use 1 if consequences=mixed, else 0).
+"""
 
+TEXT_FORMAT_RULES = """
 Formatting rules:
 - Write exactly four sentences of analysis, one each for clarity, adaptability, emotional intelligence, and consequence.
 - You may vary tone and sentence structure; do not sound formulaic.
@@ -25,8 +34,40 @@ Example (format only):
 {"verdict":"GOOD","score":3}
 """
 
+STRUCTURED_FORMAT_RULES = """
+Formatting rules:
+- Reply with one JSON object only, no text before or after it.
+- "dimensions": rate clarity, adaptability, emotional_intelligence and consequences.
+- "verdict" and "score": apply the rubric to those ratings.
+- "narrative": exactly four sentences of analysis, one each for clarity, adaptability, emotional intelligence, and consequence. Vary tone and sentence structure; do not sound formulaic.
+"""
 
-def _build_system_prompt(theme: str) -> str:
+BASE_RULES = RUBRIC_RULES + TEXT_FORMAT_RULES
+
+# JSON schema passed as Ollama's `format`, so the reply is the evaluation itself.
+# The narrative comes last: when num_predict cuts a reply short only the prose is lost.
+EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "dimensions": {
+            "type": "object",
+            "properties": {
+                "clarity": {"type": "string", "enum": ["clear", "partial", "unclear"]},
+                "adaptability": {"type": "string", "enum": ["adaptable", "partial", "not adaptable"]},
+                "emotional_intelligence": {"type": "string", "enum": ["attuned", "partial", "not attuned"]},
+                "consequences": {"type": "string", "enum": ["positive", "mixed", "negative"]},
+            },
+            "required": ["clarity", "adaptability", "emotional_intelligence", "consequences"],
+        },
+        "verdict": {"type": "string", "enum": ["GOOD", "BAD"]},
+        "score": {"type": "integer", "minimum": 0, "maximum": 5},
+        "narrative": {"type": "string"},
+    },
+    "required": ["dimensions", "verdict", "score", "narrative"],
+}
+
+
+def _build_system_prompt(theme: str, structured: bool = False) -> str:
     theme = (theme or "").lower()
 
     # Shared context
@@ -121,47 +162,44 @@ def _build_system_prompt(theme: str) -> str:
             "Give a concise, balanced reflection of the situation and improvements possible."
         )
 
-    return f"{voice_context}\n\n{personality}\n\n{preface}\n\nUse these guiding ideas:\n{rubric}\n\nAdd subtle variety in phrasing and rhythm so every reflection feels human and situational.\n{BASE_RULES}"
-
-
-def _extract_json_and_text(content: str):
-    s = content.strip()
-    s = re.sub(r"```json\s*", "", s, flags=re.IGNORECASE)
-    s = s.replace("```", "")
-
-    start = s.rfind("{")
-    result = {"verdict": None, "score": None}
-    evaluation_text = s
-
-    if start != -1:
-        end = s.find("}", start)
-        while end != -1:
-            candidate = s[start:end+1]
-            try:
-                parsed = json.loads(candidate)
-                evaluation_text = s[:start].strip()
-                result = parsed
-                break
-            except json.JSONDecodeError:
-                end = s.find("}", end + 1)
-
-    verdict = (result.get("verdict") or "").upper().strip()
-    verdict = "GOOD" if verdict == "GOOD" else (
-        "BAD" if verdict == "BAD" else None)
-
-    score = result.get("score")
-    try:
-        score = int(round(float(score)))
-    except Exception:
-        score = None
-    if score is not None:
-        score = max(0, min(5, score))
-
-    return evaluation_text, {"verdict": verdict, "score": score}
-
-
-def evaluate_player_response(question: str, answer: str, theme: str = "", **kwargs):
-    system_prompt = _build_system_prompt(theme)
+    rules = RUBRIC_RULES + (STRUCTURED_FORMAT_RULES if structured else TEXT_FORMAT_RULES)
+    return f"{voice_context}\n\n{personality}\n\n{preface}\n\nUse these guiding ideas:\n{rubric}\n\nAdd subtle variety in phrasing and rhythm so every reflection feels human and situational.\n{rules}"
+
+
+def _stream_content(response, extractor, deadline: float) -> dict:
+    """Feed streamed message chunks into ``extractor``; returns the final (``done``) line."""
+    last = {}
+    for line in response.iter_lines():
+        if not line:
+            continue
+        last = json.loads(line)
+        extractor.feed(last.get("message", {}).get("content", ""))
+        if last.get("done"):
+            break
+        if perf_counter() > deadline:
+            # The read timeout only bounds the gap between chunks, not the whole answer
+            raise TimeoutError(f"Evaluation still streaming after {REQUEST_TIMEOUT}s")
+    return last
+
+
+def evaluate_player_response(question: str, answer: str, theme: str = "",
+                             structured: bool | None = None, num_predict: int | None = None, **kwargs):
+    """
+    Evaluate a player's answer, returning ``(evaluation_text, {"verdict", "score"})``.
+
+    ``structured`` (default LLM_STRUCTURED_OUTPUT) requests the JSON schema
+    reply, whose result also carries the model's "dimensions" ratings.
+    ``num_predict`` (default LLM_NUM_PREDICT) caps the generated tokens.
+    """
+    structured = STRUCTURED_OUTPUT if structured is None else structured
+    num_predict = num_predict or NUM_PREDICT
+
+    # Blank, filler and keyboard-mash answers get the rubric's score 0 without a model call
+    filtered = prefilter_answer(answer, theme)
+    if filtered is not None:
+        return filtered
+
+    system_prompt = _build_system_prompt(theme, structured)
 
     data = {
         "model": "qwen3:14b",
@@ -170,30 +208,47 @@ def evaluate_player_response(question: str, answer: str, theme: str = "", **kwar
             {"role": "user", "content": f"Theme: {theme}\nQuestion: {question}\nPlayer Response: {answer}"},
         ],
         "temperature": 0.6,   # slightly creative for natural tone
-        "stream": False,
+        "stream": True,   # parse verdict chunks as they arrive
         "think": False,
         "seed": 42,
         "top_p": 0.9,
         "top_k": 5,
     }
+    if structured:
+        data["format"] = EVALUATION_SCHEMA
+    if num_predict:
+        data["options"] = {"num_predict": num_predict}
 
+    start = perf_counter()
+    outcome = "ok"
     try:
-        response = requests.post(url, headers=headers,
-                                 data=json.dumps(data), timeout=20)
-        if not response.ok:
-            raise RuntimeError(
-                f"API Error {response.status_code}: {response.text}")
-
-        body = response.json()
-        content = body.get("message", {}).get("content", "").strip()
-
-        evaluation_text, result = _extract_json_and_text(content)
+        extractor = VerdictExtractor()
+        with requests.post(url, headers=headers, data=json.dumps(data),
+                           timeout=REQUEST_TIMEOUT, stream=True) as response:
+            if not response.ok:
+                raise RuntimeError(
+                    f"API Error {response.status_code}: {response.text}")
+            body = _stream_content(response, extractor, start + REQUEST_TIMEOUT)
+
+        # Ollama reports token usage on the final chunk
+        LLM_TOKENS.labels("prompt").inc(body.get("prompt_eval_count") or 0)
+        LLM_TOKENS.labels("completion").inc(body.get("eval_count") or 0)
+
+        evaluation_text, result = extractor.close()
+        dimensions = (extractor.raw or {}).get("dimensions")
+        if structured and isinstance(dimensions, dict):
+            result["dimensions"] = dimensions
 
         if result["verdict"] not in ("GOOD", "BAD") or result["score"] is None:
+            outcome = "parse_fallback"
             result = {"verdict": "BAD", "score": 0}
 
         return evaluation_text, result
 
     except Exception as e:
+        outcome = "error"
         print(f"[Fallback] Using default evaluation due to error: {e}")
         return "", {"verdict": "BAD", "score": 0}
+    finally:
+        LLM_REQUEST_DURATION.labels(theme_label(theme), outcome).observe(
+            perf_counter() - start)
@@ -0,0 +1,123 @@
+# Production launcher: one preloaded master process forking uvicorn workers that share its
+# listening socket. The app, its modules and the compiled templates are loaded once in the
+# master, so the workers share that memory copy-on-write; each worker then runs the app's
+# lifespan (database warm-up, question catalog) on its own connections.
+#
+# SIGTERM or SIGINT drains every worker: it stops accepting connections, closes the live
+# leaderboard streams (browsers reconnect elsewhere) and waits up to GRACEFUL_TIMEOUT for
+# in-flight requests, LLM evaluations included, before the lifespan disposes the engine.
+# A worker that dies is replaced; one that dies while starting stops the launcher.
+#
+# Workers share their metrics through a temporary directory (see metrics.py), so /metrics
+# reports the whole server whichever worker answers the scrape.
+import os
+import shutil
+import signal
+import tempfile
+import time
+
+import uvicorn
+
+import metrics
+from live_leaderboard import leaderboard_channel
+from templating import templates, warm_up
+
+
+# One worker unless asked for more: live leaderboard deltas, data_version and the response
+# cache are per process, so with several workers a browser only sees the answers stored by
+# its own worker live, and cached JSON can lag writes made through another one
+WORKERS = int(os.getenv("WEB_CONCURRENCY", 1))
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", 120))  # longer than the slowest LLM evaluation
+STARTUP_GRACE = 10  # seconds a worker must stay up to count as started
+
+
+class WorkerServer(uvicorn.Server):
+    """uvicorn.Server that ends the open live leaderboard streams as soon as it drains."""
+
+    async def shutdown(self, sockets=None):
+        # Streams never finish on their own and would hold the drain until the timeout
+        leaderboard_channel.close()
+        await super().shutdown(sockets=sockets)
+
+
+def _run_worker(config: uvicorn.Config, sock) -> None:
+    # The master's handlers are not for workers; uvicorn installs its own while serving
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    code = 1
+    try:
+        metrics.start_publishing(metrics.shared_dir)
+        WorkerServer(config).run(sockets=[sock])
+        code = 0
+    finally:
+        os._exit(code)
+
+
+def build_config(app, host: str, port: int, graceful_timeout: int = GRACEFUL_TIMEOUT,
+                 **options) -> uvicorn.Config:
+    """The loaded uvicorn config every worker serves, ``options`` passed through to uvicorn."""
+    config = uvicorn.Config(app, host=host, port=port, timeout_graceful_shutdown=graceful_timeout, **options)
+    config.load()
+    return config
+
+
+def serve(app, host: str, port: int, workers: int = WORKERS,
+          graceful_timeout: int = GRACEFUL_TIMEOUT, **options) -> int:
+    """Run ``app`` in ``workers`` forked uvicorn processes until SIGTERM; returns the exit code."""
+    config = build_config(app, host, port, graceful_timeout, **options)
+    count, seconds = warm_up(templates.env)
+    print(f"[launcher] preloaded the app and {count} templates in {seconds * 1000:.0f}ms, "
+          f"starting {workers} workers on {host}:{port}")
+    sock = config.bind_socket()
+    metrics.shared_dir = tempfile.mkdtemp(prefix="smartplay-metrics-")
+
+    started_at: dict[int, float] = {}
+    stopping_since = None
+    exit_code = 0
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(config, sock)
+        started_at[pid] = time.monotonic()
+
+    def stop(signum=signal.SIGTERM, frame=None) -> None:
+        nonlocal stopping_since
+        if stopping_since is None:
+            stopping_since = time.monotonic()
+            print(f"[launcher] draining {len(started_at)} workers (up to {graceful_timeout}s)")
+        for pid in started_at:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+
+    while started_at:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            if stopping_since is not None and time.monotonic() - stopping_since > graceful_timeout + 10:
+                for pid in started_at:
+                    os.kill(pid, signal.SIGKILL)
+            time.sleep(0.2)
+            continue
+        uptime = time.monotonic() - started_at.pop(pid)
+        metrics.forget_worker(pid)
+        if stopping_since is not None:
+            continue
+        print(f"[launcher] worker {pid} exited with status {os.waitstatus_to_exitcode(status)}")
+        if uptime < STARTUP_GRACE:
+            # A worker that cannot start will not start on a retry either
+            exit_code = 1
+            stop()
+        else:
+            spawn()
+
+    sock.close()
+    shutil.rmtree(metrics.shared_dir, ignore_errors=True)
+    print("[launcher] all workers stopped")
+    return exit_code
@@ -0,0 +1,156 @@
+# Live leaderboard over Server-Sent Events. store_response publishes one small delta per
+# answer (the player's new overall and per-theme totals); every connected browser gets the
+# same pre-encoded frame, so fan-out costs one queue append per subscriber and no queries.
+# Deltas carry absolute totals, not increments, so applying one twice is harmless.
+#
+# Resync protocol: a new stream starts with a snapshot event (the board at sequence N)
+# followed by deltas N+1, N+2, ... Every event has an id "<epoch>:<seq>"; when EventSource
+# reconnects it sends Last-Event-ID and the stream replays the missed deltas from a ring
+# buffer, or sends a fresh snapshot when it has fallen further behind than the buffer. The
+# epoch is new in every process, so an id from another worker (or from before a restart),
+# whose sequence numbers mean nothing here, always gets a snapshot. A subscriber that
+# cannot keep up is disconnected and resyncs the same way. A reset event (after score
+# resets) asks clients to reconnect for a new snapshot.
+# Deltas are per process: with several workers, a browser sees the answers stored by the
+# worker it is connected to live, and the rest on its next snapshot.
+import asyncio
+import json
+import os
+import time
+from collections import deque
+
+LIVE_LEADERBOARD_ENABLED = os.getenv("LIVE_LEADERBOARD", "true").lower() in ("1", "true", "yes", "on")
+REPLAY_BUFFER = int(os.getenv("LIVE_LEADERBOARD_REPLAY", 1024))  # deltas kept for reconnecting clients
+SUBSCRIBER_BACKLOG = int(os.getenv("LIVE_LEADERBOARD_BACKLOG", 256))  # unsent deltas before a client is dropped
+HEARTBEAT_SECONDS = float(os.getenv("LIVE_LEADERBOARD_HEARTBEAT", 15))
+RETRY_MS = 3000
+HEARTBEAT = b": keep-alive\n\n"
+
+
+def encode_event(event: str, event_id: str, data) -> bytes:
+    payload = json.dumps(data, separators=(",", ":"), default=str)
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode()
+
+
+def _new_epoch() -> str:
+    return f"{os.getpid():x}-{time.time_ns():x}"
+
+
+class _Subscriber:
+    __slots__ = ("frames", "wake", "dropped")
+
+    def __init__(self):
+        self.frames = deque()
+        self.wake = asyncio.Event()
+        self.dropped = False
+
+
+class LeaderboardChannel:
+    """Sequence-numbered delta broadcaster with a replay buffer for reconnecting clients."""
+
+    def __init__(self, replay: int = REPLAY_BUFFER, backlog: int = SUBSCRIBER_BACKLOG,
+                 heartbeat: float = HEARTBEAT_SECONDS):
+        self.epoch = _new_epoch()
+        self.seq = 0
+        self.recent: deque[tuple[int, bytes]] = deque(maxlen=replay)
+        self.backlog = backlog
+        self.heartbeat = heartbeat
+        self.subscribers: set[_Subscriber] = set()
+        self.closed = False
+        self._heartbeat_timer = None
+
+    def publish(self, delta: dict) -> int:
+        """Number the delta and queue its encoded frame for every subscriber."""
+        return self._broadcast("delta", delta)
+
+    def reset(self) -> int:
+        """Tell clients to reload the board, after a change too large for deltas (score resets)."""
+        return self._broadcast("reset", {})
+
+    def _broadcast(self, event: str, data: dict) -> int:
+        self.seq += 1
+        frame = encode_event(event, f"{self.epoch}:{self.seq}", data)
+        self.recent.append((self.seq, frame))
+        for subscriber in self.subscribers:
+            if len(subscriber.frames) >= self.backlog:
+                subscriber.dropped = True
+            else:
+                subscriber.frames.append(frame)
+            subscriber.wake.set()
+        return self.seq
+
+    def restart_epoch(self) -> None:
+        """Start a new epoch, so ids handed out before (by the parent of a fork) no longer resume."""
+        self.epoch = _new_epoch()
+
+    def replay_since(self, last_event_id: str | None) -> list[bytes] | None:
+        """Frames after the client's Last-Event-ID, or None when it needs a snapshot instead."""
+        epoch, _, seq = (last_event_id or "").rpartition(":")
+        try:
+            last_seq = int(seq)
+        except ValueError:
+            return None
+        if epoch != self.epoch or last_seq > self.seq:
+            # Unknown client, or ids from another process or from before this one started
+            return None
+        if last_seq == self.seq:
+            return []
+        if not self.recent or self.recent[0][0] > last_seq + 1:
+            return None
+        return [frame for seq, frame in self.recent if seq > last_seq]
+
+    def _beat(self) -> None:
+        # One timer for all streams, instead of a timeout task per subscriber per wait
+        self._heartbeat_timer = None
+        for subscriber in self.subscribers:
+            if not subscriber.frames:
+                subscriber.frames.append(HEARTBEAT)
+                subscriber.wake.set()
+        self._schedule_heartbeat()
+
+    def _schedule_heartbeat(self) -> None:
+        if self._heartbeat_timer is None and self.subscribers and not self.closed:
+            self._heartbeat_timer = asyncio.get_running_loop().call_later(self.heartbeat, self._beat)
+
+    def close(self) -> None:
+        """End every open stream, e.g. on shutdown; clients reconnect elsewhere."""
+        self.closed = True
+        for subscriber in self.subscribers:
+            subscriber.wake.set()
+
+    async def stream(self, snapshot, last_event_id: str | None = None):
+        """
+        Yield SSE frames for one client: a snapshot or the missed deltas, then live deltas.
+
+        ``snapshot`` is an async callable returning the board to send; it is only
+        awaited when the client cannot be resumed from the replay buffer.
+        """
+        subscriber = _Subscriber()
+        # Subscribe before reading the snapshot, so no delta committed meanwhile is lost
+        self.subscribers.add(subscriber)
+        self._schedule_heartbeat()
+        try:
+            missed, snapshot_id = self.replay_since(last_event_id), f"{self.epoch}:{self.seq}"
+            yield f"retry: {RETRY_MS}\n\n".encode()
+            if missed is None:
+                yield encode_event("snapshot", snapshot_id, {"board": await snapshot()})
+            else:
+                for frame in missed:
+                    yield frame
+            while not self.closed and not subscriber.dropped:
+                if not subscriber.frames:
+                    subscriber.wake.clear()
+                    await subscriber.wake.wait()
+                if subscriber.frames and not subscriber.dropped:
+                    frames, subscriber.frames = subscriber.frames, deque()
+                    yield b"".join(frames)
+        finally:
+            self.subscribers.discard(subscriber)
+            if not self.subscribers and self._heartbeat_timer is not None:
+                self._heartbeat_timer.cancel()
+                self._heartbeat_timer = None
+
+
+leaderboard_channel = LeaderboardChannel()
+# Workers forked by the launcher each number their own deltas
+os.register_at_fork(after_in_child=leaderboard_channel.restart_epoch)
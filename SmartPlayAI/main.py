@@ -1,42 +1,61 @@
 import os
-from pathlib import Path
+from contextlib import asynccontextmanager
 from router.authenticate import _get_user_from_token
 from typing import Optional
-from fastapi import FastAPI, HTTPException, Request, Form, Depends
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi import FastAPI, HTTPException, Request, Form, Depends, Header
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 import random
 from model import crud as crud_ops  # to not re import in the route
 from model import schemas
-from model.database import get_session
+from model.database import AsyncSessionLocal, get_session, get_read_session, engine, replica_engine, log_engine_config, warm_up_engines
 from router import players, questions, responses, authenticate
-
-BASE_DIR = Path(__file__).resolve().parent
-
-app = FastAPI(title="SmartPlayAI", version="1.0.0")
-
-
-@app.middleware("http")
-async def add_proxy_headers(request: Request, call_next):
-    # Trust forwarded headers from Railway proxy
-    forwarded_proto = request.headers.get("x-forwarded-proto", "http")
-    forwarded_host = request.headers.get(
-        "x-forwarded-host", request.headers.get("host", ""))
-
-    # Update request scope to use HTTPS
-    if forwarded_proto == "https":
-        request.scope["scheme"] = "https"
-    if forwarded_host:
-        request.scope["server"] = (
-            forwarded_host, 443 if forwarded_proto == "https" else 80)
-
-    response = await call_next(request)
-    return response
-
-app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
-templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+from metrics import MetricsMiddleware, CONTENT_TYPE as METRICS_CONTENT_TYPE, render_latest
+from query_audit import QUERY_AUDIT_ENABLED, QueryAuditMiddleware
+from response_cache import RESPONSE_CACHE_ENABLED, ResponseCacheMiddleware
+from live_leaderboard import LIVE_LEADERBOARD_ENABLED, leaderboard_channel
+from fast_json import FAST_JSON_ENABLED, FastJSONResponse
+from compression import COMPRESSION_ENABLED, CompressionMiddleware
+from static_assets import AssetStaticFiles, assets
+from templating import templates, warm_up
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_engine_config()
+    count, seconds = warm_up(templates.env)
+    print(f"Loaded {count} templates in {seconds * 1000:.0f}ms")
+    try:
+        seconds = await warm_up_engines()
+        # Question catalog for near-duplicate checks, loaded before the first request needs it
+        async with AsyncSessionLocal() as db:
+            catalog = await crud_ops.refresh_near_duplicate_index(db)
+        print(f"Connected to the database in {seconds * 1000:.0f}ms, {len(catalog)} questions in the catalog")
+    except Exception as e:
+        print(f"Startup warm-up skipped, database not ready: {e}")
+    yield
+    await engine.dispose()
+    if replica_engine is not engine:
+        await replica_engine.dispose()
+
+
+app = FastAPI(title="SmartPlayAI", version="1.0.0", lifespan=lifespan)
+# Proxies allowed to set X-Forwarded-Proto/-For: comma-separated IPs or networks, by default
+# only a proxy on the same host. Same variable and default as the uvicorn CLI.
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+if RESPONSE_CACHE_ENABLED:
+    # ETag/304 and a short in-memory cache for the polled leaderboard and question JSON
+    app.add_middleware(ResponseCacheMiddleware)
+if COMPRESSION_ENABLED:
+    # Outside the response cache, which keeps identity bodies for every Accept-Encoding
+    app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
+if QUERY_AUDIT_ENABLED:
+    # Dev/test only: log requests that run too many or repeated SQL statements
+    app.add_middleware(QueryAuditMiddleware)
+
+
+app.mount("/static", AssetStaticFiles(assets), name="static")
 
 app.include_router(players.router)
 app.include_router(questions.router)
@@ -133,11 +152,24 @@ async def optional_current_user(
 # ----------- ROUTES ------------
 
 
+GENERATE_ATTEMPTS = 3  # regenerate when the LLM repeats a stored scenario
+
+
 @app.get("/generate_question", response_class=HTMLResponse)
-async def generate_question_form(request: Request):
+async def generate_question_form(request: Request, db: AsyncSession = Depends(get_session)):
     """Generate a random question and display it for user approval."""
     selected_theme = random.choice(THEMES)
-    generated_question = generate_question(selected_theme)
+    for _ in range(GENERATE_ATTEMPTS):
+        generated_question = generate_question(selected_theme)
+        if await crud_ops.find_near_duplicate(db, generated_question, selected_theme) is None:
+            break
+    else:
+        # Every attempt repeated a stored scenario: offer a retry, not a known duplicate
+        return templates.TemplateResponse(request, "form.html", {
+            "question": None,
+            "theme": selected_theme,
+            "error_message": "Could not come up with a new question this time. Please try again.",
+        })
 
     return templates.TemplateResponse(request, "form.html", {
         "question": generated_question,
@@ -164,12 +196,14 @@ async def index(request: Request,
 @app.get('/leaderboard')
 async def get_leaderboard(
     theme: str | None = None,
-    db: AsyncSession = Depends(get_session)
+    db: AsyncSession = Depends(get_read_session)
 ):
     """Get leaderboard data, optionally filtered by theme."""
 
     try:
         leaderboard_data = await crud_ops.get_leaderboard(db, theme)
+        if FAST_JSON_ENABLED:
+            return FastJSONResponse(leaderboard_data)
         return leaderboard_data
     except Exception as e:
         print(f"Error fetching leaderboard: {e}")
@@ -180,37 +214,77 @@ async def get_leaderboard(
 @app.get('/leaderboard/details')
 async def get_leaderboard_details(
     theme: str = None,
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
 ):
     """Fetch question, response, and score details for leaderboard review."""
     try:
         details = await crud_ops.get_leaderboard_response_details(db, theme)
-        return details
+        if FAST_JSON_ENABLED:
+            return FastJSONResponse(details)
+        return [row._asdict() for row in details]
     except Exception as e:
         print(f"Error fetching leaderboard details: {e}")
         raise HTTPException(
             status_code=500, detail="Failed to fetch leaderboard details")
 
 
+@app.get('/leaderboard/live')
+async def live_leaderboard(
+    theme: str = "",
+    last_event_id: str | None = Header(None),
+):
+    """Server-Sent Events: a leaderboard snapshot, then score deltas as answers are stored."""
+    if not LIVE_LEADERBOARD_ENABLED:
+        # EventSource gives up on 204, and the page falls back to fetching /leaderboard
+        return Response(status_code=204)
+
+    async def snapshot():
+        # From the primary, so the board is not older than the deltas that follow it;
+        # the session is only held while the snapshot is read, not for the whole stream
+        async with AsyncSessionLocal() as db:
+            return await crud_ops.get_leaderboard(db, theme or None)
+
+    return StreamingResponse(
+        leaderboard_channel.stream(snapshot, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get('/metrics', include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(render_latest(), media_type=METRICS_CONTENT_TYPE)
+
+
+def server_options() -> dict:
+    """uvicorn options shared by the development server and the production launcher."""
+    if FORWARDED_ALLOW_IPS.strip() == "*":
+        print("WARNING: FORWARDED_ALLOW_IPS=* trusts X-Forwarded-Proto/-For from every peer, so any "
+              "client that reaches the port directly can spoof its address and scheme. Set it to "
+              "the proxy's addresses unless only the proxy can connect.")
+    return dict(
+        log_level="info",
+        # X-Forwarded-Proto/-For are applied by uvicorn's own ASGI layer before the app,
+        # only for connections from these proxy addresses
+        proxy_headers=True,
+        forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
     environment = os.getenv("RAILWAY_ENVIRONMENT_NAME", "development")
+    port = int(os.getenv("PORT", 8080))
+    options = server_options()
 
     if environment == "production":
-        # Production-specific config here
-        # e.g., enable some monitoring, logging, feature toggles
-        pass
-    else:
-        # Local or staging-specific config here
-        pass
+        # Preloaded master forking WEB_CONCURRENCY workers, drained on SIGTERM
+        import sys
 
-    port = int(os.getenv("PORT", 8080))
-    uvicorn.run(
-        app,
-        host="0.0.0.0",
-        port=port,
-        log_level="info",
-        proxy_headers=True,  # Trust X-Forwarded-* headers
-        forwarded_allow_ips="*"  # Allow all IPs (Railway proxy)
-    )
+        import launcher
+
+        sys.exit(launcher.serve(app, host="0.0.0.0", port=port, **options))
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port, **options)
@@ -0,0 +1,449 @@
+# Lightweight Prometheus metrics for SmartPlayAI: DB pool and query timings, LLM calls and HTTP latency.
+# Implements just enough of the text exposition format (counters, gauges, histograms) to be scraped
+# at /metrics without pulling in another dependency. Metrics are recorded per process; under the
+# production launcher every worker publishes its state to a shared directory every few seconds and
+# /metrics sums all workers, so a scrape answered by any one worker covers the whole server.
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, *values):
+        """Return the child for these label values, creating it on first use."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(
+                    f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _state(self, child):
+        raise NotImplementedError
+
+    def _merge(self, a, b):
+        raise NotImplementedError
+
+    def _samples(self, states: dict):
+        raise NotImplementedError
+
+    def state(self) -> dict:
+        """Plain values of every child, keyed by label values, as published to other workers."""
+        return {values: self._state(child) for values, child in list(self._children.items())}
+
+    def render(self, others=()) -> list[str]:
+        """Exposition lines for this process, summed with the states of ``others``."""
+        states = self.state()
+        for other in others:
+            for values, state in other.items():
+                states[values] = self._merge(states[values], state) if values in states else state
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._samples(states))
+        return lines
+
+
+class _Value:
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0
+        self.function = None
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+    def set_function(self, function):
+        """Compute the value lazily at scrape time."""
+        self.function = function
+
+    def get(self):
+        return self.function() if self.function is not None else self.value
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def _state(self, child):
+        return child.get()
+
+    def _merge(self, a, b):
+        return a + b
+
+    def _samples(self, states):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}"
+                for values, value in states.items()]
+
+
+class Gauge(Counter):
+    # Summed across workers too: every gauge here (pool connections, pool size) adds up
+    type = "gauge"
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _state(self, child):
+        return [list(child.counts), child.sum, child.count]
+
+    def _merge(self, a, b):
+        return [[x + y for x, y in zip(a[0], b[0])], a[1] + b[1], a[2] + b[2]]
+
+    def _samples(self, states):
+        lines = []
+        for values, (counts, total, count) in states.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, values,
+                                    f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {float(total)!r}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def state(self) -> dict:
+        return {metric.name: metric.state() for metric in self._metrics}
+
+    def render(self, others=()) -> str:
+        """Exposition text, summed with other workers' ``state()`` dicts."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render([other.get(metric.name, {}) for other in others]))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+######################################################
+# Application metrics
+######################################################
+
+HTTP_REQUEST_DURATION = Histogram(
+    "smartplay_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "smartplay_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection.",
+    ["engine"],
+)
+DB_POOL_IN_USE = Gauge(
+    "smartplay_db_pool_connections_in_use",
+    "Database connections currently checked out of the pool.",
+    ["engine"],
+)
+DB_POOL_SIZE = Gauge(
+    "smartplay_db_pool_size",
+    "Configured database pool size.",
+    ["engine"],
+)
+DB_QUERY_DURATION = Histogram(
+    "smartplay_db_query_duration_seconds",
+    "SQL statement latency by the crud function that issued it.",
+    ["function"],
+)
+LLM_REQUEST_DURATION = Histogram(
+    "smartplay_llm_request_duration_seconds",
+    "Latency of LLM evaluation calls.",
+    ["theme", "outcome"],
+)
+# Themes come from client input: anything outside the game's themes is labelled "other",
+# so a client cannot grow the number of series
+LLM_THEMES = ("survival", "work", "interview")
+
+
+def theme_label(theme: str | None) -> str:
+    if not theme:
+        return "none"
+    return theme if theme in LLM_THEMES else "other"
+
+
+LLM_TOKENS = Counter(
+    "smartplay_llm_tokens_total",
+    "Tokens processed by the LLM backend.",
+    ["kind"],
+)
+EVALUATION_CACHE = Counter(
+    "smartplay_evaluation_cache_total",
+    "Answer evaluations by source: exact cache hit, similar answer reuse or LLM call.",
+    ["source"],
+)
+RESPONSE_CACHE = Counter(
+    "smartplay_response_cache_total",
+    "Cacheable GETs by outcome: served from cache, answered 304, or computed.",
+    ["route", "result"],
+)
+COMPRESSION_BYTES = Counter(
+    "smartplay_compression_bytes_total",
+    "Response body bytes before (in) and after (out) on-the-fly compression.",
+    ["encoding", "direction"],
+)
+
+
+######################################################
+# Sharing across worker processes
+######################################################
+
+PUBLISH_INTERVAL = 5  # seconds; other workers' series in a scrape are at most this old
+
+# Directory the launcher creates before forking; None in a single process
+shared_dir: str | None = None
+
+
+def _state_path(pid: int) -> str:
+    return os.path.join(shared_dir, f"{pid}.json")
+
+
+def publish(registry: Registry = None) -> None:
+    """Write this worker's state where the other workers' /metrics can read it."""
+    state = (registry or REGISTRY).state()
+    path = _state_path(os.getpid())
+    with open(path + ".tmp", "w") as f:
+        json.dump({name: [[list(values), value] for values, value in states.items()]
+                   for name, states in state.items()}, f)
+    os.replace(path + ".tmp", path)  # readers never see a half-written file
+
+
+def _publish_forever() -> None:
+    while True:
+        time.sleep(PUBLISH_INTERVAL)
+        try:
+            publish()
+        except OSError as e:
+            print(f"Could not publish metrics: {e}")
+
+
+def start_publishing(directory: str) -> None:
+    """Share this process's metrics through ``directory``; called in each forked worker."""
+    global shared_dir
+    shared_dir = directory
+    publish()
+    threading.Thread(target=_publish_forever, name="metrics-publisher", daemon=True).start()
+
+
+def forget_worker(pid: int) -> None:
+    """Drop an exited worker's state, as a restart would; counters read it as a reset."""
+    try:
+        os.remove(_state_path(pid))
+    except FileNotFoundError:
+        pass
+
+
+def _other_workers() -> list[dict]:
+    others = []
+    own = f"{os.getpid()}.json"
+    for name in os.listdir(shared_dir):
+        if not name.endswith(".json") or name == own:
+            continue
+        try:
+            with open(os.path.join(shared_dir, name)) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            continue  # the worker exited in between
+        others.append({metric: {tuple(values): value for values, value in states}
+                       for metric, states in state.items()})
+    return others
+
+
+def render_latest() -> str:
+    return REGISTRY.render(_other_workers() if shared_dir else ())
+
+######################################################
+# Database instrumentation
+######################################################
+
+
+# Stack of crud function names for the current task, innermost last
+crud_call_stack: ContextVar[tuple[str, ...]] = ContextVar("crud_call_stack", default=())
+
+
+def traced(fn):
+    """Record the decorated crud function as the source of the queries it runs."""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        token = crud_call_stack.set(crud_call_stack.get() + (fn.__name__,))
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            crud_call_stack.reset(token)
+    return wrapper
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that times how long each checkout waits for a connection."""
+
+    engine_label = "primary"
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(self.engine_label).observe(
+                perf_counter() - start)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool, keep reporting under the same label
+        pool = super().recreate()
+        pool.engine_label = self.engine_label
+        return pool
+
+
+def instrument_engine(async_engine, label: str = "primary") -> None:
+    """Attach query timing events and pool gauges to an AsyncEngine."""
+    sync_engine = async_engine.sync_engine
+    if isinstance(sync_engine.pool, InstrumentedQueuePool):
+        sync_engine.pool.engine_label = label
+    if hasattr(sync_engine.pool, "checkedout"):
+        # read through the engine, dispose() replaces the pool object
+        DB_POOL_IN_USE.labels(label).set_function(lambda: sync_engine.pool.checkedout())
+        DB_POOL_SIZE.labels(label).set_function(lambda: sync_engine.pool.size())
+
+    # The start time lives on the statement's execution context, not on the connection, so a
+    # statement that raises (no after_cursor_execute) leaves nothing behind for the next one
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        context.query_start = perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = perf_counter() - context.query_start
+        stack = crud_call_stack.get()
+        DB_QUERY_DURATION.labels(stack[-1] if stack else "other").observe(elapsed)
+
+######################################################
+# HTTP instrumentation
+######################################################
+
+
+def route_label(scope) -> str:
+    """Route template for the request, so /players/id/1 and /players/id/2 share a series."""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Mounted apps such as /static only set root_path
+    return scope.get("root_path") or "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request latency by route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"], route_label(scope), f"{status // 100}xx"
+            ).observe(perf_counter() - start)
@@ -1,10 +1,22 @@
-from sqlalchemy import func, update, or_
+import hashlib
+import random
+import re
+import time
+from datetime import datetime
+from sqlalchemy import func, update, or_, and_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import delete
 from . import models, schemas
-from typing import List
+from typing import List, Optional
 from passlib.context import CryptContext
+from metrics import traced
+import scheduler
+from near_duplicates import NearDuplicateIndex, question_index
+from answer_similarity import MAX_ANSWERS_PER_QUESTION, SIMILARITY_THRESHOLD, answer_cache
+from response_cache import data_version
+from live_leaderboard import leaderboard_channel
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 #######################################################
@@ -12,6 +24,7 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 #######################################################
 
 
+@traced
 async def get_player(db: AsyncSession, player_id: int):
     """
     Retrieve a Player instance by primary key.
@@ -27,6 +40,7 @@ async def get_player(db: AsyncSession, player_id: int):
     return result
 
 
+@traced
 async def get_player_by_name(db: AsyncSession, name: str) -> models.Player | None:
     result = await db.execute(
         select(models.Player).where(models.Player.name == name)
@@ -34,6 +48,7 @@ async def get_player_by_name(db: AsyncSession, name: str) -> models.Player | Non
     return result.scalar_one_or_none()
 
 
+@traced
 async def create_player(db: AsyncSession, player: schemas.PlayerCreate, plain_password: str):
     """
     Create a new Player instance.
@@ -51,6 +66,7 @@ async def create_player(db: AsyncSession, player: schemas.PlayerCreate, plain_pa
     )
     db.add(user)
     await db.commit()
+    data_version.bump()
     await db.refresh(user)
     return user
 
@@ -58,7 +74,19 @@ async def create_player(db: AsyncSession, player: schemas.PlayerCreate, plain_pa
 # Questions CRUD
 ######################################################
 
+_NON_WORD = re.compile(r"[^\w\s]+")
 
+
+def question_text_hash(question_text: str) -> str:
+    """
+    Hash of the question text with case, punctuation and spacing normalized away,
+    so trivially reworded copies of the same question collide.
+    """
+    normalized = " ".join(_NON_WORD.sub(" ", question_text.casefold()).split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@traced
 async def get_question(db: AsyncSession, question_id: int):
     """
     Retrieve a Question instance by primary key.
@@ -74,43 +102,123 @@ async def get_question(db: AsyncSession, question_id: int):
     return result
 
 
+@traced
 async def get_question_by_id(db: AsyncSession, question_id: int):
     return await db.get(models.Question, question_id)
 
 
+def _question_filters(theme: str, player_id: int | None,
+                      severity: Optional[List[str]], subcategory: Optional[List[str]]) -> list:
+    """WHERE clauses shared by the random and scheduled question pickers."""
+    filters = [models.Question.theme == theme]
+    if severity:
+        filters.append(models.Question.severity.in_(severity))
+    if subcategory:
+        filters.append(models.Question.subcategory.in_(subcategory))
+    if player_id is not None:
+        # NOT EXISTS subquery to exclude questions already answered by the player ~ symbol is NOT
+        filters.append(
+            ~select(1)
+            .where(
+                models.Response.player_id == player_id,
+                models.Response.question_id == models.Question.id,
+            )
+            .select_from(models.Response)
+            .exists()
+        )
+    return filters
+
+
+async def _load_questions_in_random_order(db: AsyncSession, question_ids) -> list:
+    result = await db.execute(
+        select(models.Question).where(models.Question.id.in_(question_ids)))
+    questions = list(result.scalars().all())
+    random.shuffle(questions)
+    return questions
+
+
+@traced
 async def get_random_questions_by_theme(db: AsyncSession, theme: str, limit:
-                                        int = 5, player_id: int = 0):
+                                        int = 5, player_id: int = 0,
+                                        severity: Optional[List[str]] = None,
+                                        subcategory: Optional[List[str]] = None):
     """
     Retrieve a list of random Question instances filtered by theme.
     player will only see those question once after they submit an answer.
     they will have the option to ignore that and go to next
 
+    The random sample is drawn from question ids alone, which the
+    (theme, severity, subcategory, id) index covers, and only the sampled
+    rows are then loaded.
+
     Args:
         db (AsyncSession): Async SQLAlchemy database session.
         theme (str): Theme to filter questions by.
         limit (int): Maximum number of questions to retrieve.
+        player_id (int): Player whose answered questions are excluded.
+        severity (list[str], optional): Only questions with one of these severities.
+        subcategory (list[str], optional): Only questions in one of these subcategories.
     """
-    stmt = (
-        select(models.Question)
-        .where(
-            models.Question.theme == theme,
-            # NOT EXISTS subquery to exclude questions already answered by the player ~ symbol is NOT
-            ~select(1)
-            .where(
-                models.Response.player_id == player_id,
-                models.Response.question_id == models.Question.id,
-            )
-            .select_from(models.Response)
-            .exists()
-            if player_id is not None else True  # no filter if no player_id
-        )
+    sampled_ids = (
+        select(models.Question.id)
+        .where(*_question_filters(theme, player_id, severity, subcategory))
         .order_by(func.random())
         .limit(limit)
+        .scalar_subquery()
     )
-    result = await db.execute(stmt)
-    return result.scalars().all()
+    return await _load_questions_in_random_order(db, sampled_ids)
+
+
+SCHEDULER_CANDIDATES = 50  # unanswered questions the scheduler chooses from
+
+
+@traced
+async def get_scheduled_questions(db: AsyncSession, theme: str, limit: int = 5,
+                                  player_id: int = 0,
+                                  severity: Optional[List[str]] = None,
+                                  subcategory: Optional[List[str]] = None):
+    """
+    Pick the player's next questions, favouring severities they score poorly on.
+
+    Reads the compact per-theme mastery state from PlayerThemeStats, samples a
+    pool of unanswered candidate ids (index-only) and lets the scheduler choose
+    among them, so no response history is read. Players without stats get a
+    uniform pick.
+
+    Args:
+        db (AsyncSession): Async SQLAlchemy database session.
+        theme (str): Theme to filter questions by.
+        limit (int): Number of questions to return.
+        player_id (int): Player to schedule for; answered questions are excluded.
+        severity (list[str], optional): Only questions with one of these severities.
+        subcategory (list[str], optional): Only questions in one of these subcategories.
 
+    Returns:
+        list[Question]: Up to ``limit`` questions in random order.
+    """
+    mastery = (await db.execute(
+        select(models.PlayerThemeStats.mastery).where(
+            models.PlayerThemeStats.player_id == player_id,
+            models.PlayerThemeStats.theme == theme,
+        )
+    )).scalar_one_or_none()
+
+    candidates = (await db.execute(
+        select(models.Question.id, models.Question.severity)
+        .where(*_question_filters(theme, player_id, severity, subcategory))
+        .order_by(func.random())
+        .limit(max(limit, SCHEDULER_CANDIDATES))
+    )).all()
+    if len(candidates) <= limit:
+        picked = [question_id for question_id, _ in candidates]
+    else:
+        picked = scheduler.pick_questions(candidates, mastery, limit, time.time())
+    if not picked:
+        return []
+    return await _load_questions_in_random_order(db, picked)
 
+
+@traced
 async def store_question(db: AsyncSession, question: schemas.QuestionCreate):
     """
     Store a new Question instance in the database.
@@ -120,16 +228,89 @@ async def store_question(db: AsyncSession, question: schemas.QuestionCreate):
         question (QuestionCreate): Pydantic model containing question creation data.
 
     Returns:
-        Question: The newly created Question object.
+        Question: The newly created Question object, or the existing one if the same
+        text or a near-duplicate of it is already stored.
     """
+    text_hash = question_text_hash(question.question_text)
+    existing = await db.execute(
+        select(models.Question).where(models.Question.text_hash == text_hash)
+    )
+    db_question = existing.scalar_one_or_none()
+    if db_question:
+        return db_question
+    db_question = await find_near_duplicate(db, question.question_text, question.theme)
+    if db_question:
+        return db_question
+
     db_question = models.Question(
-        theme=question.theme, question_text=question.question_text)
+        theme=question.theme, question_text=question.question_text,
+        severity=question.severity, subcategory=question.subcategory,
+        text_hash=text_hash)
     db.add(db_question)
     await db.commit()
+    data_version.bump()
     await db.refresh(db_question)
+    question_index.add(text_hash, question.question_text, theme=question.theme)
     return db_question
 
 
+@traced
+async def refresh_near_duplicate_index(db: AsyncSession) -> NearDuplicateIndex:
+    """
+    Add questions inserted since the last refresh (by any process) to this
+    process's near-duplicate index.
+
+    Args:
+        db (AsyncSession): Async SQLAlchemy database session.
+
+    Returns:
+        NearDuplicateIndex: The process-wide index, now up to date.
+    """
+    result = await db.execute(
+        select(models.Question.id, models.Question.text_hash, models.Question.question_text,
+               models.Question.theme)
+        .where(models.Question.id > question_index.last_id)
+        .order_by(models.Question.id)
+    )
+    for question_id, text_hash, question_text, theme in result:
+        if text_hash is not None:
+            question_index.add(text_hash, question_text, theme=theme)
+        question_index.last_id = question_id
+    return question_index
+
+
+@traced
+async def find_near_duplicate(db: AsyncSession, question_text: str, theme: str):
+    """
+    Find a stored question in ``theme`` that is a near-duplicate of ``question_text``.
+
+    Only the same theme counts: a similar scenario asked in another theme is a
+    different question. (Exact copies are still unique across themes, through
+    the text_hash index.)
+
+    Args:
+        db (AsyncSession): Async SQLAlchemy database session.
+        question_text (str): Candidate question text.
+        theme (str): Theme the candidate would be stored under.
+
+    Returns:
+        Question | None: The most similar stored question above the
+        NEAR_DUPLICATE_THRESHOLD, or None.
+    """
+    index = await refresh_near_duplicate_index(db)
+    match = index.query(question_text, theme=theme)
+    if match is None:
+        return None
+    result = await db.execute(
+        select(models.Question).where(models.Question.text_hash == match[0]))
+    db_question = result.scalar_one_or_none()
+    if db_question is None:
+        # deleted since it was indexed
+        index.discard(match[0])
+    return db_question
+
+
+@traced
 async def load_questions_from_json(
     db: AsyncSession, questions: List[schemas.QuestionCreate]
 ) -> List[models.Question]:
@@ -144,15 +325,55 @@ async def load_questions_from_json(
         list[Question]: The newly created Question objects.
     """
     db_questions = [
-        models.Question(theme=q.theme, question_text=q.question_text)
+        models.Question(theme=q.theme, question_text=q.question_text,
+                        severity=q.severity, subcategory=q.subcategory,
+                        text_hash=question_text_hash(q.question_text))
         for q in questions
     ]
 
     db.add_all(db_questions)
     await db.commit()
+    data_version.bump()
     return db_questions
 
 
+@traced
+async def bulk_insert_questions(db: AsyncSession, rows: List[dict]) -> int:
+    """
+    Insert a batch of question rows, skipping any whose text hash already exists.
+
+    Uses ``INSERT ... ON CONFLICT (text_hash) DO NOTHING`` executed once for the
+    whole list, so re-running an import is idempotent. The caller commits.
+
+    Args:
+        db (AsyncSession): Async SQLAlchemy database session.
+        rows (list[dict]): Column values including ``text_hash``; all rows share the same keys.
+
+    Returns:
+        int: The number of rows actually inserted.
+    """
+    if not rows:
+        return 0
+    conn = await db.connection()
+    if conn.dialect.name == "postgresql":
+        # asyncpg reports no rowcount for executemany; insertmanyvalues batches the
+        # rows into multi-VALUES statements and RETURNING only yields the new ones
+        stmt = (
+            postgresql.insert(models.Question)
+            .on_conflict_do_nothing(index_elements=[models.Question.text_hash])
+            .returning(models.Question.id)
+        )
+        result = await conn.execute(stmt, rows)
+        return len(result.all())
+
+    # sqlite3 executemany sums the changes of every row into rowcount
+    stmt = sqlite.insert(models.Question).on_conflict_do_nothing(
+        index_elements=[models.Question.text_hash])
+    result = await conn.execute(stmt, rows)
+    return result.rowcount
+
+
+@traced
 async def delete_all_questions(db: AsyncSession) -> int:
     """
     Delete all Question instances from the database.
@@ -168,6 +389,8 @@ async def delete_all_questions(db: AsyncSession) -> int:
     result = await db.execute(delete(models.Question))
     deleted_count = result.rowcount
     await db.commit()
+    question_index.clear()
+    data_version.bump()
 
     return deleted_count
 
@@ -176,6 +399,7 @@ async def delete_all_questions(db: AsyncSession) -> int:
 ######################################################
 
 
+@traced
 async def store_response(db: AsyncSession, response: schemas.ResponseCreate):
     """
     Store a new Response instance in the database.
@@ -193,6 +417,7 @@ async def store_response(db: AsyncSession, response: schemas.ResponseCreate):
     )
     existing = await db.execute(existing_stmt)
     db_response = existing.scalar_one_or_none()
+    previous_score = db_response.score if db_response else None
 
     if db_response:
         db_response.response_text = response.response_text
@@ -202,6 +427,7 @@ async def store_response(db: AsyncSession, response: schemas.ResponseCreate):
             db_response.llm_feedback = response.llm_feedback
         if response.liked is not None:
             db_response.liked = response.liked
+        new_score = response.score  # None keeps the stored score, so the aggregates stay as they are
     else:
         db_response = models.Response(
             player_id=response.player_id,
@@ -212,28 +438,253 @@ async def store_response(db: AsyncSession, response: schemas.ResponseCreate):
             liked=response.liked,
         )
         db.add(db_response)
+        await db.flush()  # applies the score column's default of 0 to an unscored answer
+        new_score = db_response.score
+    stats = await _update_player_theme_stats(
+        db, response, previous_score, new_score)
+    theme_totals = (stats.theme, stats.score_sum, stats.answered_count) if stats else None
     await db.commit()
+    data_version.bump()
     await db.refresh(db_response)
+    if leaderboard_channel.subscribers:
+        await _publish_leaderboard_delta(db, response.player_id, theme_totals)
     return db_response
 
 
+async def _publish_leaderboard_delta(db: AsyncSession, player_id: int, theme_totals) -> None:
+    """Send the player's new totals to live leaderboard subscribers, one indexed lookup."""
+    row = (await db.execute(
+        select(
+            models.Player.name,
+            func.coalesce(func.sum(models.Response.score), 0).label('score'),
+            func.count(models.Response.player_id).label('games_played'),
+            func.coalesce(func.avg(models.Response.score), 0).label('average_score'),
+        )
+        .select_from(models.Player)
+        .outerjoin(models.Response, models.Player.id == models.Response.player_id)
+        .where(models.Player.id == player_id)
+        .group_by(models.Player.id, models.Player.name)
+    )).one_or_none()
+    if row is None:
+        return
+    delta = {
+        'id': player_id,
+        'name': row.name,
+        'score': int(row.score),
+        'games_played': int(row.games_played),
+        'average_score': float(row.average_score),
+    }
+    if theme_totals:
+        delta['theme'], delta['theme_score'], delta['theme_games'] = theme_totals
+    leaderboard_channel.publish(delta)
+
+
+GOOD_SCORE = 3  # scores at or above this count towards a streak
+
+
+async def _update_player_theme_stats(
+    db: AsyncSession,
+    response: schemas.ResponseCreate,
+    previous_score: int | None,
+    new_score: int | None,
+) -> models.PlayerThemeStats | None:
+    """
+    Fold one answer into the player's per-theme aggregates, in the caller's transaction.
+
+    A re-answered question replaces its old score in the sum and histogram
+    instead of being counted twice. The counters follow the score stored on the
+    row, as the migration backfill does: an answer stored without a score holds
+    the column default of 0, and a re-answer without one (new_score None) keeps
+    the stored score, so nothing changes.
+    Returns the player's stats row for the theme, or None when the question does
+    not exist (or nothing has been counted in that theme yet).
+    """
+    question = (await db.execute(
+        select(models.Question.theme, models.Question.severity).where(
+            models.Question.id == response.question_id)
+    )).one_or_none()
+    if question is None:
+        return None
+    theme, severity = question
+
+    stats = (await db.execute(
+        select(models.PlayerThemeStats)
+        .where(
+            models.PlayerThemeStats.player_id == response.player_id,
+            models.PlayerThemeStats.theme == theme,
+        )
+        .with_for_update()
+    )).scalar_one_or_none()
+    if new_score is None:
+        return stats
+    if stats is None:
+        stats = models.PlayerThemeStats.empty(response.player_id, theme)
+        db.add(stats)
+
+    if previous_score is None:
+        stats.answered_count += 1
+    else:
+        stats.score_sum -= previous_score
+        stats.score_sq_sum -= previous_score * previous_score
+        bucket = f"score_{max(0, min(5, previous_score))}"
+        setattr(stats, bucket, getattr(stats, bucket) - 1)
+
+    stats.score_sum += new_score
+    stats.score_sq_sum += new_score * new_score
+    bucket = f"score_{max(0, min(5, new_score))}"
+    setattr(stats, bucket, getattr(stats, bucket) + 1)
+
+    stats.current_streak = stats.current_streak + 1 if new_score >= GOOD_SCORE else 0
+    stats.best_streak = max(stats.best_streak, stats.current_streak)
+    stats.last_answered_at = response.created_at
+    stats.mastery = scheduler.record_answer(
+        stats.mastery, severity, new_score, time.time())
+    return stats
+
+
+# The columns ResponseOut exposes, selected as plain rows so the JSON routes can
+# serialize them directly instead of loading ORM objects
+RESPONSE_OUT_COLUMNS = (
+    models.Response.player_id,
+    models.Response.question_id,
+    models.Response.response_text,
+    models.Response.score,
+    models.Response.llm_feedback,
+    models.Response.liked,
+    models.Response.created_at,
+)
+
+
+@traced
 async def get_responses_by_player(db: AsyncSession, player_id: int):
     """
-    Retrieve all Response instances associated with a specific player.
+    Retrieve all responses associated with a specific player.
+
+    Args:
+        db (AsyncSession): Async SQLAlchemy database session.
+        player_id (int): Unique identifier of the Player.
+
+    Returns:
+        list[Row]: One row of RESPONSE_OUT_COLUMNS per response of the player.
+    """
+    result = await db.execute(
+        select(*RESPONSE_OUT_COLUMNS).where(models.Response.player_id == player_id)
+    )
+    return result.all()
+
+
+@traced
+async def get_player_theme_summary(db: AsyncSession, player_id: int) -> list[dict]:
+    """
+    Summarize a player's answers per theme from the precomputed aggregates.
+
+    Args:
+        db (AsyncSession): Async SQLAlchemy database session.
+        player_id (int): Unique identifier of the Player.
+
+    Returns:
+        list[dict]: One entry per theme with answered count, total, average, standard
+        deviation, best and worst score, streaks and the 0-5 score histogram.
+    """
+    result = await db.execute(
+        select(models.PlayerThemeStats)
+        .where(models.PlayerThemeStats.player_id == player_id,
+               models.PlayerThemeStats.answered_count > 0)
+        .order_by(models.PlayerThemeStats.theme)
+    )
+    summary = []
+    for stats in result.scalars().all():
+        count = stats.answered_count
+        mean = stats.score_sum / count
+        variance = max(0.0, stats.score_sq_sum / count - mean * mean)
+        histogram = [getattr(stats, f"score_{i}") for i in range(6)]
+        scored = [i for i, n in enumerate(histogram) if n > 0]
+        summary.append({
+            "theme": stats.theme,
+            "answered": count,
+            "total_score": stats.score_sum,
+            "average_score": mean,
+            "stddev_score": variance ** 0.5,
+            "best_score": scored[-1] if scored else None,
+            "worst_score": scored[0] if scored else None,
+            "current_streak": stats.current_streak,
+            "best_streak": stats.best_streak,
+            "histogram": histogram,
+            "last_answered_at": stats.last_answered_at,
+        })
+    return summary
+
+
+@traced
+async def get_player_history_page(
+    db: AsyncSession,
+    player_id: int,
+    theme: str | None = None,
+    cursor: tuple[datetime, int] | None = None,
+    limit: int = 10,
+):
+    """
+    Fetch one keyset page of a player's answers, newest first.
+
+    Only the columns the history list renders are selected; the LLM feedback
+    text is replaced by a ``has_feedback`` flag and loaded on demand.
 
     Args:
         db (AsyncSession): Async SQLAlchemy database session.
         player_id (int): Unique identifier of the Player.
+        theme (str, optional): Theme to filter by.
+        cursor (tuple[datetime, int], optional): (created_at, question_id) of the last row already shown.
+        limit (int): Maximum number of rows to return.
 
     Returns:
-        list[Response]: A list of Response objects associated with the player.
+        tuple[list[Row], tuple[datetime, int] | None]: The rows and the cursor for the next page, if any.
     """
+    stmt = (
+        select(
+            models.Response.question_id,
+            models.Question.theme,
+            models.Question.question_text,
+            models.Response.response_text,
+            models.Response.score,
+            models.Response.created_at,
+            models.Response.llm_feedback.is_not(None).label("has_feedback"),
+        )
+        .join(models.Question, models.Response.question_id == models.Question.id)
+        .where(models.Response.player_id == player_id)
+        .order_by(models.Response.created_at.desc(), models.Response.question_id.desc())
+        .limit(limit + 1)
+    )
+    if theme:
+        stmt = stmt.where(models.Question.theme == theme)
+    if cursor:
+        created_at, question_id = cursor
+        stmt = stmt.where(or_(
+            models.Response.created_at < created_at,
+            and_(models.Response.created_at == created_at,
+                 models.Response.question_id < question_id),
+        ))
+
+    result = await db.execute(stmt)
+    rows = result.all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, (rows[-1].created_at, rows[-1].question_id)
+
+
+@traced
+async def get_response_feedback(db: AsyncSession, player_id: int, question_id: int) -> str | None:
+    """Load the LLM feedback text of a single response."""
     result = await db.execute(
-        select(models.Response).where(models.Response.player_id == player_id)
+        select(models.Response.llm_feedback).where(
+            models.Response.player_id == player_id,
+            models.Response.question_id == question_id,
+        )
     )
-    return result.scalars().all()
+    return result.scalar_one_or_none()
 
 
+@traced
 async def reset_player_scores(db: AsyncSession, player_id: int):
     """Reset a player's score to 0."""
     if not player_id:
@@ -248,31 +699,79 @@ async def reset_player_scores(db: AsyncSession, player_id: int):
     if player:
         player.score = 0  # column[int] = int is allowed
         await db.commit()
+        data_version.bump()
         await db.refresh(player)
 
     return player
 
 
+@traced
 async def reset_user_responses(db: AsyncSession, player_id: int) -> int:
-    """Delete all responses for a specific player."""
+    """
+    Delete all responses for a specific player and reset their score to 0.
+
+    Both statements run in the same transaction, so a player is never left
+    with a score that no longer matches their responses.
+
+    Args:
+        db (AsyncSession): Async SQLAlchemy database session.
+        player_id (int): Unique identifier of the Player.
+
+    Returns:
+        int: The number of responses deleted.
+    """
     if not player_id:
         return 0
-    else:
-        player_id = int(player_id)
+    deleted = await reset_cohort_responses(db, [int(player_id)])
+    return deleted.get(int(player_id), 0)
+
+
+@traced
+async def reset_cohort_responses(db: AsyncSession, player_ids: List[int]) -> dict[int, int]:
+    """
+    Delete all responses for a group of players and reset their scores to 0.
+
+    Uses a single set-based ``DELETE ... RETURNING`` instead of loading every
+    Response into the session, then zeroes the scores in the same transaction.
+
+    Args:
+        db (AsyncSession): Async SQLAlchemy database session.
+        player_ids (list[int]): Unique identifiers of the Players to reset.
+
+    Returns:
+        dict[int, int]: Number of responses deleted per player id.
+    """
+    player_ids = sorted({int(pid) for pid in player_ids if pid})
+    if not player_ids:
+        return {}
+
     result = await db.execute(
-        select(models.Response).where(models.Response.player_id == player_id)
+        delete(models.Response)
+        .where(models.Response.player_id.in_(player_ids))
+        .returning(models.Response.player_id)
     )
-    responses = result.scalars().all()
+    deleted = {pid: 0 for pid in player_ids}
+    for (pid,) in result.all():
+        deleted[pid] += 1
 
-    for response in responses:
-        await db.delete(response)
+    await db.execute(
+        delete(models.PlayerThemeStats)
+        .where(models.PlayerThemeStats.player_id.in_(player_ids))
+    )
 
-    deleted_count = len(responses)
+    await db.execute(
+        update(models.Player)
+        .where(models.Player.id.in_(player_ids))
+        .values(score=0)
+    )
     await db.commit()
+    data_version.bump()
+    leaderboard_channel.reset()
 
-    return deleted_count
+    return deleted
 
 
+@traced
 async def get_leaderboard(db: AsyncSession, theme: str | None = None, limit: int = 10):
     """
     Get leaderboard data, optionally filtered by theme.
@@ -285,6 +784,10 @@ async def get_leaderboard(db: AsyncSession, theme: str | None = None, limit: int
     Returns:
         list: List of player leaderboard data.
     """
+    # Theme-filtered boards read the per-player aggregates instead of scanning responses
+    if theme:
+        return await _get_theme_leaderboard(db, theme, limit)
+
     # Base query joining players with their responses
     query = (
         select(
@@ -299,14 +802,6 @@ async def get_leaderboard(db: AsyncSession, theme: str | None = None, limit: int
         .outerjoin(models.Response, models.Player.id == models.Response.player_id)
     )
 
-    # If theme is specified, join with questions to filter by theme
-    if theme:
-        query = (
-            query
-            .outerjoin(models.Question, models.Response.question_id == models.Question.id)
-            .where(models.Question.theme == theme)
-        )
-
     # Group by player and order by score descending
     query = (
         query
@@ -332,6 +827,29 @@ async def get_leaderboard(db: AsyncSession, theme: str | None = None, limit: int
     return leaderboard
 
 
+async def _get_theme_leaderboard(db: AsyncSession, theme: str, limit: int):
+    stats = models.PlayerThemeStats
+    result = await db.execute(
+        select(models.Player.id, models.Player.name, stats.score_sum,
+               stats.answered_count)
+        .join(stats, stats.player_id == models.Player.id)
+        .where(stats.theme == theme, stats.answered_count > 0)
+        .order_by(stats.score_sum.desc())
+        .limit(limit)
+    )
+    return [
+        {
+            'id': row.id,
+            'name': row.name,
+            'score': int(row.score_sum),
+            'games_played': int(row.answered_count),
+            'average_score': row.score_sum / row.answered_count,
+        }
+        for row in result.all()
+    ]
+
+
+@traced
 async def get_cached_evaluation(db: AsyncSession, question_id: int, question_text: str, response_text: str):
     """
     Retrieve an existing evaluation matching the same question and response text.
@@ -352,6 +870,56 @@ async def get_cached_evaluation(db: AsyncSession, question_id: int, question_tex
     return result.scalars().first()
 
 
+@traced
+async def find_similar_evaluation(db: AsyncSession, question_id: int, response_text: str):
+    """
+    Find an evaluated answer to the same question that paraphrases ``response_text``.
+
+    The question's answer index is built from the database on first use and
+    rebuilt after ANSWER_SIMILARITY_TTL seconds.
+
+    Args:
+        db (AsyncSession): Async SQLAlchemy database session.
+        question_id (int): Question being answered.
+        response_text (str): The new answer.
+
+    Returns:
+        tuple[Response, float] | None: The stored response whose evaluation can be
+        reused and its cosine similarity, or None below ANSWER_SIMILARITY_THRESHOLD.
+    """
+    index = answer_cache.get(question_id)
+    if index is None:
+        result = await db.execute(
+            select(models.Response.player_id, models.Response.response_text)
+            .where(
+                models.Response.question_id == question_id,
+                models.Response.score.is_not(None),
+                models.Response.llm_feedback.is_not(None),
+                models.Response.llm_feedback != "",
+            )
+            .order_by(models.Response.created_at.desc())
+            .limit(MAX_ANSWERS_PER_QUESTION)
+        )
+        index = answer_cache.build(question_id, [tuple(row) for row in result.all()])
+
+    match = index.best_match(response_text)
+    if match is None:
+        return None
+    player_id, similarity = match
+    db_response = await db.get(models.Response, (player_id, question_id))
+    if db_response is None or not db_response.llm_feedback or db_response.score is None:
+        index.discard(player_id)
+        return None
+    if db_response.response_text != index.texts.get(player_id):
+        # re-answered in another worker since the index was built
+        index.add(player_id, db_response.response_text)
+        similarity = index.similarity(response_text, db_response.response_text)
+        if similarity < SIMILARITY_THRESHOLD:
+            return None
+    return db_response, similarity
+
+
+@traced
 async def update_response_like_status(db: AsyncSession, player_id: int, question_id: int, liked: bool):
     """
     Update the like/dislike status for a response.
@@ -368,24 +936,30 @@ async def update_response_like_status(db: AsyncSession, player_id: int, question
 
     db_response.liked = liked
     await db.commit()
+    data_version.bump()
     await db.refresh(db_response)
     return db_response
 
 
+@traced
 async def list_response_feedback(db: AsyncSession, liked: bool | None = None):
     """
-    List responses with optional filtering by liked status.
+    List responses, as rows of RESPONSE_OUT_COLUMNS, with optional filtering by liked status.
     """
-    stmt = select(models.Response)
+    stmt = select(*RESPONSE_OUT_COLUMNS)
     if liked is not None:
         stmt = stmt.where(models.Response.liked == liked)
     result = await db.execute(stmt)
-    return result.scalars().all()
+    return result.all()
 
 
+@traced
 async def get_leaderboard_response_details(db: AsyncSession, theme: str | None = None):
     """
     Fetch question, response, and score details for leaderboard view.
+
+    Returns the rows as they come from the database; the route turns them into
+    dicts, or serializes them directly on the fast JSON path.
     """
     stmt = (
         select(
@@ -408,19 +982,4 @@ async def get_leaderboard_response_details(db: AsyncSession, theme: str | None =
         stmt = stmt.where(models.Question.theme == theme)
 
     result = await db.execute(stmt)
-    rows = result.fetchall()
-
-    return [
-        {
-            "player_id": row.player_id,
-            "player_name": row.player_name,
-            "theme": row.theme,
-            "question_text": row.question_text,
-            "response_text": row.response_text,
-            "score": row.score,
-            "llm_feedback": row.llm_feedback,
-            "liked": row.liked,
-            "created_at": row.created_at,
-        }
-        for row in rows
-    ]
+    return result.all()
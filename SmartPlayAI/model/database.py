@@ -1,9 +1,15 @@
 # async DB engine and session setup for FastAPI with SQLAlchemy
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from collections.abc import AsyncGenerator  # to type hint the async generator
+from fastapi import Request, Response
 from model.models import Base
+from model.settings import EngineSettings
+from metrics import InstrumentedQueuePool, instrument_engine
+from query_audit import QUERY_AUDIT_ENABLED, install_query_audit
 
 import os
+import time
 from dotenv import load_dotenv
 from urllib.parse import quote_plus
 
@@ -22,12 +28,27 @@ DB_PORT = os.getenv("DB_PORT", "5432")
 # Construct the full database URL for the asyncpg driver
 DATABASE_URL = os.getenv("DATABASE_PUBLIC_URL")
 # DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-# Create the async engine with pool pre-ping to handle stale connections
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,          # Set to False in production to reduce log verbosity
-    future=True,        # Enable 2.0 style SQLAlchemy usage
-    pool_pre_ping=True  # Checks connections are alive before using them
+
+# Pool size, recycle, pre-ping, statement timeout and echo come from DB_* env vars (see model/settings.py)
+engine_settings = EngineSettings.from_env()
+
+
+def _create_engine(url: str, label: str):
+    kwargs = engine_settings.engine_kwargs(url)
+    if "pool_size" in kwargs:
+        kwargs["poolclass"] = InstrumentedQueuePool  # times checkout waits for /metrics
+    async_engine = create_async_engine(url, **kwargs)
+    instrument_engine(async_engine, label)
+    if QUERY_AUDIT_ENABLED:
+        install_query_audit(async_engine)
+    return async_engine
+
+
+engine = _create_engine(DATABASE_URL, "primary")
+# Read-mostly routes use the replica when DATABASE_REPLICA_URL is set, otherwise the primary engine
+replica_engine = (
+    _create_engine(engine_settings.replica_url, "replica")
+    if engine_settings.replica_url else engine
 )
 # Configure async sessionmaker: expire_on_commit=False keeps objects alive after commit
 AsyncSessionLocal = async_sessionmaker(
@@ -35,6 +56,13 @@ AsyncSessionLocal = async_sessionmaker(
     class_=AsyncSession,
     expire_on_commit=False
 )
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=replica_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+) if replica_engine is not engine else AsyncSessionLocal
+# Cookie holding the time of the client's last write, so it reads its own writes from the primary
+FRESHNESS_COOKIE = "last_write_at"
 # Base class for declarative models, expose `__tablename__`
 Base = Base
 # Dependency to get async session (used with FastAPI depends, it use the only 1 engine instance per app for many requests)
@@ -47,3 +75,57 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """
     async with AsyncSessionLocal() as session:
         yield session
+
+
+def _wrote_recently(request: Request) -> bool:
+    try:
+        last_write = float(request.cookies.get(FRESHNESS_COOKIE, 0))
+    except ValueError:
+        return False
+    return time.time() - last_write < engine_settings.replica_freshness_seconds
+
+
+async def get_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async generator that yields a read-only AsyncSession bound to the replica.
+    Clients that wrote within the freshness window are kept on the primary so
+    they always see their own latest answer despite replication lag.
+    """
+    session_factory = AsyncReadSessionLocal
+    if session_factory is not AsyncSessionLocal and _wrote_recently(request):
+        session_factory = AsyncSessionLocal
+    async with session_factory() as session:
+        yield session
+
+
+def mark_fresh_write(response: Response) -> None:
+    """Pin the client to the primary for the freshness window after a write."""
+    if AsyncReadSessionLocal is AsyncSessionLocal:
+        return
+    response.set_cookie(
+        key=FRESHNESS_COOKIE,
+        value=f"{time.time():.3f}",
+        max_age=engine_settings.replica_freshness_seconds,
+        httponly=True,
+        samesite="lax",
+    )
+
+
+def log_engine_config() -> None:
+    """Print the effective pool configuration once at startup."""
+    print(f"[database] engine config: {engine_settings.describe()}")
+    if replica_engine is not engine:
+        print("[database] read replica enabled, "
+              f"freshness window {engine_settings.replica_freshness_seconds}s")
+
+
+async def warm_up_engines() -> float:
+    """
+    Open a connection on each engine at startup, so the first request does not pay
+    for connecting and the dialect's first-connect setup. Returns the seconds taken.
+    """
+    start = time.perf_counter()
+    for async_engine in dict.fromkeys([engine, replica_engine]):
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    return time.perf_counter() - start
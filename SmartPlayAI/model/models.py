@@ -1,5 +1,5 @@
 # This define my sqlalchemy models classes for the database tables to work with postgresql
-from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, ForeignKey, PrimaryKeyConstraint, func, select
+from sqlalchemy import JSON, Boolean, Column, Integer, String, Text, DateTime, ForeignKey, Index, PrimaryKeyConstraint, func, select
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy import event
@@ -35,6 +35,17 @@ class Question(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     theme: Mapped[str] = mapped_column(String(50), index=True, nullable=False)
     question_text: Mapped[str] = mapped_column(Text, nullable=False)
+    severity: Mapped[str] = mapped_column(String(20), nullable=True)
+    subcategory: Mapped[str] = mapped_column(String(50), nullable=True)
+    # Hash of the normalized text, used to skip duplicate questions on import
+    text_hash: Mapped[str] = mapped_column(
+        String(32), unique=True, index=True, nullable=True)
+
+    __table_args__ = (
+        # Filtered random selection; id is included so sampling is index-only
+        Index('ix_questions_theme_severity_subcategory',
+              'theme', 'severity', 'subcategory', 'id'),
+    )
 
     # Relationship to responses
     responses = relationship(
@@ -64,6 +75,9 @@ class Response(Base):
     # Composite primary key
     __table_args__ = (
         PrimaryKeyConstraint('player_id', 'question_id'),
+        # Keyset pagination of a player's history, newest first
+        Index('ix_responses_player_created', 'player_id',
+              'created_at', 'question_id'),
     )
 
     # Relationships
@@ -74,6 +88,49 @@ class Response(Base):
         return f"<Response(player_id={self.player_id}, question_id={self.question_id}, score={self.score})>"
 
 
+class PlayerThemeStats(Base):
+    """Running per-player, per-theme aggregates, updated on every stored response."""
+    __tablename__ = 'player_theme_stats'
+
+    player_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey('players.id', ondelete='CASCADE'), nullable=False)
+    theme: Mapped[str] = mapped_column(String(50), nullable=False)
+    answered_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    score_sum: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    score_sq_sum: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Histogram of 0-5 scores
+    score_0: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    score_1: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    score_2: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    score_3: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    score_4: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    score_5: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Consecutive GOOD answers (score >= 3)
+    current_streak: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    best_streak: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_answered_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True), nullable=True)
+    # Adaptive scheduler state per severity: {severity: [mastery, attempts, last answered]}
+    mastery: Mapped[dict] = mapped_column(
+        JSON, default=dict, server_default='{}', nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('player_id', 'theme'),
+        # Theme-filtered leaderboard
+        Index('ix_player_theme_stats_theme_score', 'theme', 'score_sum'),
+    )
+
+    @classmethod
+    def empty(cls, player_id: int, theme: str) -> "PlayerThemeStats":
+        """New row with every counter at 0 (column defaults only apply on flush)."""
+        counters = {column.name: 0 for column in cls.__table__.columns
+                    if isinstance(column.type, Integer) and column.name != 'player_id'}
+        return cls(player_id=player_id, theme=theme, mastery={}, **counters)
+
+    def __repr__(self):
+        return f"<PlayerThemeStats(player_id={self.player_id}, theme={self.theme}, answered={self.answered_count})>"
+
+
 @event.listens_for(Response, "after_insert")
 def update_player_score(mapper, connection, target):
     # target = the Response instance object
@@ -50,6 +50,8 @@ class PlayerInDB(PlayerBase):
 class QuestionBase(BaseModel):
     theme: str
     question_text: str
+    severity: Optional[str] = None
+    subcategory: Optional[str] = None
 
 
 class QuestionCreate(QuestionBase):
@@ -110,6 +112,16 @@ class ResponseExistingEvaluation(BaseModel):
     llm_feedback: str
 
 
+class CohortReset(BaseModel):
+    """Schema for resetting the responses of several players at once"""
+    player_ids: List[int] = Field(..., min_length=1)
+
+
+class CohortResetOut(BaseModel):
+    deleted: dict[int, int]
+    total_deleted: int
+
+
 # Helper schemas
 
 class PlayerWithResponses(PlayerOut):
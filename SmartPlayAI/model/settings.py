@@ -0,0 +1,103 @@
+# Typed settings for the async SQLAlchemy engine, read from environment variables
+import os
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+from sqlalchemy.engine import make_url
+
+load_dotenv()
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: int | None) -> int | None:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return int(value)
+
+
+class EngineSettings(BaseModel):
+    """
+    Connection pool and driver settings for the async engine.
+
+    Every field can be overridden with the environment variable named in
+    ``from_env``. The defaults are tuned for production: no SQL echo, no
+    pre-ping round trip on checkout, and connections recycled before the
+    Postgres proxy drops idle ones.
+    """
+    url: str | None = None
+    replica_url: str | None = None               # read-only replica, falls back to url
+    replica_freshness_seconds: int = Field(5, ge=0)  # read own writes from primary this long
+    echo: bool = False
+    pool_size: int = Field(10, ge=1)
+    max_overflow: int = Field(20, ge=0)
+    pool_timeout: int = Field(30, ge=1)          # seconds to wait for a free connection
+    pool_recycle: int = Field(1800, ge=-1)       # seconds, -1 disables recycling
+    pool_pre_ping: bool = False
+    statement_timeout_ms: int | None = Field(15000, ge=0)  # None or 0 disables it
+    prepared_statement_cache_size: int = Field(100, ge=0)  # 0 when behind pgbouncer
+
+    @classmethod
+    def from_env(cls) -> "EngineSettings":
+        return cls(
+            url=os.getenv("DATABASE_PUBLIC_URL"),
+            replica_url=os.getenv("DATABASE_REPLICA_URL") or None,
+            replica_freshness_seconds=_env_int(
+                "DB_REPLICA_FRESHNESS_SECONDS", 5),
+            echo=_env_bool("DB_ECHO", False),
+            pool_size=_env_int("DB_POOL_SIZE", 10),
+            max_overflow=_env_int("DB_MAX_OVERFLOW", 20),
+            pool_timeout=_env_int("DB_POOL_TIMEOUT", 30),
+            pool_recycle=_env_int("DB_POOL_RECYCLE", 1800),
+            pool_pre_ping=_env_bool("DB_POOL_PRE_PING", False),
+            statement_timeout_ms=_env_int("DB_STATEMENT_TIMEOUT_MS", 15000),
+            prepared_statement_cache_size=_env_int(
+                "DB_PREPARED_STATEMENT_CACHE_SIZE", 100),
+        )
+
+    @property
+    def backend(self) -> str:
+        return make_url(self.url).get_backend_name() if self.url else ""
+
+    def engine_kwargs(self, url: str | None = None) -> dict:
+        """Keyword arguments for ``create_async_engine`` (for ``url``, default the primary)."""
+        kwargs = {"echo": self.echo, "future": True}
+
+        # SQLite (tests, local dev) uses its own single-connection pools
+        url = url or self.url
+        if not url or make_url(url).get_backend_name() != "postgresql":
+            return kwargs
+
+        kwargs.update(
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_timeout=self.pool_timeout,
+            pool_recycle=self.pool_recycle,
+            pool_pre_ping=self.pool_pre_ping,
+        )
+        connect_args = {
+            "prepared_statement_cache_size": self.prepared_statement_cache_size,
+        }
+        if self.statement_timeout_ms:
+            connect_args["server_settings"] = {
+                "statement_timeout": str(self.statement_timeout_ms)}
+        kwargs["connect_args"] = connect_args
+        return kwargs
+
+    def describe(self) -> str:
+        """One-line summary of the effective config, safe to log (no credentials)."""
+        if self.backend != "postgresql":
+            return f"backend={self.backend or 'unset'} echo={self.echo} (driver default pool)"
+        return (
+            f"backend={self.backend} echo={self.echo} "
+            f"pool_size={self.pool_size} max_overflow={self.max_overflow} "
+            f"pool_timeout={self.pool_timeout}s pool_recycle={self.pool_recycle}s "
+            f"pre_ping={self.pool_pre_ping} "
+            f"statement_timeout={f'{self.statement_timeout_ms}ms' if self.statement_timeout_ms else 'off'} "
+            f"prepared_statement_cache_size={self.prepared_statement_cache_size}"
+        )
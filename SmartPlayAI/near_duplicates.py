@@ -0,0 +1,144 @@
+# Near-duplicate detection for question texts with MinHash signatures and LSH banding.
+# Catches reworded copies ("You fall into icy water..." vs "You fall through the icy water...")
+# that the exact text_hash check misses. The index lives in process memory, keyed by
+# Question.text_hash, and is topped up incrementally from the questions table. Matches are
+# only made within a theme: the same scenario may be asked in more than one theme.
+import hashlib
+import os
+import re
+from array import array
+from functools import partial
+from operator import eq
+
+NUM_PERM = 96                # signature length (bins)
+BANDS = 32                   # LSH bands of 3 rows: a 0.5 Jaccard pair is a candidate 98.6% of the time
+SHINGLE_SIZE = 5             # character shingles of the normalized text
+DEFAULT_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", 0.5))
+
+_ROWS = NUM_PERM // BANDS
+_EMPTY_OFFSET = (1 << 64) // NUM_PERM  # borrowed values of empty bins sit above every real one
+_NON_WORD = re.compile(r"[^\w\s]+")
+_shingle_hash = partial(hashlib.blake2b, digest_size=8)
+
+
+def _shingles(text: str) -> array:
+    # A stable hash, not the built-in hash(): str hashing is salted per process,
+    # and every worker (and every restart) must give the same text the same signature
+    normalized = " ".join(_NON_WORD.sub(" ", text.casefold()).split())
+    if len(normalized) <= SHINGLE_SIZE:
+        grams = {normalized}
+    else:
+        grams = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+    return array("Q", b"".join([_shingle_hash(gram.encode("utf-8")).digest() for gram in grams]))
+
+
+def minhash(text: str) -> array:
+    """
+    MinHash signature of the text's character shingles.
+
+    One-permutation hashing: every shingle hash lands in one of NUM_PERM bins
+    by its hash modulo NUM_PERM and each bin keeps its minimum, so a signature costs one
+    pass over the shingles instead of one per permutation. Empty bins borrow
+    the next non-empty bin's value (rotation densification).
+    """
+    bins = [None] * NUM_PERM
+    for h in _shingles(text):
+        value, slot = divmod(h, NUM_PERM)
+        current = bins[slot]
+        if current is None or value < current:
+            bins[slot] = value
+
+    # Walk right to left twice so the last bins can borrow around the end
+    signature = list(bins)
+    borrowed, distance = None, 0
+    for i in range(2 * NUM_PERM - 1, -1, -1):
+        value = bins[i % NUM_PERM]
+        if value is not None:
+            borrowed, distance = value, 0
+        else:
+            distance += 1
+            if i < NUM_PERM and borrowed is not None:
+                signature[i] = borrowed + distance * _EMPTY_OFFSET
+    return array("Q", signature if borrowed is not None else [0] * NUM_PERM)
+
+
+def similarity(a: array, b: array) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(map(eq, a, b)) / NUM_PERM
+
+
+def _band_keys(signature: array):
+    for band in range(BANDS):
+        yield band, hash(tuple(signature[band * _ROWS:(band + 1) * _ROWS]))
+
+
+class NearDuplicateIndex:
+    """
+    LSH index answering "is this text a near-duplicate of a stored question?".
+
+    ``last_id`` is the highest question id loaded from the database, so
+    ``crud.refresh_near_duplicate_index`` only reads rows added since, including
+    those inserted by other workers.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.signatures: dict[str, array] = {}
+        self.themes: dict[str, str | None] = {}
+        self.buckets: list[dict[int, list[str]]] = [{} for _ in range(BANDS)]
+        self.last_id = 0
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def add(self, key: str, text: str | None = None, signature: array | None = None,
+            theme: str | None = None) -> None:
+        if key in self.signatures:
+            return
+        signature = signature if signature is not None else minhash(text)
+        self.signatures[key] = signature
+        self.themes[key] = theme
+        for band, band_key in _band_keys(signature):
+            self.buckets[band].setdefault(band_key, []).append(key)
+
+    def query(self, text: str | None = None, signature: array | None = None,
+              threshold: float | None = None, theme: str | None = None) -> tuple[str, float] | None:
+        """Best stored match in ``theme`` at or above the threshold, as ``(key, similarity)``."""
+        signature = signature if signature is not None else minhash(text)
+        threshold = self.threshold if threshold is None else threshold
+        best = None
+        seen = set()
+        for band, band_key in _band_keys(signature):
+            for key in self.buckets[band].get(band_key, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                if self.themes[key] != theme:
+                    continue
+                score = similarity(signature, self.signatures[key])
+                if score >= threshold and (best is None or score > best[1]):
+                    best = (key, score)
+        return best
+
+    def discard(self, key: str) -> None:
+        signature = self.signatures.pop(key, None)
+        if signature is None:
+            return
+        del self.themes[key]
+        for band, band_key in _band_keys(signature):
+            keys = self.buckets[band].get(band_key)
+            if keys and key in keys:
+                keys.remove(key)
+                if not keys:
+                    del self.buckets[band][band_key]
+
+    def clear(self) -> None:
+        self.signatures.clear()
+        self.themes.clear()
+        for bucket in self.buckets:
+            bucket.clear()
+        self.last_id = 0
+
+
+# One index per process
+question_index = NearDuplicateIndex()
@@ -0,0 +1,117 @@
+# Dev/test SQL auditing: counts statements per request and flags N+1 style access patterns.
+# Enable with QUERY_AUDIT=1; offending requests are logged with their route and the crud call stack.
+import logging
+import os
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from metrics import crud_call_stack, route_label
+
+logger = logging.getLogger("smartplay.query_audit")
+
+QUERY_AUDIT_ENABLED = os.getenv("QUERY_AUDIT", "").lower() in ("1", "true", "yes", "on")
+MAX_STATEMENTS = int(os.getenv("QUERY_AUDIT_MAX_STATEMENTS", 10))
+MAX_REPEATS = int(os.getenv("QUERY_AUDIT_MAX_REPEATS", 2))
+
+_IN_LIST = re.compile(r"IN \(\s*(?:\?|%s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%s|\$\d+|:\w+))*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a SQL statement so executions that differ only in IN-list length compare equal."""
+    return _WHITESPACE.sub(" ", _IN_LIST.sub("IN (...)", statement)).strip()
+
+
+class QueryAudit:
+    """Statements seen during one request (or one test block)."""
+
+    def __init__(self, max_statements: int = MAX_STATEMENTS, max_repeats: int = MAX_REPEATS):
+        self.max_statements = max_statements
+        self.max_repeats = max_repeats
+        self.count = 0
+        self.shapes = Counter()
+        self.sources = {}  # shape -> crud call stack of its first execution
+
+    def record(self, statement: str) -> None:
+        shape = statement_shape(statement)
+        self.count += 1
+        self.shapes[shape] += 1
+        self.sources.setdefault(shape, crud_call_stack.get())
+
+    @property
+    def repeated(self) -> list[tuple[str, int]]:
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > self.max_repeats]
+
+    def problems(self) -> list[str]:
+        issues = []
+        if self.count > self.max_statements:
+            issues.append(
+                f"{self.count} statements (limit {self.max_statements})")
+        for shape, n in self.repeated:
+            stack = " > ".join(self.sources[shape]) or "<outside crud>"
+            issues.append(f"repeated {n}x via {stack}: {shape[:200]}")
+        return issues
+
+    def report(self) -> str:
+        lines = [f"{self.count} statements, {len(self.shapes)} distinct:"]
+        for shape, n in self.shapes.most_common():
+            stack = " > ".join(self.sources[shape]) or "<outside crud>"
+            lines.append(f"  {n}x [{stack}] {shape[:200]}")
+        return "\n".join(lines)
+
+
+_current_audit: ContextVar[QueryAudit | None] = ContextVar("current_query_audit", default=None)
+
+
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    audit = _current_audit.get()
+    if audit is not None:
+        audit.record(statement)
+
+
+def install_query_audit(async_engine) -> None:
+    """Record every statement on this engine into the audit of the current request."""
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _record_statement)
+
+
+@contextmanager
+def count_queries(async_engine, **limits):
+    """Collect every statement executed on ``async_engine`` inside the block, from any thread."""
+    audit = QueryAudit(**limits)
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        audit.record(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _record)
+    try:
+        yield audit
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", _record)
+
+
+class QueryAuditMiddleware:
+    """Pure ASGI middleware that audits the SQL issued by each HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        audit = QueryAudit()
+        token = _current_audit.set(audit)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_audit.reset(token)
+            issues = audit.problems()
+            if issues:
+                logger.warning(
+                    "Query audit: %s %s (%s)\n  %s",
+                    scope["method"], route_label(scope), scope["path"], "\n  ".join(issues))
@@ -0,0 +1,152 @@
+# Conditional GETs and a short-lived per-process cache for the public JSON read endpoints.
+# Responses are stored by path and normalized query string together with the data version
+# they were computed at; crud write paths call data_version.bump(), so the next request
+# recomputes. The weak ETag is a digest of the body, so every worker hands out the same tag
+# for the same data and If-None-Match gets a 304 from any of them. Other workers' writes
+# (and replica lag) are picked up once an entry is older than RESPONSE_CACHE_TTL seconds.
+import hashlib
+import itertools
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.datastructures import Headers
+from starlette.requests import cookie_parser
+from starlette.routing import Match
+
+from metrics import RESPONSE_CACHE
+from model.database import FRESHNESS_COOKIE
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE", "true").lower() in ("1", "true", "yes", "on")
+TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL", 5))
+MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", 5))
+STALE_WHILE_REVALIDATE = int(os.getenv("RESPONSE_CACHE_STALE_WHILE_REVALIDATE", 30))
+MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 512))
+
+CACHED_PATHS = ("/leaderboard", "/leaderboard/details", "/questions/id/{question_id}", "/responses/feedback")
+
+
+class DataVersion:
+    """Process-wide counter that write paths bump after committing."""
+
+    def __init__(self):
+        self._counter = itertools.count(1)
+        self.value = 0
+
+    def bump(self) -> int:
+        self.value = next(self._counter)
+        return self.value
+
+
+data_version = DataVersion()
+
+
+@dataclass
+class CachedResponse:
+    version: int
+    stored_at: float
+    etag: str
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+
+
+def cache_key(scope) -> str:
+    query = parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+    return f"{scope['path']}?{urlencode(sorted(query))}"
+
+
+def weak_etag(body: bytes) -> str:
+    return f'W/"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison: W/"x" and "x" match
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+class ResponseCacheMiddleware:
+    """Pure ASGI middleware serving CACHED_PATHS from memory with ETag/304 and Cache-Control."""
+
+    def __init__(self, app, paths=CACHED_PATHS, ttl: float = TTL_SECONDS, max_entries: int = MAX_ENTRIES):
+        self.app = app
+        self.paths = set(paths)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._routes = None
+        self.cache_control = f"public, max-age={MAX_AGE}, stale-while-revalidate={STALE_WHILE_REVALIDATE}"
+
+    def _match(self, scope):
+        if self._routes is None:
+            self._routes = [r for r in scope["app"].router.routes if getattr(r, "path", None) in self.paths]
+        for route in self._routes:
+            match, child_scope = route.matches(scope)
+            if match is Match.FULL:
+                return route, child_scope
+        return None, None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        route, child_scope = self._match(scope)
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        # Clients that just wrote read from the primary and must see their write, so skip the cache
+        fresh_writer = FRESHNESS_COOKIE in cookie_parser(request_headers.get("cookie", ""))
+        key = cache_key(scope)
+        version = data_version.value
+        entry = self.entries.get(key)
+        if (entry is not None and not fresh_writer and entry.version == version
+                and time.monotonic() - entry.stored_at < self.ttl):
+            # Let routing-aware middleware (metrics) label the request as if the route ran
+            scope.update(child_scope)
+            self.entries.move_to_end(key)
+            await self._respond(entry, request_headers, send, route.path, "hit")
+            return
+
+        start, chunks = None, []
+
+        async def capture(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        body = b"".join(chunks)
+        headers = list(start.get("headers", []))
+        entry = CachedResponse(version, time.monotonic(), weak_etag(body), start["status"], headers, body)
+        if entry.status == 200 and not any(k.lower() == b"set-cookie" for k, _ in headers):
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            await self._respond(entry, request_headers, send, route.path, "miss",
+                                private=fresh_writer)
+        else:
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+    async def _respond(self, entry: CachedResponse, request_headers: Headers, send, route: str,
+                       result: str, private: bool = False):
+        cache_control = "private, no-cache" if private else self.cache_control
+        headers = [(k, v) for k, v in entry.headers if k.lower() not in (b"etag", b"cache-control")]
+        headers += [(b"etag", entry.etag.encode()), (b"cache-control", cache_control.encode())]
+        if _etag_matches(request_headers.get("if-none-match", ""), entry.etag):
+            RESPONSE_CACHE.labels(route, "not_modified").inc()
+            headers = [(k, v) for k, v in headers if k.lower() not in (b"content-length", b"content-type")]
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        RESPONSE_CACHE.labels(route, result).inc()
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": entry.body})
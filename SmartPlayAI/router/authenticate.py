@@ -1,12 +1,10 @@
 import os
-from pathlib import Path
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 from fastapi import (
     APIRouter, Depends, Form, Request, Response, HTTPException
 )
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -15,6 +13,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from model import crud, schemas
 from model.database import get_session
+from templating import templates
 
 # ---------------------------
 # Setup
@@ -23,15 +22,14 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "hgaghagahgagahgwfagahgawf")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+# Players allowed to call the admin routes (comma-separated usernames); none by default
+ADMIN_USERNAMES = {name.strip() for name in os.getenv("ADMIN_USERNAMES", "").split(",") if name.strip()}
 
 # Check if we're in production (Railway sets this)
 ENVIRONMENT = os.getenv("RAILWAY_ENVIRONMENT_NAME", "development")
 IS_PRODUCTION = ENVIRONMENT == "production"
 
-BASE_DIR = Path(__file__).resolve().parent.parent
-
 router = APIRouter(prefix="/auth", tags=["authentication"])
-templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
@@ -132,6 +130,14 @@ async def get_current_user_from_cookie(
     return await _get_user_from_token(token, db)
 
 
+async def get_admin_user(
+    current_user: schemas.PlayerRead = Depends(get_current_user_from_cookie),
+):
+    if current_user.name not in ADMIN_USERNAMES:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
+
 # ---------------------------
 # Routes
 # ---------------------------
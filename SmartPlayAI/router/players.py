@@ -1,80 +1,136 @@
-from sqlalchemy.orm import selectinload
-from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, Request  # Add Request here
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from model import models
 from model import schemas, crud
-from model.database import get_session
+from model.database import get_session, get_read_session, mark_fresh_write
+from templating import templates
+from fast_json import FAST_JSON_ENABLED, FastJSONResponse
+from router.authenticate import get_admin_user
 
 
 # tags is for grouping in docs
 router = APIRouter(prefix="/players", tags=["players"])
-templates = Jinja2Templates(directory="templates")
+
+
+HISTORY_PAGE_SIZE = 10
+
+
+def _encode_cursor(cursor: tuple[datetime, int] | None) -> str | None:
+    if cursor is None:
+        return None
+    created_at, question_id = cursor
+    return f"{created_at.isoformat()}~{question_id}"
+
+
+def _decode_cursor(cursor: str | None) -> tuple[datetime, int] | None:
+    if not cursor:
+        return None
+    try:
+        created_at, question_id = cursor.rsplit("~", 1)
+        return datetime.fromisoformat(created_at), int(question_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 @router.get("/id/{player_id}", response_class=HTMLResponse)
 async def fetch_player_by_id(
     player_id: int,
     request: Request,
-    db: AsyncSession = Depends(get_session)
+    db: AsyncSession = Depends(get_read_session)
 ):
-    """Retrieve player details and responses safely for Jinja rendering."""
-    result = await db.execute(
-        select(models.Player)
-        .options(
-            selectinload(models.Player.responses)
-            .selectinload(models.Response.question)
-        )
-        .where(models.Player.id == player_id)
-    )
-    player = result.scalars().first()
+    """Render the player profile: a per-theme summary, with history loaded on demand via HTMX."""
+    player = await crud.get_player(db, player_id)
 
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
-    responses = [
-        {
-
-            "response_text": r.response_text,
-            "score": r.score,
-            "created_at": r.created_at,
-            "llm_feedback": r.llm_feedback,
-            "question_theme": r.question.theme if r.question else None,
-            "question_text": r.question.question_text if r.question else None,
-        }
-        for r in player.responses
-    ]
+    summary = await crud.get_player_theme_summary(db, player_id)
 
     return templates.TemplateResponse(
         "player_detail.html",
         {
             "request": request,
             "player": player,
-            "responses": responses,
+            "summary": {row["theme"]: row for row in summary},
             "username": player.name,
             "user_id": player.id,
         }
     )
 
 
+@router.get("/{player_id}/history", response_class=HTMLResponse)
+async def get_player_history(
+    player_id: int,
+    request: Request,
+    theme: str | None = Query(None),
+    cursor: str | None = Query(None),
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_session)
+):
+    """HTMX partial: one page of a player's answers, newest first."""
+    rows, next_cursor = await crud.get_player_history_page(
+        db, player_id, theme=theme, cursor=_decode_cursor(cursor), limit=limit)
+
+    return templates.TemplateResponse(
+        "components/player_history_page.html",
+        {
+            "request": request,
+            "player_id": player_id,
+            "theme": theme or "",
+            "rows": rows,
+            "is_first_page": cursor is None,
+            "next_cursor": _encode_cursor(next_cursor),
+        }
+    )
+
+
+@router.get("/{player_id}/history/{question_id}/feedback", response_class=HTMLResponse)
+async def get_player_history_feedback(
+    player_id: int,
+    question_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_read_session)
+):
+    """HTMX partial: the LLM feedback of one answer, loaded when the player expands it."""
+    feedback = await crud.get_response_feedback(db, player_id, question_id)
+    if feedback is None:
+        raise HTTPException(status_code=404, detail="Feedback not found")
+    return templates.TemplateResponse(
+        "components/player_feedback.html",
+        {"request": request, "feedback": feedback}
+    )
+
+
 @router.get("/{player_id}/responses", response_model=list[schemas.ResponseOut])
-async def get_player_responses(player_id: int, db: AsyncSession = Depends(get_session)):
+async def get_player_responses(player_id: int, db: AsyncSession = Depends(get_read_session)):
     """Retrieve all responses linked to a specific player."""
-    return await crud.get_responses_by_player(db, player_id)
+    responses = await crud.get_responses_by_player(db, player_id)
+    if FAST_JSON_ENABLED:
+        return FastJSONResponse(responses)
+    return responses
 
 
 @router.post("/{player_id}/responses/reset", response_model=schemas.PlayerOut)
-async def reset_player_responses(player_id: int, db: AsyncSession = Depends(get_session)):
+async def reset_player_responses(player_id: int, response: Response, db: AsyncSession = Depends(get_session)):
     """Delete all responses associated with a specific player and reset score to 0."""
-    # Delete all responses
-    deleted_count = await crud.reset_user_responses(db, player_id)
+    # Delete all responses and reset the score in one transaction
+    await crud.reset_user_responses(db, player_id)
+    mark_fresh_write(response)
 
-    # Reset player score to 0
-    updated_player = await crud.reset_player_scores(db, player_id)
+    updated_player = await crud.get_player(db, player_id)
 
     if not updated_player:
         raise HTTPException(status_code=404, detail="Player not found")
 
     return updated_player
+
+
+@router.post("/responses/reset", response_model=schemas.CohortResetOut)
+async def reset_cohort_responses(
+    cohort: schemas.CohortReset,
+    db: AsyncSession = Depends(get_session),
+    admin: schemas.PlayerRead = Depends(get_admin_user),
+):
+    """Admin: delete all responses and reset scores for a whole cohort of players."""
+    deleted = await crud.reset_cohort_responses(db, cohort.player_ids)
+    return schemas.CohortResetOut(deleted=deleted, total_deleted=sum(deleted.values()))
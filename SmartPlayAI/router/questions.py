@@ -1,16 +1,14 @@
-from pathlib import Path
+from typing import List
 from fastapi import APIRouter, Request, Form, Depends, HTTPException
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 from model import schemas, crud
 from model.database import get_session
+from templating import templates
+from fast_json import FAST_JSON_ENABLED, FastJSONResponse, fields_of
 from fastapi import Query
 
-TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
-
 router = APIRouter(prefix="/questions", tags=["questions"])
-templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
 
 @router.post("/create", response_model=schemas.QuestionOut)
@@ -18,19 +16,31 @@ async def create_question(
     db: AsyncSession = Depends(get_session),
     theme: str = Form(None),
     question_text: str = Form(None),
+    severity: str = Form(None),
+    subcategory: str = Form(None),
     question: schemas.QuestionCreate | None = None,  # JSON body
 ):
     """
     Create a new question.
     Supports both JSON (API clients) and Form (HTML forms).
+
+    Posting the exact text of a stored question returns that question. A reworded copy of
+    one in the same theme is rejected with 409, its id in ``detail.duplicate_of``.
     """
     if question:  # JSON case
         data = question
     elif theme and question_text:  # Form case
-        data = schemas.QuestionCreate(theme=theme, question_text=question_text)
+        data = schemas.QuestionCreate(theme=theme, question_text=question_text,
+                                      severity=severity, subcategory=subcategory)
     else:
         raise HTTPException(status_code=400, detail="Invalid input")
 
+    duplicate = await crud.find_near_duplicate(db, data.question_text, data.theme)
+    if duplicate is not None and duplicate.text_hash != crud.question_text_hash(data.question_text):
+        raise HTTPException(status_code=409, detail={
+            "message": "A near-duplicate of this question already exists",
+            "duplicate_of": duplicate.id,
+        })
     db_question = await crud.store_question(db, data)
     return db_question
 
@@ -61,9 +71,12 @@ async def get_random_questions(
         request: Request,
         theme: str = Query(...),
         user_id: int = Query(...),
+        severity: List[str] | None = Query(None),
+        subcategory: List[str] | None = Query(None),
         db: AsyncSession = Depends(get_session)):
 
-    db_questions = await crud.get_random_questions_by_theme(db, theme, player_id=user_id)
+    db_questions = await crud.get_scheduled_questions(
+        db, theme, player_id=user_id, severity=severity, subcategory=subcategory)
     if not db_questions:
         raise HTTPException(status_code=404, detail="No questions found")
 
@@ -73,6 +86,8 @@ async def get_random_questions(
         questions_dict.append({
             "id": q.id,
             "theme": q.theme,
+            "severity": q.severity,
+            "subcategory": q.subcategory,
             "question_text": q.question_text
         })
     
@@ -97,11 +112,19 @@ async def get_random_questions(
 async def get_random_questions_api(
         theme: str = Query(...),
         user_id: int = Query(...),
+        severity: List[str] | None = Query(None),
+        subcategory: List[str] | None = Query(None),
         db: AsyncSession = Depends(get_session)):
-    """API endpoint for getting random questions as JSON"""
-    db_questions = await crud.get_random_questions_by_theme(db, theme, player_id=user_id)
+    """API endpoint for getting random questions as JSON, optionally filtered by severity/subcategory"""
+    db_questions = await crud.get_scheduled_questions(
+        db, theme, player_id=user_id, severity=severity, subcategory=subcategory)
     if not db_questions:
         raise HTTPException(status_code=404, detail="No questions found")
+    if FAST_JSON_ENABLED:
+        return FastJSONResponse({
+            "questions": [fields_of(q, schemas.QuestionOut) for q in db_questions],
+            "user_id": user_id,
+        })
     return schemas.ListQuestionsOut(questions=db_questions, user_id=user_id)
 
 
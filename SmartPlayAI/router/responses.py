@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Request, Form, Depends, HTTPException, Query
+from fastapi import APIRouter, Request, Response, Form, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 from router.authenticate import get_current_user_from_cookie
 from model import schemas, crud
 from fetchLLMresponse import evaluate_player_response as evaluate_answer
-from model.database import get_session
+from model.database import get_session, get_read_session, mark_fresh_write
+from answer_similarity import ANSWER_SIMILARITY_ENABLED, answer_cache, log_hit
+from metrics import EVALUATION_CACHE
+from fast_json import FAST_JSON_ENABLED, FastJSONResponse, fields_of
 
 
 router = APIRouter(prefix="/responses", tags=["responses"])
@@ -28,6 +32,7 @@ async def create_response(response: schemas.ResponseCreate, db: AsyncSession = D
 @router.post("/answer")
 async def answer_question(
     request: Request,
+    response: Response,
     question_id: int = Form(...),
     question_text: str = Form(...),
     response_text: str = Form(...),
@@ -40,18 +45,30 @@ async def answer_question(
         db, question_id=question_id, question_text=question_text, response_text=response_text
     )
 
+    evaluation_source = "exact"
+    if not (cached and cached.llm_feedback and cached.score is not None) and ANSWER_SIMILARITY_ENABLED:
+        # Paraphrase of an answer that was already evaluated for this question
+        similar = await crud.find_similar_evaluation(db, question_id, response_text)
+        if similar:
+            cached, similarity = similar
+            evaluation_source = "similar"
+            log_hit(question_id, current_user.id, cached.player_id, similarity,
+                    response_text, cached.response_text)
+
     if cached and cached.llm_feedback and cached.score is not None:
         evaluation_text = cached.llm_feedback
         score = cached.score
         verdict = "GOOD" if score is not None and score >= 3 else "BAD"
     else:
+        evaluation_source = "llm"
         print("Theme received in responses.py:", theme)
         # Evaluate with LLM
         if theme != "" and theme not in ["interview", "work", "survival"]:
             raise HTTPException(
                 status_code=400, detail="Invalid theme specified.")
-        evaluation_text, result = evaluate_answer(
-            question_text, response_text, theme)
+        # The LLM call is blocking; in a thread the worker keeps serving (and can drain) meanwhile
+        evaluation_text, result = await run_in_threadpool(
+            evaluate_answer, question_text, response_text, theme)
         score = result.get("score")
         verdict = result.get("verdict")
 
@@ -66,14 +83,26 @@ async def answer_question(
             llm_feedback=evaluation_text,
         ),
     )
+    # Let the player read their new answer back from the primary while the replica catches up
+    mark_fresh_write(response)
+    EVALUATION_CACHE.labels(evaluation_source).inc()
+    if evaluation_source == "llm" and evaluation_text:
+        answer_cache.add(question_id, current_user.id, response_text)
 
     # Return results (frontend can render evaluation & verdict)
-    return {
+    result = {
         "db_response": db_response,
         "evaluation": evaluation_text,
         "verdict": verdict,
         "score": score,
     }
+    if FAST_JSON_ENABLED:
+        result["db_response"] = fields_of(db_response, schemas.ResponseOut)
+        fast_response = FastJSONResponse(result)
+        # FastAPI drops cookies set on the injected response when a Response is returned
+        mark_fresh_write(fast_response)
+        return fast_response
+    return result
 
 
 @router.post("/{player_id}/{question_id}/feedback", response_model=schemas.ResponseOut)
@@ -81,6 +110,7 @@ async def set_response_feedback(
     player_id: int,
     question_id: int,
     feedback: schemas.ResponseFeedbackUpdate,
+    response: Response,
     db: AsyncSession = Depends(get_session),
     current_user: schemas.PlayerBase = Depends(get_current_user_from_cookie),
 ):
@@ -94,16 +124,19 @@ async def set_response_feedback(
     db_response = await crud.update_response_like_status(db, player_id, question_id, feedback.liked)
     if not db_response:
         raise HTTPException(status_code=404, detail="Response not found.")
+    mark_fresh_write(response)
     return db_response
 
 
 @router.get("/feedback", response_model=list[schemas.ResponseOut])
 async def list_response_feedback(
     liked: bool | None = Query(None),
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
 ):
     """
     List stored response feedback with optional like/dislike filter.
     """
     db_responses = await crud.list_response_feedback(db, liked)
+    if FAST_JSON_ENABLED:
+        return FastJSONResponse(db_responses)
     return db_responses
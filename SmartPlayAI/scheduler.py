@@ -0,0 +1,73 @@
+# Adaptive question scheduling: weak severities come up more often, mastered ones less.
+# A player's state per theme is a small dict kept on PlayerThemeStats.mastery:
+#     {severity: [mastery 0..1, attempts, last answered (unix seconds)]}
+# so picking the next batch needs no response history, just that dict and a
+# pool of unanswered candidate ids.
+import heapq
+import math
+import random
+from typing import Sequence
+
+NO_SEVERITY = "none"        # key for questions without a severity
+LEARNING_RATE = 0.3         # weight of the newest score in the moving average
+PRIOR_MASTERY = 0.5         # assumed mastery of a severity never answered
+MIN_WEIGHT = 0.05           # mastered severities still come up now and then
+REVIEW_AFTER_SECONDS = 7 * 24 * 3600  # forgetting boost reaches its max after a week
+MAX_SCORE = 5
+
+
+def severity_key(severity: str | None) -> str:
+    return severity or NO_SEVERITY
+
+
+def record_answer(mastery: dict | None, severity: str | None, score: int | None, now: float) -> dict:
+    """
+    Fold one scored answer into the mastery state.
+
+    Returns a new dict so SQLAlchemy notices the change on a plain JSON column.
+    """
+    state = dict(mastery or {})
+    key = severity_key(severity)
+    level, attempts, _ = state.get(key, (PRIOR_MASTERY, 0, now))
+    target = max(0, min(MAX_SCORE, score or 0)) / MAX_SCORE
+    level += LEARNING_RATE * (target - level)
+    state[key] = [round(level, 4), attempts + 1, int(now)]
+    return state
+
+
+def severity_weight(mastery: dict | None, severity: str | None, now: float) -> float:
+    """
+    Selection weight for a severity: low mastery means high weight, and time since
+    the last answer raises it again, up to double after REVIEW_AFTER_SECONDS.
+    """
+    entry = (mastery or {}).get(severity_key(severity))
+    if entry is None:
+        return 1.0 - PRIOR_MASTERY + MIN_WEIGHT
+    level, _, last_answered = entry
+    forgetting = 1.0 + min(1.0, max(0.0, now - last_answered) / REVIEW_AFTER_SECONDS)
+    return (1.0 - level + MIN_WEIGHT) * forgetting
+
+
+def pick_questions(
+    candidates: Sequence[tuple[int, str | None]],
+    mastery: dict | None,
+    k: int,
+    now: float,
+    rng: random.Random | None = None,
+) -> list[int]:
+    """
+    Weighted sample of ``k`` question ids, without replacement, from
+    ``(question_id, severity)`` candidates.
+
+    Uses Efraimidis-Spirakis keys (u ** (1 / w)), one pass over the candidates.
+    """
+    rng = rng or random
+    weights = {}
+    keyed = []
+    for question_id, severity in candidates:
+        weight = weights.get(severity)
+        if weight is None:
+            weight = weights[severity] = severity_weight(mastery, severity, now)
+        # log form of u ** (1 / w), avoids underflow for small weights
+        keyed.append((math.log(rng.random() or 1e-300) / weight, question_id))
+    return [question_id for _, question_id in heapq.nlargest(k, keyed)]
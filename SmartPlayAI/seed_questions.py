@@ -1,34 +1,218 @@
+"""
+Bulk, idempotent question import.
+
+Streams questions from a JSON array, NDJSON or CSV file, validates them in
+chunks and inserts each chunk with ``INSERT ... ON CONFLICT DO NOTHING`` keyed
+on the normalized text hash, so re-running an import never creates duplicates.
+Rewordings of stored questions are dropped via the near-duplicate index.
+Memory use stays flat apart from that index.
+
+    uv run python seed_questions.py static/questions.json
+    uv run python seed_questions.py big_dump.ndjson --batch-size 10000
+"""
+import argparse
 import asyncio
+import csv
 import json
-from sqlalchemy.ext.asyncio import AsyncSession
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List
+
+from pydantic import TypeAdapter, ValidationError
+
 from model.database import AsyncSessionLocal  # Fixed import name
 from model import schemas
-from model.crud import load_questions_from_json
+from model.crud import bulk_insert_questions, question_text_hash, refresh_near_duplicate_index
+from near_duplicates import NearDuplicateIndex, minhash
 
+DEFAULT_BATCH_SIZE = 5000
+_READ_SIZE = 1 << 16
+_ITEM_SEPARATOR = re.compile(r"[\s,]*")
 
-async def insert_from_json_file(file_path: str):
-    async with AsyncSessionLocal() as db:  # Use the correct session maker
+_question_list = TypeAdapter(List[schemas.QuestionCreate])
+
+
+@dataclass
+class ImportReport:
+    read: int = 0
+    invalid: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    near_duplicates: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.read / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (f"read={self.read} inserted={self.inserted} duplicates={self.duplicates} "
+                f"near_duplicates={self.near_duplicates} invalid={self.invalid} in {self.seconds:.2f}s "
+                f"({self.rows_per_second:,.0f} rows/s)")
+
+
+######################################################
+# Streaming readers
+######################################################
+
+
+def _iter_json_array(f) -> Iterator[dict]:
+    """Yield the items of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    buffer = f.read(_READ_SIZE).lstrip()
+    if not buffer.startswith("["):
+        raise ValueError("JSON file should contain a list of questions")
+    pos = 1
+    while True:
+        # Decode in place from a moving index; the consumed part is only cut off when
+        # the next chunk is appended, so each character is copied a bounded number of times
+        pos = _ITEM_SEPARATOR.match(buffer, pos).end()
+        if buffer.startswith("]", pos):
+            return
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            item, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            chunk = f.read(_READ_SIZE)
+            if not chunk:
+                raise
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield item
+
+
+def _iter_ndjson(f) -> Iterator[dict]:
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
 
-            # Validate that data is a list
-            if not isinstance(data, list):
-                raise ValueError(
-                    "JSON file should contain a list of questions")
 
-            questions = [schemas.QuestionCreate(**item) for item in data]
+def _iter_csv(f) -> Iterator[dict]:
+    for row in csv.DictReader(f):
+        # empty cells mean "not set", not an empty string
+        yield {k: v for k, v in row.items() if v not in ("", None)}
 
-            inserted = await load_questions_from_json(db, questions)
-            print(f"Inserted {len(inserted)} questions into DB")
 
+def iter_question_rows(file_path: str) -> Iterator[dict]:
+    """Stream raw question dicts from ``file_path``, picking the parser by extension."""
+    suffix = Path(file_path).suffix.lower()
+    readers = {".json": _iter_json_array, ".ndjson": _iter_ndjson,
+               ".jsonl": _iter_ndjson, ".csv": _iter_csv}
+    if suffix not in readers:
+        raise ValueError(f"Unsupported file type '{suffix}', use .json, .ndjson/.jsonl or .csv")
+    with open(file_path, "r", encoding="utf-8", newline="") as f:
+        yield from readers[suffix](f)
+
+
+######################################################
+# Import
+######################################################
+
+
+def _validate_batch(raw: List[dict], report: ImportReport) -> List[schemas.QuestionCreate]:
+    """Validate a whole batch at once, falling back to row by row to drop the bad ones."""
+    try:
+        return _question_list.validate_python(raw)
+    except ValidationError:
+        valid = []
+        for item in raw:
+            try:
+                valid.append(schemas.QuestionCreate.model_validate(item))
+            except ValidationError:
+                report.invalid += 1
+        return valid
+
+
+async def import_questions(db, rows, batch_size: int = DEFAULT_BATCH_SIZE,
+                           report: ImportReport | None = None,
+                           skip_near_duplicates: bool = True) -> ImportReport:
+    """
+    Insert questions from an iterable of dicts in batches, skipping duplicates.
+
+    With ``skip_near_duplicates`` rows that reword a stored question, or one
+    earlier in the same import, are dropped too.
+
+    Each batch is committed on its own, so an interrupted import can simply be re-run.
+    """
+    report = report or ImportReport()
+    start = time.perf_counter()
+    batch = []
+
+    async def flush():
+        questions = _validate_batch(batch, report)
+        index = await refresh_near_duplicate_index(db) if skip_near_duplicates else None
+        # Rows of this batch are matched against each other in a local index; the shared one
+        # only learns them once they are committed, so a failed batch leaves nothing behind
+        pending = NearDuplicateIndex(index.threshold) if index is not None else None
+        unique = {}
+        near_duplicates = 0
+        for q in questions:
+            text_hash = question_text_hash(q.question_text)
+            if index is not None and text_hash not in unique:
+                signature = minhash(q.question_text)
+                match = (index.query(signature=signature, theme=q.theme)
+                         or pending.query(signature=signature, theme=q.theme))
+                # an exact match is left to ON CONFLICT and counted as a duplicate
+                if match is not None and match[0] != text_hash:
+                    near_duplicates += 1
+                    continue
+                pending.add(text_hash, signature=signature, theme=q.theme)
+            unique.setdefault(text_hash, q)
+        inserted = await bulk_insert_questions(db, [
+            {"theme": q.theme, "question_text": q.question_text,
+             "severity": q.severity, "subcategory": q.subcategory, "text_hash": text_hash}
+            for text_hash, q in unique.items()
+        ])
+        await db.commit()
+        if index is not None:
+            for text_hash, signature in pending.signatures.items():
+                index.add(text_hash, signature=signature, theme=pending.themes[text_hash])
+        report.inserted += inserted
+        report.near_duplicates += near_duplicates
+        report.duplicates += len(questions) - inserted - near_duplicates
+        batch.clear()
+
+    for row in rows:
+        report.read += 1
+        batch.append(row)
+        if len(batch) >= batch_size:
+            await flush()
+            report.seconds = time.perf_counter() - start
+            print(f"  ... {report}")
+    if batch:
+        await flush()
+
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+async def insert_from_file(file_path: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                           skip_near_duplicates: bool = True):
+    async with AsyncSessionLocal() as db:  # Use the correct session maker
+        try:
+            report = await import_questions(db, iter_question_rows(file_path), batch_size,
+                                            skip_near_duplicates=skip_near_duplicates)
+            print(f"Imported '{file_path}': {report}")
+            return report
         except FileNotFoundError:
             print(f"Error: File '{file_path}' not found")
         except json.JSONDecodeError:
             print(f"Error: Invalid JSON in file '{file_path}'")
         except Exception as e:
+            await db.rollback()
             print(f"Error: {e}")
 
 
 if __name__ == "__main__":
-    asyncio.run(insert_from_json_file("static/questions.json"))
+    parser = argparse.ArgumentParser(description="Bulk import questions into the database.")
+    parser.add_argument("file", nargs="?", default="static/questions.json",
+                        help="JSON array, NDJSON (.ndjson/.jsonl) or CSV file")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--keep-near-duplicates", action="store_true",
+                        help="only skip exact duplicates (faster for very large dumps)")
+    args = parser.parse_args()
+    asyncio.run(insert_from_file(args.file, args.batch_size,
+                                 skip_near_duplicates=not args.keep_near_duplicates))
@@ -0,0 +1,38 @@
+// Deferred audio downloads for <audio data-audio-load="idle|gesture">.
+// The <source> URLs sit in data-src until the page has painted and the browser is
+// idle ("idle"), or until the first pointer/key/touch gesture (both modes), so the
+// audio never competes with the page's first interaction.
+
+(function () {
+  if (window.loadLazyAudio) return; // included by several templates on one page
+
+  function loadLazyAudio(selector) {
+    document.querySelectorAll(selector || "audio[data-audio-load]").forEach((audio) => {
+      const sources = audio.querySelectorAll("source[data-src]");
+      if (!sources.length) return;
+      sources.forEach((source) => {
+        source.src = source.dataset.src;
+        source.removeAttribute("data-src");
+      });
+      audio.preload = "auto";
+      audio.load();
+    });
+  }
+  window.loadLazyAudio = loadLazyAudio;
+
+  // Capture phase: runs before the pages' own gesture handlers call play()
+  const onGesture = () => {
+    loadLazyAudio();
+    ["pointerdown", "keydown", "touchstart"].forEach((type) =>
+      window.removeEventListener(type, onGesture, true)
+    );
+  };
+  ["pointerdown", "keydown", "touchstart"].forEach((type) =>
+    window.addEventListener(type, onGesture, true)
+  );
+
+  window.addEventListener("load", () => {
+    const idle = window.requestIdleCallback || ((callback) => setTimeout(callback, 200));
+    idle(() => loadLazyAudio('audio[data-audio-load="idle"]'));
+  });
+})();
@@ -55,9 +55,108 @@ document.querySelectorAll(".toggle-btn[data-liked]").forEach((btn) => {
 });
 
 async function loadData() {
-  currentView === "summary"
-    ? await loadLeaderboard()
-    : await loadDetailedView();
+  if (currentView === "summary") {
+    connectLive();
+  } else {
+    disconnectLive();
+    await loadDetailedView();
+  }
+}
+
+// Live summary board: a snapshot, then score deltas pushed by the server (/leaderboard/live).
+// EventSource reconnects on its own and sends Last-Event-ID, so the server can replay what
+// was missed; without EventSource, or when the server answers 204, fall back to one fetch.
+const boardLimit = 10;
+let liveSource = null,
+  liveBoard = [],
+  liveReceived = false;
+
+function connectLive() {
+  disconnectLive();
+  if (!window.EventSource) {
+    loadLeaderboard();
+    return;
+  }
+  liveReceived = false;
+  const source = new EventSource(
+    `/leaderboard/live?theme=${encodeURIComponent(currentTheme)}`
+  );
+  source.addEventListener("snapshot", (event) => {
+    liveReceived = true;
+    liveBoard = JSON.parse(event.data).board;
+    displayLeaderboard(liveBoard);
+  });
+  source.addEventListener("delta", (event) => {
+    liveReceived = true;
+    applyDelta(JSON.parse(event.data));
+  });
+  // Scores were reset: start over with a fresh snapshot
+  source.addEventListener("reset", () => connectLive());
+  source.addEventListener("error", () => {
+    if (source.readyState === EventSource.CLOSED) {
+      liveSource = null;
+      if (!liveReceived) loadLeaderboard();
+    }
+  });
+  liveSource = source;
+}
+
+function disconnectLive() {
+  if (liveSource) {
+    liveSource.close();
+    liveSource = null;
+  }
+}
+
+function applyDelta(delta) {
+  let row;
+  if (!currentTheme) {
+    row = {
+      id: delta.id,
+      name: delta.name,
+      score: delta.score,
+      games_played: delta.games_played,
+      average_score: delta.average_score,
+    };
+  } else if (delta.theme === currentTheme) {
+    row = {
+      id: delta.id,
+      name: delta.name,
+      score: delta.theme_score,
+      games_played: delta.theme_games,
+      average_score: delta.theme_games ? delta.theme_score / delta.theme_games : 0,
+    };
+  } else {
+    return;
+  }
+  const index = liveBoard.findIndex((player) => player.id === row.id);
+  const previous = index >= 0 ? liveBoard[index] : null;
+  // A full board whose member dropped may now have someone else at the bottom we don't know of
+  if (previous && row.score < previous.score && liveBoard.length >= boardLimit) {
+    connectLive();
+    return;
+  }
+  if (!previous && liveBoard.length >= boardLimit &&
+      row.score <= liveBoard[liveBoard.length - 1].score) {
+    return;
+  }
+  const order = liveBoard.map((player) => player.id).join();
+  if (previous) liveBoard[index] = row;
+  else liveBoard.push(row);
+  liveBoard.sort((a, b) => b.score - a.score);
+  liveBoard = liveBoard.slice(0, boardLimit);
+
+  const item = document.querySelector(
+    `#leaderboard-list .leaderboard-item[data-player-id="${row.id}"]`
+  );
+  if (previous && item && liveBoard.map((player) => player.id).join() === order) {
+    // Same ranking: update the row where it is instead of redrawing the list
+    item.querySelector(".player-score").textContent = row.score;
+    item.querySelector(".games-played").textContent = row.games_played;
+    item.querySelector(".average-score").textContent = row.average_score.toFixed(1);
+  } else {
+    displayLeaderboard(liveBoard, false);
+  }
 }
 
 async function loadLeaderboard() {
@@ -103,7 +202,7 @@ async function loadDetailedView() {
   }
 }
 
-function displayLeaderboard(data) {
+function displayLeaderboard(data, animate = true) {
   const container = document.getElementById("leaderboard-list");
   if (!data || data.length === 0) {
     container.innerHTML = `
@@ -127,7 +226,9 @@ function displayLeaderboard(data) {
       const medal =
         rank === 1 ? "🥇" : rank === 2 ? "🥈" : rank === 3 ? "🥉" : "";
       return `
-            <div class="leaderboard-item fade-in" style="animation-delay: ${
+            <div class="leaderboard-item${
+              animate ? " fade-in" : ""
+            }" data-player-id="${player.id}" style="animation-delay: ${
               index * 0.05
             }s">
                 <div class="player-info">
@@ -139,12 +240,12 @@ function displayLeaderboard(data) {
         player.name || "Anonymous"
       }</div>
                         <div class="stats-row">
-                            <span><i class="fas fa-gamepad me-1"></i>${
+                            <span><i class="fas fa-gamepad me-1"></i><span class="games-played">${
                               player.games_played
-                            } games</span>
-                            <span><i class="fas fa-chart-line me-1"></i>Avg: ${player.average_score.toFixed(
+                            }</span> games</span>
+                            <span><i class="fas fa-chart-line me-1"></i>Avg: <span class="average-score">${player.average_score.toFixed(
                               1
-                            )}</span>
+                            )}</span></span>
                         </div>
                     </div>
                 </div>
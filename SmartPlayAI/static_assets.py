@@ -0,0 +1,336 @@
+"""
+Fingerprinted, precompressed static assets.
+
+The build step copies every web asset in ``static/`` to ``static/dist/`` under a
+content-hashed name (``leaderboard.js`` -> ``leaderboard.3f9c2a71d0.js``), writes
+``.gz`` and ``.br`` siblings for text
+assets, and records the mapping in ``static/dist/manifest.json``. Relative ``url()``
+references in stylesheets (the vendored Font Awesome webfont) are rewritten to the hashed
+names, so they are cached as immutable too:
+
+    uv run python static_assets.py
+
+When ``ffmpeg`` is on the PATH the build also transcodes every MP3 to low-bitrate
+Opus and AAC (``bg.opus``, ``bg.m4a``) and cuts short loop segments of the
+background track (``bg.loop.opus``); ``--no-audio`` skips this.
+
+Templates link assets with ``{{ asset_url('leaderboard.js') }}`` and audio with the
+``lazy_audio`` macro from ``components/audio.html``, which lists the variants
+(``audio_sources``) and, unless AUDIO_LOADING=eager, defers the download until
+after first paint (``idle``) or the first user gesture (``gesture``). Hashed names are
+served with a one-year immutable ``Cache-Control``, so repeat visits never ask for
+them again; plain ``/static/<name>`` URLs still work and revalidate by ETag. Without
+a build (or when a source file is newer than the manifest) the names are hashed at
+startup and the source files are served uncompressed.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import subprocess
+import tempfile
+from dataclasses import dataclass, field
+from mimetypes import guess_type
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:  # a dependency; gzip siblings only on installs made outside uv.lock
+    brotli = None
+
+BASE_DIR = Path(__file__).resolve().parent
+STATIC_DIR = BASE_DIR / "static"
+BUILD_DIR = STATIC_DIR / "dist"
+STATIC_URL = "/static"
+
+ASSET_SUFFIXES = {".js", ".css", ".svg", ".png", ".jpg", ".ico", ".webp", ".woff2",
+                  ".mp3", ".ogg", ".opus", ".m4a", ".webm"}
+COMPRESSIBLE_SUFFIXES = {".js", ".css", ".svg"}  # audio and images are compressed already
+MIN_COMPRESS_SIZE = 256
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+# url(...) references in stylesheets; data: URIs and absolute URLs are left alone
+_CSS_URL = re.compile(rb"""url\(\s*(['"]?)([^'"()\s]+)\1\s*\)""")
+MEDIA_TYPES = {".opus": "audio/ogg; codecs=opus", ".m4a": "audio/mp4", ".mp3": "audio/mpeg"}
+
+AUDIO_LOADING = os.getenv("AUDIO_LOADING", "idle").lower()  # idle, gesture or eager
+# ffmpeg arguments per variant, smallest first; also the order browsers are offered them
+AUDIO_VARIANTS = {
+    ".opus": ["-c:a", "libopus", "-b:a", "40k", "-vbr", "on"],
+    ".m4a": ["-c:a", "aac", "-b:a", "64k", "-movflags", "+faststart"],
+}
+LOOPED_AUDIO = {"bg.mp3"}   # background tracks that also get a short loop segment
+LOOP_SECONDS = 30
+LOOP_FADE_SECONDS = 0.25    # fade at both ends so the loop point does not click
+
+
+@dataclass
+class Asset:
+    path: Path
+    digest: str
+    media_type: str
+    stat: os.stat_result
+    variants: dict[str, tuple[Path, os.stat_result]] = field(default_factory=dict)
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=5).hexdigest()
+
+
+def _fingerprinted_name(name: str, digest: str) -> str:
+    path = Path(name)
+    return str(path.with_name(f"{path.stem}.{digest}{path.suffix}").as_posix())
+
+
+def _iter_sources(source_dir: Path, build_dir: Path):
+    for path in sorted(source_dir.rglob("*")):
+        if path.is_file() and path.suffix.lower() in ASSET_SUFFIXES and build_dir not in path.parents:
+            yield path.relative_to(source_dir).as_posix(), path
+
+
+def _ffmpeg(source: Path, target: Path, codec_args: list[str], segment: bool = False) -> bool:
+    args = ["ffmpeg", "-y", "-loglevel", "error", "-i", str(source), "-vn", "-map_metadata", "-1"]
+    if segment:
+        fade_out = LOOP_SECONDS - LOOP_FADE_SECONDS
+        args += ["-t", str(LOOP_SECONDS), "-af",
+                 f"afade=t=in:d={LOOP_FADE_SECONDS},afade=t=out:st={fade_out}:d={LOOP_FADE_SECONDS}"]
+    result = subprocess.run(args + codec_args + [str(target)], capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"ffmpeg failed for {target.name}: {result.stderr.strip()}")
+    return result.returncode == 0
+
+
+def transcode_audio(source_dir: Path, work_dir: Path, build_dir: Path = BUILD_DIR) -> list[tuple[str, Path]]:
+    """Opus/AAC variants (and loop segments) of the MP3s in ``source_dir``, as (name, file) pairs."""
+    if shutil.which("ffmpeg") is None:
+        print("ffmpeg not found, skipping audio transcoding (pages fall back to the MP3s)")
+        return []
+    outputs = []
+    for name, path in _iter_sources(source_dir, build_dir):
+        if path.suffix.lower() != ".mp3":
+            continue
+        stem = name[:-len(path.suffix)]
+        jobs = [(f"{stem}{suffix}", args, False) for suffix, args in AUDIO_VARIANTS.items()]
+        if name in LOOPED_AUDIO:
+            jobs += [(f"{stem}.loop{suffix}", args, True) for suffix, args in AUDIO_VARIANTS.items()]
+        for variant, args, segment in jobs:
+            target = work_dir / variant
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if _ffmpeg(path, target, args, segment):
+                outputs.append((variant, target))
+    return outputs
+
+
+def build_assets(source_dir: Path = STATIC_DIR, build_dir: Path = BUILD_DIR,
+                 audio: bool = True) -> dict[str, str]:
+    """Write fingerprinted copies and compressed siblings to ``build_dir``; returns the manifest."""
+    if build_dir.exists():
+        shutil.rmtree(build_dir)
+    build_dir.mkdir(parents=True)
+    with tempfile.TemporaryDirectory() as work_dir:
+        sources = list(_iter_sources(source_dir, build_dir))
+        if audio:
+            sources += transcode_audio(source_dir, Path(work_dir), build_dir)
+        manifest = _write_fingerprinted(sources, build_dir)
+    (build_dir / "manifest.json").write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    return manifest
+
+
+def _rewrite_css_urls(name: str, data: bytes, manifest: dict[str, str]) -> bytes:
+    """Point relative ``url()`` references (fonts, images) at their fingerprinted names."""
+    base = posixpath.dirname(name)
+
+    def replace(match):
+        quote, ref = match.group(1), match.group(2).decode(errors="replace")
+        path, suffix = re.match(r"([^?#]*)(.*)", ref).groups()  # keep ?query and #fragment
+        target = posixpath.normpath(posixpath.join(base, path))
+        if ":" in path or path.startswith("/") or target not in manifest:
+            return match.group(0)
+        hashed = posixpath.relpath(manifest[target], base or ".")
+        return b"url(" + quote + (hashed + suffix).encode() + quote + b")"
+
+    return _CSS_URL.sub(replace, data)
+
+
+def _write_fingerprinted(sources, build_dir: Path) -> dict[str, str]:
+    manifest = {}
+    # Stylesheets last, so the files they reference already have their hashed names
+    for name, path in sorted(sources, key=lambda source: source[1].suffix.lower() == ".css"):
+        data = path.read_bytes()
+        if path.suffix.lower() == ".css":
+            data = _rewrite_css_urls(name, data, manifest)
+        hashed = _fingerprinted_name(name, _digest(data))
+        target = build_dir / hashed
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        manifest[name] = hashed
+
+        if path.suffix.lower() not in COMPRESSIBLE_SUFFIXES or len(data) < MIN_COMPRESS_SIZE:
+            continue
+        variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants[".br"] = brotli.compress(data, quality=11)
+        for suffix, compressed in variants.items():
+            # Not worth a sibling unless it saves at least 10%
+            if len(compressed) < len(data) * 0.9:
+                target.with_name(target.name + suffix).write_bytes(compressed)
+    return manifest
+
+
+class AssetManifest:
+    """Logical asset names -> fingerprinted names, and fingerprinted names -> files to serve."""
+
+    def __init__(self, source_dir: Path = STATIC_DIR, build_dir: Path = BUILD_DIR):
+        self.source_dir = source_dir
+        self.build_dir = build_dir
+        self.urls: dict[str, str] = {}
+        self.files: dict[str, Asset] = {}
+        self.load()
+
+    def _build_is_current(self, manifest_path: Path) -> bool:
+        if not manifest_path.exists():
+            return False
+        built_at = manifest_path.stat().st_mtime
+        return all(path.stat().st_mtime <= built_at
+                   for _, path in _iter_sources(self.source_dir, self.build_dir))
+
+    def load(self) -> None:
+        self.urls.clear()
+        self.files.clear()
+        manifest_path = self.build_dir / "manifest.json"
+        if self._build_is_current(manifest_path):
+            for name, hashed in json.loads(manifest_path.read_text()).items():
+                self._add(name, hashed, self.build_dir / hashed)
+            return
+        if manifest_path.exists():
+            print(f"Static build in {self.build_dir} is older than its sources, "
+                  "serving uncompressed assets (run `python static_assets.py`)")
+        for name, path in _iter_sources(self.source_dir, self.build_dir):
+            self._add(name, _fingerprinted_name(name, _digest(path.read_bytes())), path)
+
+    def _add(self, name: str, hashed: str, path: Path) -> None:
+        digest = Path(hashed).stem.rsplit(".", 1)[-1]
+        media_type = MEDIA_TYPES.get(path.suffix.lower()) or guess_type(name)[0] or "application/octet-stream"
+        asset = Asset(path, digest, media_type, path.stat())
+        for encoding, suffix in _ENCODINGS:
+            sibling = path.with_name(path.name + suffix)
+            if sibling.exists():
+                asset.variants[encoding] = (sibling, sibling.stat())
+        self.urls[name] = hashed
+        self.files[hashed] = asset
+
+    def url(self, name: str) -> str:
+        return f"{STATIC_URL}/{self.urls.get(name, name)}"
+
+    def audio_sources(self, name: str, loop: bool = False) -> list[tuple[str, str]]:
+        """``(url, type)`` of the built variants of an audio file, smallest first, the original last."""
+        stem, suffix = os.path.splitext(name)
+
+        def built(names):
+            return [(self.url(n), MEDIA_TYPES[os.path.splitext(n)[1]]) for n in names if n in self.urls]
+
+        # A loop segment stands in for the whole track
+        variants = loop and built(f"{stem}.loop{s}" for s in AUDIO_VARIANTS) or \
+            built(f"{stem}{s}" for s in AUDIO_VARIANTS)
+        return variants + [(self.url(name), MEDIA_TYPES.get(suffix.lower()) or guess_type(name)[0] or "")]
+
+
+def accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0 and token.strip():
+            accepted.add(token.strip().lower())
+    return accepted
+
+
+class AssetStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves fingerprinted names from the manifest with immutable
+    caching and a precompressed sibling when the client accepts it. Range requests
+    get the uncompressed file. Anything else falls back to plain StaticFiles.
+    """
+
+    def __init__(self, manifest: "AssetManifest", **kwargs):
+        super().__init__(directory=str(manifest.source_dir), **kwargs)
+        self.manifest = manifest
+
+    async def get_response(self, path: str, scope) -> Response:
+        asset = self.manifest.files.get(path.replace(os.sep, "/"))
+        if asset is None:
+            response = await super().get_response(path, scope)
+            response.headers.setdefault("cache-control", REVALIDATE)
+            return response
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+
+        request_headers = Headers(scope=scope)
+        file_path, stat_result, encoding = asset.path, asset.stat, None
+        if asset.variants and "range" not in request_headers:
+            accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+            for name, _ in _ENCODINGS:
+                if name in accepted and name in asset.variants:
+                    (file_path, stat_result), encoding = asset.variants[name], name
+                    break
+
+        etag = f"{asset.digest}-{encoding}" if encoding else asset.digest
+        headers = {"cache-control": IMMUTABLE, "etag": f'"{etag}"'}
+        if asset.variants:
+            headers["vary"] = "Accept-Encoding"
+        if encoding:
+            headers["content-encoding"] = encoding
+        response = FileResponse(file_path, stat_result=stat_result, media_type=asset.media_type,
+                                headers=headers)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+# One manifest per process, shared by the /static mount and the templates
+assets = AssetManifest()
+
+
+def asset_url(name: str) -> str:
+    """Jinja helper: the cache-busting URL of a file in static/."""
+    return assets.url(name)
+
+
+def audio_sources(name: str, loop: bool = False) -> list[tuple[str, str]]:
+    """Jinja helper: ``<source>`` URLs and types for an audio file, preferred first."""
+    return assets.audio_sources(name, loop)
+
+
+# Installed on every Jinja2Templates environment
+template_globals = {"asset_url": asset_url, "audio_sources": audio_sources, "audio_loading": AUDIO_LOADING}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fingerprint and precompress static assets.")
+    parser.add_argument("--source", type=Path, default=STATIC_DIR)
+    parser.add_argument("--out", type=Path, default=BUILD_DIR)
+    parser.add_argument("--no-audio", action="store_true", help="skip Opus/AAC transcoding")
+    args = parser.parse_args()
+    manifest = build_assets(args.source, args.out, audio=not args.no_audio)
+    for name, hashed in manifest.items():
+        siblings = [s for _, s in _ENCODINGS if (args.out / (hashed + s)).exists()]
+        print(f"{name} -> {hashed} {' '.join(siblings)}")
+    if brotli is None:
+        print("brotli not installed, wrote gzip siblings only")
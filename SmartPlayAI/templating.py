@@ -0,0 +1,69 @@
+"""
+The one Jinja2 environment every router renders with.
+
+Templates are compiled once per process and shared instead of being cached separately
+by each router. Compiled bytecode is also written to TEMPLATE_CACHE_DIR (default
+``.template_cache`` next to this file), so a new worker process loads it instead of
+parsing and compiling every template again. The Docker build fills the cache:
+
+    uv run python templating.py
+
+``warm_up()`` runs at startup and loads every template before the first request. In
+production (RAILWAY_ENVIRONMENT_NAME=production) templates are not checked for changes
+on disk; TEMPLATE_AUTO_RELOAD=true/false overrides this.
+"""
+import os
+import time
+from pathlib import Path
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from static_assets import template_globals
+
+BASE_DIR = Path(__file__).resolve().parent
+TEMPLATES_DIR = BASE_DIR / "templates"
+CACHE_DIR = Path(os.getenv("TEMPLATE_CACHE_DIR", BASE_DIR / ".template_cache"))
+
+IS_PRODUCTION = os.getenv("RAILWAY_ENVIRONMENT_NAME", "development") == "production"
+AUTO_RELOAD = os.getenv("TEMPLATE_AUTO_RELOAD", str(not IS_PRODUCTION)).lower() in ("1", "true", "yes", "on")
+
+
+def _bytecode_cache(directory: Path) -> FileSystemBytecodeCache | None:
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        pass
+    if not os.access(directory, os.W_OK):
+        print(f"Template cache {directory} is not writable, compiling templates in memory only")
+        return None
+    return FileSystemBytecodeCache(str(directory))
+
+
+def create_environment(templates_dir: Path = TEMPLATES_DIR, cache_dir: Path | None = CACHE_DIR,
+                       auto_reload: bool = AUTO_RELOAD) -> Environment:
+    env = Environment(
+        loader=FileSystemLoader(str(templates_dir)),
+        autoescape=True,  # as Jinja2Templates does
+        auto_reload=auto_reload,
+        bytecode_cache=_bytecode_cache(cache_dir) if cache_dir is not None else None,
+    )
+    env.globals.update(template_globals)
+    return env
+
+
+def warm_up(env: Environment) -> tuple[int, float]:
+    """Load (and compile, unless the bytecode cache has them) every template; returns count and seconds."""
+    start = time.perf_counter()
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    return len(names), time.perf_counter() - start
+
+
+templates = Jinja2Templates(env=create_environment())
+
+
+if __name__ == "__main__":
+    count, seconds = warm_up(templates.env)
+    print(f"Compiled {count} templates into {CACHE_DIR} in {seconds * 1000:.0f}ms")
@@ -4,13 +4,18 @@
 
 import pytest
 import pytest_asyncio
+from contextlib import contextmanager
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 from sqlalchemy.engine import make_url
 from main import app
 from model.models import Base
-from model.database import get_session as get_db
+from model.database import get_session as get_db, get_read_session
+from query_audit import count_queries
+from near_duplicates import question_index
+from answer_similarity import answer_cache
+from response_cache import data_version
 
 # Use SQLite in-memory database for testing
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -37,6 +42,10 @@ TestSessionLocal = sessionmaker(
 @pytest_asyncio.fixture(scope="function")
 async def db_session():
     """Create a fresh database session for each test."""
+    # The near-duplicate and answer indexes are per process, forget the previous test's data
+    question_index.clear()
+    answer_cache.clear()
+    data_version.bump()
     # Create all tables
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -66,6 +75,7 @@ def client(db_session):
 
     # use the test db session in the app for testing
     app.dependency_overrides[get_db] = db_session_yield
+    app.dependency_overrides[get_read_session] = db_session_yield
 
     # Create TestClient
     with TestClient(app) as test_client:
@@ -75,6 +85,23 @@ def client(db_session):
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def assert_max_queries():
+    """
+    Fail the test when the block runs more SQL statements than allowed, or repeats
+    the same statement shape more than max_repeats times (an N+1 pattern).
+
+        with assert_max_queries(2):
+            client.get("/leaderboard")
+    """
+    @contextmanager
+    def _assert_max_queries(limit: int, max_repeats: int = 1):
+        with count_queries(engine, max_statements=limit, max_repeats=max_repeats) as audit:
+            yield audit
+        assert not audit.problems(), audit.report()
+    return _assert_max_queries
+
+
 # Configure asyncio event loop for pytest: the scheduler and traffic controller for async tasks for the whole session
 @pytest.fixture(scope="session")
 def event_loop():
@@ -1,4 +1,6 @@
+import re
 import uuid
+from pathlib import Path
 
 import pytest
 from fastapi.testclient import TestClient
@@ -187,3 +189,670 @@ def test_leaderboard_details_returns_data(client: TestClient, monkeypatch):
     assert entry["question_text"] == question["question_text"]
     assert entry["response_text"] == payload["response_text"]
     assert entry["score"] == 3
+
+
+def test_cohort_reset_requires_admin(client: TestClient, monkeypatch):
+    """Only players listed in ADMIN_USERNAMES may reset a cohort."""
+    from router.authenticate import get_current_user_from_cookie
+    from model import schemas
+
+    payload = {"player_ids": [1, 2]}
+    assert client.post("/players/responses/reset", json=payload).status_code == 401
+
+    client.app.dependency_overrides[get_current_user_from_cookie] = lambda: schemas.PlayerRead(
+        id=1, name="player_one", score=0)
+    assert client.post("/players/responses/reset", json=payload).status_code == 403
+
+    monkeypatch.setattr("router.authenticate.ADMIN_USERNAMES", {"player_one"})
+    response = client.post("/players/responses/reset", json=payload)
+    assert response.status_code == 200
+    assert response.json()["total_deleted"] == 0
+
+
+def test_metrics_endpoint_reports_routes_and_queries(client: TestClient):
+    """/metrics exposes request latency by route template and query latency by crud function."""
+    from metrics import instrument_engine
+    from tests.conftest import engine
+
+    leaderboard_count = re.compile(
+        r'^smartplay_http_request_duration_seconds_count\{method="GET",route="/leaderboard",status="2xx"\} (\d+)$',
+        re.MULTILINE)
+
+    def leaderboard_requests(body: str) -> int:
+        match = leaderboard_count.search(body)
+        return int(match.group(1)) if match else 0
+
+    instrument_engine(engine, "test")
+    before = leaderboard_requests(client.get("/metrics").text)
+    assert client.get("/leaderboard").status_code == 200
+    assert client.get("/players/id/999").status_code == 404
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    # Other tests hit /leaderboard too, so compare with the reading taken before the request
+    assert leaderboard_requests(body) == before + 1
+    assert 'route="/players/id/{player_id}",status="4xx"' in body
+    assert 'smartplay_db_query_duration_seconds_count{function="get_leaderboard"}' in body
+
+
+@pytest.mark.asyncio
+async def test_failed_statement_does_not_skew_query_latency():
+    import asyncio
+
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from metrics import DB_QUERY_DURATION, instrument_engine
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument_engine(engine, "failing")
+    latency = DB_QUERY_DURATION.labels("other")
+    async with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            await conn.execute(text("SELECT * FROM no_such_table"))
+        await asyncio.sleep(0.3)
+        before = latency.sum
+        await conn.execute(text("SELECT 1"))
+        # Timed from its own start, not from the failed statement's
+        assert latency.sum - before < 0.3
+        assert "query_start" not in conn.sync_connection.info
+    await engine.dispose()
+
+
+def test_llm_theme_label_is_bounded():
+    from metrics import theme_label
+
+    assert [theme_label(t) for t in ("survival", "work", "interview")] == ["survival", "work", "interview"]
+    assert theme_label(None) == theme_label("") == "none"
+    assert theme_label("x" * 500) == theme_label("Survival") == "other"
+
+
+def test_query_budget_per_endpoint(client: TestClient, assert_max_queries):
+    """Read endpoints stay within a fixed statement budget regardless of data size."""
+    client.post(
+        "/auth/register",
+        data={"username": f"budget_{uuid.uuid4().hex[:8]}", "password1": "testpassword", "password2": "testpassword"},
+    )
+    player_id = client.get("/leaderboard").json()[0]["id"]
+    for text in ("Your manager cuts the budget in half.", "A client asks for a refund.",
+                 "Two teammates argue in a meeting."):
+        _create_question(client, "work", text)
+
+    with assert_max_queries(1):
+        client.get("/leaderboard")
+    with assert_max_queries(1):
+        client.get(f"/players/{player_id}/responses")
+
+
+def test_query_audit_flags_repeated_statements():
+    """The audit reports statement shapes executed more often than allowed."""
+    from query_audit import QueryAudit
+
+    audit = QueryAudit(max_statements=10, max_repeats=2)
+    for _ in range(3):
+        audit.record("SELECT * FROM responses WHERE player_id = ?")
+    audit.record("SELECT * FROM players WHERE id IN (?, ?, ?)")
+    audit.record("SELECT * FROM players WHERE id IN (?)")
+
+    issues = audit.problems()
+    assert len(issues) == 1
+    assert "repeated 3x" in issues[0]
+    assert audit.shapes["SELECT * FROM players WHERE id IN (...)"] == 2
+
+
+def test_player_detail_loads_history_on_demand(client: TestClient):
+    """The profile page renders the summary only; history and feedback come from HTMX partials."""
+    client.post(
+        "/auth/register",
+        data={"username": f"detail_{uuid.uuid4().hex[:8]}", "password1": "testpassword", "password2": "testpassword"},
+    )
+    player_id = client.get("/leaderboard").json()[0]["id"]
+    question = _create_question(client, "work", "A teammate ignores your messages. What now?")
+    client.post("/responses/create", json={
+        "player_id": player_id, "question_id": question["id"],
+        "response_text": "I ask to meet in person.", "score": 4, "llm_feedback": "Direct and kind.",
+    })
+
+    page = client.get(f"/players/id/{player_id}")
+    assert page.status_code == 200
+    assert f"/players/{player_id}/history?theme=work" in page.text
+    assert "Direct and kind." not in page.text
+
+    history = client.get(f"/players/{player_id}/history", params={"theme": "work"})
+    assert history.status_code == 200
+    assert "I ask to meet in person." in history.text
+    assert "Load more" not in history.text
+
+    feedback = client.get(f"/players/{player_id}/history/{question['id']}/feedback")
+    assert "Direct and kind." in feedback.text
+    assert client.get(f"/players/{player_id}/history", params={"cursor": "garbage"}).status_code == 400
+
+
+def test_random_questions_api_filters_by_severity_and_subcategory(client: TestClient):
+    """Severity/subcategory filters narrow the random sample; repeated values are OR-ed."""
+    for severity, subcategory, text in [
+        ("critical", "outage", "The payment API is down during a sale."),
+        ("high", "outage", "Search has been failing for an hour."),
+        ("gradual", "morale", "The team keeps skipping retrospectives."),
+        ("critical", "morale", "Two senior engineers resign on the same day."),
+    ]:
+        client.post("/questions/create", data={
+            "theme": "crisis", "question_text": text,
+            "severity": severity, "subcategory": subcategory,
+        }).raise_for_status()
+
+    response = client.get("/questions/random/api",
+                          params={"theme": "crisis", "user_id": 0, "severity": "critical"})
+    assert response.status_code == 200
+    questions = response.json()["questions"]
+    assert sorted(q["subcategory"] for q in questions) == ["morale", "outage"]
+    assert {q["severity"] for q in questions} == {"critical"}
+
+    response = client.get("/questions/random/api", params=[
+        ("theme", "crisis"), ("user_id", 0), ("severity", "critical"),
+        ("severity", "high"), ("subcategory", "outage")])
+    assert sorted(q["severity"] for q in response.json()["questions"]) == ["critical", "high"]
+
+    response = client.get("/questions/random/api",
+                          params={"theme": "crisis", "user_id": 0, "subcategory": "budget"})
+    assert response.status_code == 404
+
+
+def test_create_question_rejects_near_duplicate(client: TestClient):
+    """A reworded copy of a stored question is refused with the stored question's id."""
+    text = "You fall into icy water while crossing a frozen lake. What do you do first?"
+    original = _create_question(client, "survival", text)
+    reworded = client.post("/questions/create", data={
+        "theme": "survival",
+        "question_text": "While crossing a frozen lake you fall into the icy water. What do you do first?"})
+    different = _create_question(
+        client, "survival", "A bear wanders into your campsite at night. How do you react?")
+
+    assert reworded.status_code == 409
+    assert reworded.json()["detail"]["duplicate_of"] == original["id"]
+    assert different["id"] != original["id"]
+    # The exact text again is not a conflict: the stored question comes back
+    assert _create_question(client, "survival", text)["id"] == original["id"]
+
+
+def test_generate_question_form_does_not_offer_a_known_duplicate(client: TestClient, monkeypatch):
+    """When every generated question repeats a stored one, the form offers a retry instead."""
+    import main
+
+    stored = {theme: f"A {theme} scenario you have already answered. What do you do first?"
+              for theme in main.THEMES}
+    for theme, text in stored.items():
+        _create_question(client, theme, text)
+    calls = []
+    monkeypatch.setattr(main, "generate_question", lambda theme: calls.append(theme) or stored[theme])
+
+    page = client.get("/generate_question")
+    assert page.status_code == 200 and len(calls) == main.GENERATE_ATTEMPTS
+    assert "Please try again" in page.text and stored[calls[0]] not in page.text
+    assert 'hx-post="/questions/create"' not in page.text
+
+
+def test_fingerprinted_assets_are_immutable_and_precompressed(tmp_path):
+    """Hashed asset URLs get immutable caching, gzip siblings, ETag 304s and byte ranges."""
+    from starlette.applications import Starlette
+    from starlette.routing import Mount
+    from static_assets import AssetManifest, AssetStaticFiles, IMMUTABLE, build_assets
+
+    source = tmp_path / "static"
+    source.mkdir()
+    (source / "app.css").write_text("body { color: #212529; }\n" * 40)
+    (source / "tune.mp3").write_bytes(bytes(range(256)) * 8)
+    build_assets(source, source / "dist")
+    manifest = AssetManifest(source, source / "dist")
+    app = Starlette(routes=[Mount("/static", AssetStaticFiles(manifest))])
+    static_client = TestClient(app)
+
+    css_url = manifest.url("app.css")
+    assert css_url.startswith("/static/app.") and css_url != "/static/app.css"
+    response = static_client.get(css_url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["cache-control"] == IMMUTABLE
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"].startswith("text/css")
+    assert response.text == (source / "app.css").read_text()
+
+    revalidated = static_client.get(css_url, headers={"Accept-Encoding": "gzip",
+                                                      "If-None-Match": response.headers["etag"]})
+    assert revalidated.status_code == 304
+
+    partial = static_client.get(manifest.url("tune.mp3"), headers={"Range": "bytes=0-99"})
+    assert partial.status_code == 206 and len(partial.content) == 100
+    assert "content-encoding" not in partial.headers
+
+    # Unhashed URLs keep working but revalidate every time
+    assert static_client.get("/static/app.css").headers["cache-control"] == "no-cache"
+
+
+def test_pages_link_fingerprinted_assets(client: TestClient):
+    from static_assets import asset_url
+
+    html = client.get("/questions/leaderboard").text
+    assert asset_url("leaderboard.js") in html and asset_url("controls.js") in html
+    # The shared scripts are part of <head>, nothing sits between it and <body>
+    head, _, rest = html.partition("</head>")
+    assert asset_url("controls.js") in head and asset_url("lazy_audio.js") in head
+    assert rest.lstrip().startswith("<body")
+    response = client.get(asset_url("leaderboard.js"))
+    assert response.status_code == 200 and "immutable" in response.headers["cache-control"]
+
+
+def test_vendored_bundle_replaces_cdns(client: TestClient, tmp_path):
+    """Pages load Bootstrap, Font Awesome and HTMX from /static, and built stylesheets point at hashed fonts."""
+    from static_assets import STATIC_DIR, asset_url, build_assets
+
+    templates_dir = Path(__file__).resolve().parent.parent / "templates"
+    for template in templates_dir.rglob("*.html"):
+        assert not re.search(r"cdn\.jsdelivr|cdnjs\.cloudflare|unpkg\.com", template.read_text()), template.name
+
+    html = client.get("/questions/leaderboard").text
+    for name in ["vendor/bootstrap.min.css", "vendor/fontawesome/css/fontawesome-solid.min.css",
+                 "vendor/htmx.min.js", "vendor/bootstrap.bundle.min.js"]:
+        assert asset_url(name) in html
+
+    manifest = build_assets(STATIC_DIR, tmp_path / "dist", audio=False)
+    css = (tmp_path / "dist" / manifest["vendor/fontawesome/css/fontawesome-solid.min.css"]).read_text()
+    font = Path(manifest["vendor/fontawesome/webfonts/fa-solid-900.woff2"]).name
+    assert f"url(../webfonts/{font})" in css
+
+
+def test_lazy_audio_lists_variants_and_defers_download(tmp_path):
+    """Audio tags offer Opus/AAC loop segments before the MP3 and only carry data-src until loaded."""
+    from jinja2 import Environment, FileSystemLoader
+    from static_assets import AssetManifest, build_assets
+
+    source = tmp_path / "static"
+    source.mkdir()
+    # Stand-ins for the ffmpeg outputs, which the build fingerprints like any other asset
+    for name in ["bg.mp3", "bg.loop.opus", "bg.loop.m4a", "countdown.mp3"]:
+        (source / name).write_bytes(name.encode() * 64)
+    build_assets(source, source / "dist", audio=False)
+    manifest = AssetManifest(source, source / "dist")
+
+    sources = manifest.audio_sources("bg.mp3", loop=True)
+    assert [t for _, t in sources] == ["audio/ogg; codecs=opus", "audio/mp4", "audio/mpeg"]
+    assert manifest.audio_sources("countdown.mp3") == [(manifest.url("countdown.mp3"), "audio/mpeg")]
+
+    def render(audio_loading):
+        env = Environment(loader=FileSystemLoader(str(Path(__file__).resolve().parent.parent / "templates")))
+        env.globals.update(audio_sources=manifest.audio_sources, audio_loading=audio_loading)
+        return env.from_string('{% from "components/audio.html" import lazy_audio %}'
+                               '{{ lazy_audio("bgMusic", "bg.mp3", loop=true) }}').render()
+
+    html = render("idle")
+    assert 'preload="none"' in html and 'data-audio-load="idle"' in html
+    assert f'data-src="{manifest.url("bg.loop.opus")}"' in html and " src=" not in html
+
+    html = render("eager")
+    assert 'preload="auto"' in html and f'src="{manifest.url("bg.loop.opus")}"' in html
+
+
+def test_templates_share_one_environment_with_bytecode_cache(tmp_path):
+    """Every router renders with the same environment, and a new process loads compiled templates from disk."""
+    import main
+    from router import authenticate, players, questions
+    from templating import create_environment, warm_up
+
+    assert {id(m.templates.env) for m in (main, authenticate, players, questions)} == {id(main.templates.env)}
+
+    count, _ = warm_up(create_environment(cache_dir=tmp_path, auto_reload=False))
+    assert count >= 8 and len(list(tmp_path.glob("*.cache"))) == count
+
+    fresh = create_environment(cache_dir=tmp_path, auto_reload=False)
+    compiled = []
+    original_compile = fresh.compile
+    fresh.compile = lambda *args, **kwargs: compiled.append(args) or original_compile(*args, **kwargs)
+    warm_up(fresh)
+    assert compiled == [] and not fresh.auto_reload
+
+
+def test_response_cache_serves_304_until_data_version_changes():
+    """Polled JSON is computed once per data version; revalidation gets 304 until a write bumps it."""
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+    from response_cache import ResponseCacheMiddleware, data_version
+
+    rows, calls = [{"name": "ada", "score": 3}], []
+
+    async def leaderboard(request):
+        calls.append(request.query_params.get("theme"))
+        return JSONResponse(rows)
+
+    app = Starlette(routes=[Route("/leaderboard", leaderboard)])
+    app.add_middleware(ResponseCacheMiddleware, paths=["/leaderboard"], ttl=60)
+    cached_client = TestClient(app)
+
+    first = cached_client.get("/leaderboard?theme=work&x=1")
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"') and "stale-while-revalidate" in first.headers["cache-control"]
+    # Same query in another order is the same entry, served without calling the endpoint
+    assert cached_client.get("/leaderboard?x=1&theme=work").json() == rows and len(calls) == 1
+    assert cached_client.get("/leaderboard?theme=work&x=1", headers={"If-None-Match": etag}).status_code == 304
+
+    rows.append({"name": "bob", "score": 1})
+    data_version.bump()
+    changed = cached_client.get("/leaderboard?theme=work&x=1", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag and len(changed.json()) == 2
+
+    # A client that just wrote always gets a freshly computed, privately cached response
+    calls.clear()
+    fresh = cached_client.get("/leaderboard?theme=work&x=1", headers={"Cookie": "last_write_at=1"})
+    assert calls == ["work"] and fresh.headers["cache-control"] == "private, no-cache"
+
+
+def test_leaderboard_endpoints_answer_conditional_requests(client: TestClient):
+    first = client.get("/leaderboard")
+    assert first.status_code == 200 and first.headers["cache-control"].startswith("public, max-age=")
+    assert client.get("/leaderboard", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+    assert client.get("/responses/feedback").headers["etag"].startswith('W/"')
+
+
+@pytest.mark.asyncio
+async def test_live_leaderboard_snapshot_then_deltas_and_replay():
+    from live_leaderboard import LeaderboardChannel
+
+    channel = LeaderboardChannel(replay=3, backlog=2)
+    snapshots = []
+
+    async def snapshot():
+        snapshots.append(channel.seq)
+        return [{"id": 1, "score": 3}]
+
+    epoch = channel.epoch.encode()
+    stream = channel.stream(snapshot)
+    assert (await anext(stream)).startswith(b"retry:")
+    assert (await anext(stream)) == b'id: ' + epoch + b':0\nevent: snapshot\ndata: {"board":[{"id":1,"score":3}]}\n\n'
+    channel.publish({"id": 1, "score": 5})
+    channel.publish({"id": 2, "score": 4})
+    # Deltas queued meanwhile go out together, each with its own id
+    assert (await anext(stream)) == (b'id: ' + epoch + b':1\nevent: delta\ndata: {"id":1,"score":5}\n\n'
+                                     b'id: ' + epoch + b':2\nevent: delta\ndata: {"id":2,"score":4}\n\n')
+    # A client that stops reading is dropped once its backlog is full
+    for score in (6, 7, 8):
+        channel.publish({"id": 1, "score": score})
+    assert channel.subscribers and [frame async for frame in stream] == []
+    assert not channel.subscribers
+
+    # Reconnecting with Last-Event-ID replays from the buffer without a snapshot
+    resumed = channel.stream(snapshot, last_event_id=f"{channel.epoch}:3")
+    await anext(resumed)
+    assert b"id: " + epoch + b":4\n" in await anext(resumed) and snapshots == [0]
+    await resumed.aclose()
+    # Further behind than the buffer (or an unknown id): a new snapshot
+    for last_event_id in (f"{channel.epoch}:1", f"{channel.epoch}:99", "5", "junk"):
+        behind = channel.stream(snapshot, last_event_id=last_event_id)
+        await anext(behind)
+        assert b"event: snapshot" in await anext(behind)
+        await behind.aclose()
+    assert snapshots == [0, 5, 5, 5, 5]
+
+
+@pytest.mark.asyncio
+async def test_live_leaderboard_resume_on_another_worker_gets_a_snapshot():
+    from live_leaderboard import LeaderboardChannel
+
+    async def snapshot():
+        return []
+
+    # Two workers, each numbering its own deltas
+    first, second = LeaderboardChannel(), LeaderboardChannel()
+    assert first.epoch != second.epoch
+    for channel in (first, second):
+        for score in (1, 2, 3):
+            channel.publish({"id": 1, "score": score})
+
+    # Same, lower and higher sequence numbers than the second worker's: never replayed
+    for seq in (3, 1, 4):
+        stream = second.stream(snapshot, last_event_id=f"{first.epoch}:{seq}")
+        await anext(stream)
+        assert (await anext(stream)).startswith(f"id: {second.epoch}:3\nevent: snapshot".encode())
+        await stream.aclose()
+
+
+def test_compression_middleware_allowlist_threshold_and_streaming():
+    import gzip
+    from starlette.applications import Starlette
+    from starlette.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+    from starlette.routing import Route
+    from compression import CompressionMiddleware
+
+    page = "<p>" + "Stay calm and find shelter before dark. " * 100 + "</p>"
+
+    async def chunks():
+        for i in range(3):
+            yield f"<li>chunk {i} {'x' * 500}</li>".encode()
+
+    app = Starlette(routes=[
+        Route("/page", lambda request: HTMLResponse(page)),
+        Route("/small", lambda request: JSONResponse({"score": 3})),
+        Route("/song.mp3", lambda request: Response(b"\xff\xfb" * 2000, media_type="audio/mpeg")),
+        Route("/precompressed", lambda request: Response(
+            gzip.compress(page.encode()), media_type="text/html", headers={"content-encoding": "gzip"})),
+        Route("/stream", lambda request: StreamingResponse(chunks(), media_type="text/html")),
+    ])
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    client = TestClient(app)
+    gzip_only = {"Accept-Encoding": "gzip"}
+
+    compressed = client.get("/page", headers=gzip_only)
+    assert compressed.headers["content-encoding"] == "gzip" and compressed.headers["vary"] == "Accept-Encoding"
+    assert int(compressed.headers["content-length"]) < len(page) // 10 and compressed.text == page
+    assert "content-encoding" not in client.get("/page", headers={"Accept-Encoding": "identity"}).headers
+    assert "content-encoding" not in client.get("/small", headers=gzip_only).headers
+    assert "content-encoding" not in client.get("/song.mp3", headers=gzip_only).headers
+    assert client.get("/precompressed", headers=gzip_only).text == page
+
+    streamed = client.get("/stream", headers=gzip_only)
+    assert streamed.headers["content-encoding"] == "gzip" and "content-length" not in streamed.headers
+    assert streamed.text == "".join(f"<li>chunk {i} {'x' * 500}</li>" for i in range(3))
+
+
+def test_forwarded_headers_trusted_only_from_allowlisted_proxies():
+    from starlette.applications import Starlette
+    from starlette.middleware.base import BaseHTTPMiddleware
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+    from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+    from main import app
+
+    # Every middleware of the app is pure ASGI; forwarded headers are the server's job
+    assert not any(m.cls is BaseHTTPMiddleware for m in app.user_middleware)
+
+    async def whoami(request):
+        return JSONResponse([request.url.scheme, request.client.host])
+
+    # The layer uvicorn runs in front of the app with proxy_headers and forwarded_allow_ips
+    echo = ProxyHeadersMiddleware(Starlette(routes=[Route("/", whoami)]), trusted_hosts="10.0.0.0/8")
+    headers = {"X-Forwarded-Proto": "https", "X-Forwarded-For": "203.0.113.7"}
+    assert TestClient(echo, client=("10.1.2.3", 50000)).get("/", headers=headers).json() == ["https", "203.0.113.7"]
+    assert TestClient(echo, client=("192.0.2.1", 50000)).get("/", headers=headers).json() == ["http", "192.0.2.1"]
+
+
+@pytest.mark.parametrize("environment", ["development", "production"])
+def test_main_runs_uvicorn_with_the_proxy_allowlist(monkeypatch, environment):
+    import runpy
+
+    import uvicorn
+
+    import launcher
+    import main
+
+    calls = []
+    monkeypatch.setattr(uvicorn, "run", lambda app, **options: calls.append(options))
+    monkeypatch.setattr(launcher, "serve", lambda app, **options: calls.append(options) or 0)
+    monkeypatch.setenv("RAILWAY_ENVIRONMENT_NAME", environment)
+    monkeypatch.setenv("FORWARDED_ALLOW_IPS", "10.0.0.0/8")
+    try:
+        runpy.run_path(main.__file__, run_name="__main__")
+    except SystemExit as e:
+        assert environment == "production" and e.code == 0
+
+    assert len(calls) == 1
+    assert calls[0]["proxy_headers"] is True and calls[0]["forwarded_allow_ips"] == "10.0.0.0/8"
+
+
+def test_launcher_workers_trust_only_the_allowlisted_proxies(monkeypatch, capsys):
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    import launcher
+    import main
+
+    async def whoami(request):
+        return JSONResponse([request.url.scheme, request.client.host])
+
+    echo = Starlette(routes=[Route("/", whoami)])
+    headers = {"X-Forwarded-Proto": "https", "X-Forwarded-For": "203.0.113.7"}
+
+    # Default: only a proxy on the same host
+    assert main.FORWARDED_ALLOW_IPS == "127.0.0.1"
+    worker_app = launcher.build_config(echo, "127.0.0.1", 0, **main.server_options()).loaded_app
+    assert TestClient(worker_app, client=("127.0.0.1", 50000)).get("/", headers=headers).json() == ["https", "203.0.113.7"]
+    assert TestClient(worker_app, client=("10.1.2.3", 50000)).get("/", headers=headers).json() == ["http", "10.1.2.3"]
+    assert "WARNING" not in capsys.readouterr().out
+
+    monkeypatch.setattr(main, "FORWARDED_ALLOW_IPS", "*")
+    worker_app = launcher.build_config(echo, "127.0.0.1", 0, **main.server_options()).loaded_app
+    assert "FORWARDED_ALLOW_IPS=*" in capsys.readouterr().out
+    assert TestClient(worker_app, client=("192.0.2.1", 50000)).get("/", headers=headers).json() == ["https", "203.0.113.7"]
+
+
+@pytest.mark.asyncio
+async def test_worker_shutdown_ends_live_leaderboard_streams(monkeypatch):
+    import uvicorn
+
+    import launcher
+    from live_leaderboard import LeaderboardChannel
+
+    channel = LeaderboardChannel()
+    monkeypatch.setattr(launcher, "leaderboard_channel", channel)
+
+    async def snapshot():
+        return []
+
+    stream = channel.stream(snapshot)
+    await anext(stream)
+    await anext(stream)
+    server = launcher.WorkerServer(uvicorn.Config(lambda scope, receive, send: None, timeout_graceful_shutdown=1))
+    server.servers, server.force_exit = [], True  # never started listening or ran the lifespan
+    await server.shutdown()
+    # The stream ends instead of holding the drain until the graceful timeout
+    assert [frame async for frame in stream] == [] and channel.closed
+
+
+WORKER_SCRIPT = '''
+import asyncio
+import os
+import sys
+
+import launcher
+
+
+async def app(scope, receive, send):
+    if scope["path"] == "/slow":
+        await asyncio.sleep(1.5)
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": str(os.getpid()).encode()})
+
+
+sys.exit(launcher.serve(app, host="127.0.0.1", port=int(sys.argv[1]), workers=2,
+                        graceful_timeout=10, lifespan="off", log_level="warning"))
+'''
+
+
+def test_launcher_forks_workers_and_drains_them_on_sigterm(tmp_path):
+    import os
+    import signal
+    import socket
+    import subprocess
+    import sys
+    import threading
+    import time
+
+    import httpx
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    script = tmp_path / "serve.py"
+    script.write_text(WORKER_SCRIPT)
+    root = Path(__file__).resolve().parent.parent
+    env = {**os.environ, "PYTHONPATH": str(root)}
+    master = subprocess.Popen([sys.executable, str(script), str(port)], cwd=root, env=env,
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(f"{url}/", timeout=1)
+                break
+            except httpx.TransportError:
+                assert master.poll() is None and time.monotonic() < deadline
+                time.sleep(0.1)
+        children = Path(f"/proc/{master.pid}/task/{master.pid}/children").read_text().split()
+        assert len(children) == 2
+
+        slow = {}
+        request = threading.Thread(target=lambda: slow.update(response=httpx.get(f"{url}/slow", timeout=10)))
+        request.start()
+        time.sleep(0.5)  # the request is in flight on a worker
+        master.send_signal(signal.SIGTERM)
+        request.join()
+        # The in-flight request finishes before the workers exit, then the launcher exits cleanly
+        assert slow["response"].status_code == 200 and slow["response"].text in children
+        assert master.wait(timeout=20) == 0
+        assert not any(Path(f"/proc/{pid}").exists() for pid in children)
+        assert "all workers stopped" in master.stdout.read()
+    finally:
+        if master.poll() is None:
+            master.kill()
+            master.wait()
+
+
+def test_metrics_are_summed_across_workers(monkeypatch, tmp_path):
+    import os
+
+    import metrics
+
+    def worker_registry():
+        registry = metrics.Registry()
+        requests = metrics.Counter("test_requests_total", "Requests.", ["route"], registry=registry)
+        latency = metrics.Histogram("test_latency_seconds", "Latency.", buckets=(0.1, 1.0), registry=registry)
+        return registry, requests, latency
+
+    monkeypatch.setattr(metrics, "shared_dir", str(tmp_path))
+    own_pid = os.getpid()
+
+    # Another worker publishes its state...
+    other, requests, latency = worker_registry()
+    requests.labels("/a").inc(2)
+    latency.observe(0.05)
+    monkeypatch.setattr(metrics.os, "getpid", lambda: own_pid + 1)
+    metrics.publish(other)
+    monkeypatch.setattr(metrics.os, "getpid", lambda: own_pid)
+
+    # ...and this one answers the scrape with its live state added
+    registry, requests, latency = worker_registry()
+    requests.labels("/a").inc()
+    requests.labels("/b").inc()
+    latency.observe(0.5)
+    metrics.publish(registry)  # its own published copy is not counted twice
+    text = registry.render(metrics._other_workers())
+    assert 'test_requests_total{route="/a"} 3' in text
+    assert 'test_requests_total{route="/b"} 1' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="1.0"} 2' in text
+    assert "test_latency_seconds_count 2" in text
+
+    metrics.forget_worker(own_pid + 1)
+    text = registry.render(metrics._other_workers())
+    assert 'test_requests_total{route="/a"} 1' in text and "test_latency_seconds_count 1" in text
@@ -0,0 +1,101 @@
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from fetchLLMresponse import EVALUATION_SCHEMA, evaluate_player_response
+from verdict_parser import VerdictExtractor, extract_verdict
+
+CORPUS = [json.loads(line) for line in
+          (Path(__file__).parent / "data" / "llm_outputs.jsonl").read_text().splitlines() if line]
+
+
+def _feed_in_chunks(text, rng):
+    extractor = VerdictExtractor()
+    pos = 0
+    while pos < len(text):
+        size = rng.randint(1, 12)
+        extractor.feed(text[pos:pos + size])
+        pos += size
+    return extractor.close()
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[c["name"] for c in CORPUS])
+def test_extract_verdict_corpus(case):
+    """Every sample model output yields the expected verdict/score and a narrative without the JSON."""
+    text, result = extract_verdict(case["output"])
+    assert result == {"verdict": case["verdict"], "score": case["score"]}
+    assert '"verdict"' not in text and "```" not in text
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[c["name"] for c in CORPUS])
+def test_streamed_chunks_match_one_shot(case):
+    """Splitting the output at arbitrary points, as streaming does, never changes the result."""
+    rng = random.Random(case["name"])
+    expected = extract_verdict(case["output"])
+    for _ in range(50):
+        assert _feed_in_chunks(case["output"], rng) == expected
+
+
+def test_mutated_outputs_never_raise():
+    """Fuzz: truncated, spliced and noisy outputs still return a well-formed result."""
+    rng = random.Random(39)
+    noise = '{}[]"\\`,:' + "verdict score GOOD BAD 0123456789 json\n"
+    for _ in range(2000):
+        text = rng.choice(CORPUS)["output"]
+        for _ in range(rng.randint(1, 4)):
+            i = rng.randint(0, len(text))
+            mutation = rng.randrange(3)
+            if mutation == 0:
+                text = text[:i]
+            elif mutation == 1:
+                text = text[:i] + "".join(rng.choice(noise) for _ in range(rng.randint(1, 8))) + text[i:]
+            else:
+                text = text[:i] + text[i + rng.randint(1, 8):]
+        narrative, result = _feed_in_chunks(text, rng)
+        assert isinstance(narrative, str)
+        assert result["verdict"] in ("GOOD", "BAD", None)
+        assert result["score"] is None or 0 <= result["score"] <= 5
+        assert (narrative, result) == extract_verdict(text)
+
+
+class _FakeStream:
+    """Stands in for a streamed Ollama /api/chat response."""
+
+    ok = True
+
+    def __init__(self, content, chunk_size=7):
+        pieces = [content[i:i + chunk_size] for i in range(0, len(content), chunk_size)]
+        self.lines = [json.dumps({"message": {"content": p}, "done": False}).encode() for p in pieces]
+        self.lines.append(json.dumps({"message": {"content": ""}, "done": True,
+                                      "prompt_eval_count": 120, "eval_count": len(pieces)}).encode())
+
+    def iter_lines(self):
+        return iter(self.lines)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_structured_evaluation_requests_schema_and_token_cap(monkeypatch):
+    """JSON mode sends the schema and num_predict, and reads narrative, verdict, score and dimensions."""
+    case = next(c for c in CORPUS if c["name"] == "structured")
+    sent = {}
+
+    def fake_post(url, headers=None, data=None, **kwargs):
+        sent.update(json.loads(data))
+        return _FakeStream(case["output"])
+
+    monkeypatch.setattr("fetchLLMresponse.requests.post", fake_post)
+    text, result = evaluate_player_response(
+        "A fire breaks out in your apartment.", "I stay low and check the door for heat before opening it.",
+        "survival", structured=True, num_predict=160)
+
+    assert sent["format"] == EVALUATION_SCHEMA and sent["options"] == {"num_predict": 160}
+    assert text == json.loads(case["output"])["narrative"]
+    assert result["verdict"] == "GOOD" and result["score"] == 3
+    assert result["dimensions"]["adaptability"] == "partial"
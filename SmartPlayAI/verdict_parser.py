@@ -0,0 +1,224 @@
+# Incremental extraction of the narrative and the final {"verdict": ..., "score": ...} object
+# from an LLM evaluation. Text is fed in chunks as it streams in and scanned exactly once:
+# code fences are dropped on the way, top-level JSON objects are tracked by brace depth
+# (string aware), and each complete object is parsed once. Malformed or truncated objects
+# fall back to a lenient key/value scan instead of scoring 0.
+import json
+import re
+
+_SPECIAL_OUTSIDE = re.compile(r"[{`]")
+_SPECIAL_INSIDE = re.compile(r'[{}"\\`]')
+_SPECIAL_STRING = re.compile(r'["\\]')
+_FENCE_LANGUAGE = "json"
+_LENIENT_VERDICT = re.compile(r"verdict\W{0,5}(good|bad)\b", re.IGNORECASE)
+_LENIENT_SCORE = re.compile(r"score\W{0,5}(\d+(?:\.\d+)?)", re.IGNORECASE)
+_PARTIAL_NARRATIVE = re.compile(r'"narrative"\s*:\s*"((?:[^"\\]|\\.)*)', re.DOTALL)
+_TAIL_SCAN = 300  # characters of narrative searched for "Verdict: GOOD" when no object was found
+
+GOOD_SCORE = 3
+
+
+def normalize_result(result: dict) -> dict:
+    """Clamp a parsed result to {"verdict": "GOOD"|"BAD"|None, "score": 0-5|None}."""
+    verdict = str(result.get("verdict") or "").upper().strip()
+    verdict = verdict if verdict in ("GOOD", "BAD") else None
+
+    score = result.get("score")
+    try:
+        score = max(0, min(5, int(round(float(score)))))
+    except (TypeError, ValueError):
+        score = None
+
+    # The rubric ties the verdict to the score, recover one from the other
+    if verdict is None and score is not None:
+        verdict = "GOOD" if score >= GOOD_SCORE else "BAD"
+    return {"verdict": verdict, "score": score}
+
+
+def _lenient_parse(text: str) -> dict | None:
+    verdict = _LENIENT_VERDICT.search(text)
+    score = _LENIENT_SCORE.search(text)
+    if not verdict and not score:
+        return None
+    return {"verdict": verdict.group(1) if verdict else None,
+            "score": score.group(1) if score else None}
+
+
+def _partial_narrative(text: str) -> str | None:
+    # The narrative string of a structured reply cut off by the token limit
+    match = _PARTIAL_NARRATIVE.search(text)
+    if not match:
+        return None
+    value = match.group(1)
+    try:
+        return json.loads('"' + value.rstrip("\\") + '"')
+    except ValueError:
+        return value
+
+
+class VerdictExtractor:
+    """
+    Feed chunks of model output with ``feed`` and call ``close`` once at the end.
+
+    ``close`` returns ``(evaluation_text, {"verdict": ..., "score": ...})``: the
+    narrative before the last verdict object, and that object normalized.
+    Objects without verdict/score keys are kept as narrative text. Structured
+    replies carry their text in a "narrative" key, which is used instead.
+    ``raw`` holds the last verdict object as parsed, e.g. for its "dimensions".
+    """
+
+    def __init__(self):
+        self._narrative = []       # chunks of text outside verdict objects
+        self._narrative_len = 0
+        self._object = []          # chunks of the top-level object being read
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._backticks = 0        # pending run of backticks, may span chunks
+        self._fence_tag = None     # letters read right after a fence, to drop a "json" tag
+        self._result = None
+        self._result_at = 0        # narrative length when the last result object started
+
+    # -- narrative / object sinks -------------------------------------------------------
+
+    def _emit(self, text: str) -> None:
+        if not text:
+            return
+        if self._depth:
+            self._object.append(text)
+        else:
+            self._narrative.append(text)
+            self._narrative_len += len(text)
+
+    def _flush_backticks(self) -> None:
+        if self._backticks:
+            if self._backticks < 3:
+                self._emit("`" * self._backticks)
+            else:
+                self._fence_tag = ""
+            self._backticks = 0
+
+    def _finish_object(self) -> None:
+        text = "".join(self._object)
+        self._object = []
+        try:
+            parsed = json.loads(text)
+        except ValueError:
+            parsed = _lenient_parse(text)
+        if isinstance(parsed, dict) and ("verdict" in parsed or "score" in parsed):
+            self._result = parsed
+            self._result_at = self._narrative_len
+        else:
+            # Braces in the narrative itself
+            self._narrative.append(text)
+            self._narrative_len += len(text)
+
+    # -- scanning -----------------------------------------------------------------------
+
+    def feed(self, chunk: str) -> None:
+        pos = 0
+        end = len(chunk)
+        while pos < end:
+            if self._fence_tag is not None:
+                # Drop an optional "json" language tag right after a fence
+                tag = self._fence_tag
+                while pos < end and len(tag) < len(_FENCE_LANGUAGE) and \
+                        chunk[pos].lower() == _FENCE_LANGUAGE[len(tag)]:
+                    tag += chunk[pos]
+                    pos += 1
+                if pos == end and len(tag) < len(_FENCE_LANGUAGE):
+                    self._fence_tag = tag
+                    return
+                self._end_fence_tag(tag)
+                continue
+
+            if self._backticks:
+                if chunk[pos] == "`":
+                    self._backticks += 1
+                    pos += 1
+                else:
+                    self._flush_backticks()
+                continue
+
+            if self._escaped:
+                # Character after a backslash inside a JSON string
+                self._emit(chunk[pos])
+                self._escaped = False
+                pos += 1
+                continue
+
+            if self._in_string:
+                pattern = _SPECIAL_STRING
+            else:
+                pattern = _SPECIAL_INSIDE if self._depth else _SPECIAL_OUTSIDE
+            match = pattern.search(chunk, pos)
+            if match is None:
+                self._emit(chunk[pos:])
+                return
+            index = match.start()
+            char = chunk[index]
+            self._emit(chunk[pos:index + 1] if self._in_string else chunk[pos:index])
+            pos = index + 1
+
+            if self._in_string:
+                # Only quotes and escapes matter inside a JSON string
+                if char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == "`":
+                self._backticks = 1
+            elif char == "{":
+                self._depth += 1
+                self._object.append("{")
+            elif char == "}":
+                self._object.append("}")
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_object()
+            elif char == '"':
+                self._in_string = True
+                self._object.append('"')
+            else:  # stray backslash outside a string
+                self._object.append(char)
+
+    def _end_fence_tag(self, tag: str) -> None:
+        if tag.lower() != _FENCE_LANGUAGE:
+            self._emit(tag)
+        self._fence_tag = None
+
+    @property
+    def raw(self) -> dict | None:
+        return self._result
+
+    def close(self) -> tuple[str, dict]:
+        if self._fence_tag is not None:
+            self._end_fence_tag(self._fence_tag)
+        self._flush_backticks()
+
+        narrative = "".join(self._narrative)
+        result = self._result
+        if self._depth:
+            # Truncated object (e.g. the token limit hit mid-JSON)
+            text = "".join(self._object)
+            truncated = _lenient_parse(text)
+            if truncated is not None:
+                result, self._result_at = truncated, len(narrative)
+                partial = _partial_narrative(text)
+                if partial is not None:
+                    result["narrative"] = partial
+        if isinstance(result, dict) and isinstance(result.get("narrative"), str):
+            return result["narrative"].strip(), normalize_result(result)
+        if result is None:
+            tail = _lenient_parse(narrative[-_TAIL_SCAN:])
+            if tail is None:
+                return narrative.strip(), {"verdict": None, "score": None}
+            return narrative.strip(), normalize_result(tail)
+        return narrative[:self._result_at].strip(), normalize_result(result)
+
+
+def extract_verdict(content: str) -> tuple[str, dict]:
+    """One-shot helper: ``(evaluation_text, {"verdict", "score"})`` from a full model output."""
+    extractor = VerdictExtractor()
+    extractor.feed(content)
+    return extractor.close()